@@ -0,0 +1,197 @@
+"""
+Token authentication with a cached token -> user lookup.
+
+DRF's TokenAuthentication joins Token and User on every request. This
+backend keeps what permission checks read (id, role, is_active,
+full_name) in a bounded in-process LRU, optionally backed by a shared
+Django cache (AUTH_TOKEN_SHARED_CACHE) so other workers skip the query too.
+
+request.user is a User with only those fields loaded; any other field is
+fetched from the database on first access, so views keep working
+unchanged. Entries are dropped when a token is deleted (logout, rotation,
+user deletion) and when a user is saved (deactivation, role change).
+Invalidation reaches the shared tier and this process's LRU; other
+processes' LRUs hold an entry for at most AUTH_TOKEN_CACHE_TTL seconds.
+QuerySet.update() bypasses the signals, so call invalidate_user() after one.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+CACHED_FIELDS = ('id', 'role', 'is_active', 'full_name')
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> cached user fields, each entry living `ttl` seconds."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.counts['local_hits'] + self.counts['shared_hits'] + self.counts['misses']
+            hits = lookups - self.counts['misses']
+            return {
+                **self.counts,
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hit_rate': round(hits / lookups, 3) if lookups else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+    return _cache
+
+
+def shared_cache():
+    alias = settings.AUTH_TOKEN_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def shared_key(key):
+    # Raw tokens stay out of the shared cache
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def build_user(values):
+    """A User carrying only CACHED_FIELDS; the rest load on access."""
+    return User.from_db(
+        'default',
+        list(CACHED_FIELDS),
+        [values[field.attname] for field in User._meta.concrete_fields if field.attname in CACHED_FIELDS],
+    )
+
+
+def invalidate_token(key):
+    get_cache().delete(key)
+    get_cache().count('invalidations')
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete(shared_key(key))
+
+
+def invalidate_user(user_id):
+    """Drop the cached entries of every token belonging to `user_id`."""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+def stats():
+    return {
+        'shared_cache': settings.AUTH_TOKEN_SHARED_CACHE or None,
+        'ttl': settings.AUTH_TOKEN_CACHE_TTL,
+        **get_cache().snapshot(),
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication that caches the token lookup."""
+
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+        values = cache.get(key)
+        if values is not None:
+            cache.count('local_hits')
+        else:
+            shared = shared_cache()
+            if shared is not None:
+                values = shared.get(shared_key(key))
+            if values is not None:
+                cache.count('shared_hits')
+            else:
+                cache.count('misses')
+                token = (
+                    Token.objects.filter(key=key)
+                    .values_list(*(f'user__{field}' for field in CACHED_FIELDS))
+                    .first()
+                )
+                if token is None:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                values = dict(zip(CACHED_FIELDS, token))
+                if shared is not None:
+                    shared.set(shared_key(key), values, settings.AUTH_TOKEN_SHARED_CACHE_TTL)
+            cache.set(key, values)
+
+        if not values['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return build_user(values), key
+
+
+# Invalidating after commit stops a concurrent request re-caching the old row.
+@receiver(post_delete, sender=Token)
+def _invalidate_deleted_token(sender, instance, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver(post_save, sender=User)
+def _invalidate_saved_user(sender, instance, created, **kwargs):
+    if not created:
+        user_id = instance.pk
+        transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _cache
+    if setting.startswith('AUTH_TOKEN_'):
+        _cache = None
@@ -28,6 +28,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'full_name', 'role', 'is_active', 'is_staff', 'created_at']
 
 
+# Public name card, safe to nest in catalog responses
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'full_name']
+
+
 # 3️⃣ General User Serializer
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
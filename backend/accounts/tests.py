@@ -1,3 +1,88 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from courses.testing import Call, QueryBudgetMixin
+from . import authentication
+
+User = get_user_model()
+
+
+class AccountQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'accounts.urls'
+
+    def prepare(self, data):
+        member = User.objects.create_user(
+            email='member@example.com', password='budget-pass', full_name='Member', role='STUDENT'
+        )
+        Token.objects.create(user=member)
+        return {'student': data['students'][0], 'doomed': data['students'][-1]}
+
+    scenarios = {
+        'register': [Call('post', '/api/accounts/register/', status=201, data={
+            'email': 'newcomer@example.com', 'password': 'budget-pass', 'full_name': 'Newcomer', 'role': 'STUDENT',
+        })],
+        'login': [Call('post', '/api/accounts/login/', data={'email': 'member@example.com', 'password': 'budget-pass'})],
+        'profile': [Call('get', '/api/accounts/profile/', 'student')],
+        'student-list': [Call('get', '/api/accounts/students/', 'admin')],
+        'instructor-list': [Call('get', '/api/accounts/instructors/', 'admin')],
+        'admin-user-delete': [Call('delete', lambda ctx: f"/api/accounts/users/{ctx['doomed'].id}/", 'admin', status=204)],
+        'auth-cache-status': [Call('get', '/api/accounts/auth-cache-status/', 'admin')],
+    }
+
+
+class TokenRevocationChecks:
+    """Cached tokens must stop authenticating once revoked."""
+    url = '/api/accounts/profile/'
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            email='member@example.com', password='pass', full_name='Member', role='STUDENT'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        # Warm the cache, then make sure the next request is served from it
+        misses = authentication.get_cache().counts['misses']
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(authentication.get_cache().counts['misses'], misses + 1)
+
+    def test_deleted_token_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TTL=30, AUTH_TOKEN_SHARED_CACHE='')
+class TokenCacheRevocationTests(TokenRevocationChecks, APITestCase):
+    def test_entry_expires_after_ttl(self):
+        # update() skips the invalidation signals, so only the TTL ends the entry
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        later = time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL
+        with mock.patch.object(authentication, 'time', mock.Mock(monotonic=lambda: later)):
+            self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(AUTH_TOKEN_CACHE_TTL=30, AUTH_TOKEN_SHARED_CACHE='default')
+class SharedTokenCacheRevocationTests(TokenRevocationChecks, APITestCase):
+    def test_entry_shared_with_other_workers(self):
+        # Another worker's empty local cache falls back to the shared tier
+        authentication.get_cache().clear()
+        shared_hits = authentication.get_cache().counts['shared_hits']
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(authentication.get_cache().counts['shared_hits'], shared_hits + 1)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterUserView, LoginUserView, UserProfileView, StudentListView, InstructorListView, AdminUserDeleteView
+from .views import RegisterUserView, LoginUserView, UserProfileView, StudentListView, InstructorListView, AdminUserDeleteView, AuthCacheStatusView
 
 urlpatterns = [
     path('register/', RegisterUserView.as_view(), name='register'),
@@ -8,4 +8,5 @@ urlpatterns = [
     path('students/', StudentListView.as_view(), name='student-list'),
     path('instructors/', InstructorListView.as_view(), name='instructor-list'),
     path('users/<int:pk>/', AdminUserDeleteView.as_view(), name='admin-user-delete'),
+    path('auth-cache-status/', AuthCacheStatusView.as_view(), name='auth-cache-status'),
 ]
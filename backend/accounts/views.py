@@ -4,12 +4,15 @@ from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate, get_user_model
+from courses.budgets import query_budget
 from .serializers import UserRegisterSerializer, UserProfileSerializer, UserSerializer
+from . import authentication
 from .permissions import IsAdmin 
 
 User = get_user_model()
 
 # 1️⃣ Registration API (public)
+@query_budget(4)
 class RegisterUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegisterSerializer
@@ -38,6 +41,7 @@ class RegisterUserView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 # 2️⃣ Login API (public)
+@query_budget(2)
 class LoginUserView(APIView):
     permission_classes = [AllowAny]
 
@@ -58,14 +62,17 @@ class LoginUserView(APIView):
 
 
 # 3️⃣ Profile API (authenticated)
+@query_budget(2)
 class UserProfileView(generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user only carries the fields cached by CachedTokenAuthentication
+        return User.objects.get(pk=self.request.user.pk)
 
 # 4️⃣ List of students (admin only)
+@query_budget(2)
 class StudentListView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
@@ -74,6 +81,7 @@ class StudentListView(generics.ListAPIView):
         return User.objects.filter(role='STUDENT')
 
 # 5️⃣ List of instructors (admin only)
+@query_budget(2)
 class InstructorListView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
@@ -83,7 +91,17 @@ class InstructorListView(generics.ListAPIView):
 
 
 # 6️⃣ Admin delete user (student or instructor)
+@query_budget(19)
 class AdminUserDeleteView(generics.DestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+
+
+# 7️⃣ Token authentication cache counters (admin only)
+@query_budget(1)
+class AuthCacheStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(authentication.stats())
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third-party apps
     'rest_framework',
@@ -57,7 +58,7 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
 }
 
@@ -107,6 +108,35 @@ DATABASES = {
 }
 
 
+# Cache
+# Defaults to per-process memory; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache) in production so
+# invalidation and single-flight locking apply across workers.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Version bumps in a per-process cache only reach the worker that made them,
+# so the catalog and enrollment caches below are off by default without a
+# shared backend.
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+# Seconds a cached catalog response lives before enrollment counts are refreshed (0 = off)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=60 if SHARED_CACHE else 0, cast=int)
+
+# Seconds a student's enrolled course ids stay cached (0 = load per request)
+ENROLLMENT_CACHE_TIMEOUT = config('ENROLLMENT_CACHE_TIMEOUT', default=300 if SHARED_CACHE else 0, cast=int)
+
+# Token -> user lookups cached per process (size, seconds) and, when set,
+# in this CACHES alias shared by all workers
+AUTH_TOKEN_CACHE_SIZE = config('AUTH_TOKEN_CACHE_SIZE', default=10000, cast=int)
+AUTH_TOKEN_CACHE_TTL = config('AUTH_TOKEN_CACHE_TTL', default=30, cast=int)
+AUTH_TOKEN_SHARED_CACHE = config('AUTH_TOKEN_SHARED_CACHE', default='')
+AUTH_TOKEN_SHARED_CACHE_TTL = config('AUTH_TOKEN_SHARED_CACHE_TTL', default=300, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -148,8 +178,33 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Lesson video delivery. Set VIDEO_SENDFILE_BACKEND to 'nginx' (X-Accel-Redirect to
+# VIDEO_ACCEL_REDIRECT_PREFIX, an internal location aliased to MEDIA_ROOT) or
+# 'apache' (X-Sendfile) in production; empty streams from Django.
+VIDEO_SENDFILE_BACKEND = config('VIDEO_SENDFILE_BACKEND', default='')
+VIDEO_ACCEL_REDIRECT_PREFIX = config('VIDEO_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Lifetime in seconds of the signed video URLs handed out with lessons
+VIDEO_URL_TTL = config('VIDEO_URL_TTL', default=3 * 60 * 60, cast=int)
+
+# Largest single chunk accepted by the resumable lesson video upload API
+LESSON_VIDEO_MAX_CHUNK_SIZE = config('LESSON_VIDEO_MAX_CHUNK_SIZE', default=64 * 1024 * 1024, cast=int)
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 # Razorpay Configuration (Test Mode)
 RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='rzp_test_your_key_id')
-RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='your_test_secret_key')
\ No newline at end of file
+RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='your_test_secret_key')
+# Gateway base URL; point at a local stub (manage.py run_stub_gateway) for testing
+RAZORPAY_BASE_URL = config('RAZORPAY_BASE_URL', default='https://api.razorpay.com')
+# Seconds to wait for a connection and for each response read
+RAZORPAY_CONNECT_TIMEOUT = config('RAZORPAY_CONNECT_TIMEOUT', default=3.05, cast=float)
+RAZORPAY_READ_TIMEOUT = config('RAZORPAY_READ_TIMEOUT', default=10, cast=float)
+# Keep-alive connections held per process
+RAZORPAY_POOL_SIZE = config('RAZORPAY_POOL_SIZE', default=10, cast=int)
+# Extra attempts for requests that are safe to repeat
+RAZORPAY_MAX_RETRIES = config('RAZORPAY_MAX_RETRIES', default=2, cast=int)
+# Consecutive failures that open the circuit, and seconds before a trial request
+RAZORPAY_BREAKER_THRESHOLD = config('RAZORPAY_BREAKER_THRESHOLD', default=5, cast=int)
+RAZORPAY_BREAKER_RESET = config('RAZORPAY_BREAKER_RESET', default=30, cast=float)
+# Secret configured for the webhook in the Razorpay dashboard
+RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default='')
@@ -0,0 +1,143 @@
+"""
+Per-request access context.
+
+The first enrollment check in a request loads the user's enrolled course
+ids as a set; every later check in that request (views, permissions,
+serializers) is a set lookup. The set is also cached across requests
+under a per-user enrollment version, bumped after any enrollment is
+created or deleted, so an unchanged student costs no query at all.
+Bulk writes that skip model signals must call bump_enrollment_version().
+A per-process cache only sees the bumps made in that process, so checks
+that deny access (confirm_enrolled) re-read the database first.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import permissions
+
+from .models import Enrollment
+
+
+def version_key(user_id):
+    return f'access:enrollments:{user_id}:version'
+
+
+def get_enrollment_version(user_id):
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_enrollment_version(user_id):
+    """Invalidate the cached enrolled course ids of `user_id`."""
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        get_enrollment_version(user_id)
+
+
+def load_enrolled_course_ids(user_id):
+    timeout = settings.ENROLLMENT_CACHE_TIMEOUT
+    if not timeout:
+        return frozenset(Enrollment.objects.filter(student_id=user_id).values_list('course_id', flat=True))
+
+    key = f'access:enrollments:{user_id}:{get_enrollment_version(user_id)}'
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = frozenset(Enrollment.objects.filter(student_id=user_id).values_list('course_id', flat=True))
+        cache.set(key, course_ids, timeout=timeout)
+    return course_ids
+
+
+class AccessContext:
+    """What the current user may reach, loaded lazily and at most once."""
+
+    def __init__(self, user):
+        self.user = user
+        self._enrolled_course_ids = None
+
+    @property
+    def role(self):
+        return self.user.role if self.user.is_authenticated else None
+
+    @property
+    def enrolled_course_ids(self):
+        if self._enrolled_course_ids is None:
+            if self.role == 'STUDENT':
+                self._enrolled_course_ids = load_enrolled_course_ids(self.user.pk)
+            else:
+                self._enrolled_course_ids = frozenset()
+        return self._enrolled_course_ids
+
+    def is_enrolled(self, course_id):
+        try:
+            return int(course_id) in self.enrolled_course_ids
+        except (TypeError, ValueError):
+            return False
+
+    def confirm_enrolled(self, course_id):
+        """
+        is_enrolled(), but a cached "no" is checked against the database
+        before it is trusted, since the enrollment may have been recorded
+        by a worker whose invalidation this one never saw.
+        """
+        if self.is_enrolled(course_id):
+            return True
+        if self.role != 'STUDENT' or not settings.ENROLLMENT_CACHE_TIMEOUT:
+            return False  # the set was just loaded from the database
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            return False
+        if not Enrollment.objects.filter(student_id=self.user.pk, course_id=course_id).exists():
+            return False
+        bump_enrollment_version(self.user.pk)
+        self._enrolled_course_ids = self.enrolled_course_ids | {course_id}
+        return True
+
+
+def get_access(request):
+    """The AccessContext of `request`, shared by the DRF and Django request objects."""
+    http_request = getattr(request, '_request', request)
+    access = getattr(http_request, 'access_context', None)
+    if access is None or access.user is not request.user:
+        access = http_request.access_context = AccessContext(request.user)
+    return access
+
+
+class IsEnrolledInCourse(permissions.BasePermission):
+    """
+    Student enrolled in the view's `course_id` URL argument or, for object
+    checks, in the object's course.
+    """
+    message = "You are not enrolled in this course."
+
+    def has_permission(self, request, view):
+        course_id = view.kwargs.get('course_id')
+        if course_id is None:
+            return True  # decided by has_object_permission
+        return get_access(request).confirm_enrolled(course_id)
+
+    def has_object_permission(self, request, view, obj):
+        return get_access(request).confirm_enrolled(obj.course_id)
+
+
+@receiver(post_save, sender=Enrollment)
+def _bump_on_enroll(sender, instance, created, **kwargs):
+    if created:
+        student_id = instance.student_id
+        transaction.on_commit(lambda: bump_enrollment_version(student_id))
+
+
+@receiver(post_delete, sender=Enrollment)
+def _bump_on_unenroll(sender, instance, **kwargs):
+    student_id = instance.student_id
+    transaction.on_commit(lambda: bump_enrollment_version(student_id))
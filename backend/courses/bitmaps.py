@@ -0,0 +1,159 @@
+"""
+Per-enrollment lesson completion bitmaps.
+
+Enrollment.completed_lessons_bitmap mirrors the student's completed
+LessonProgress rows for that course: bit N (little-endian, least significant
+bit of the first byte first) is set when the lesson with order N is
+completed; orders are capped at models.MAX_LESSON_ORDER, which bounds the
+bitmap size. LessonProgress stays the source of truth; bitmaps are updated
+alongside its writes. Deleting or reordering lessons only schedules a
+rebuild (`schedule_rebuild`), which `manage.py rebuild_completion_bitmaps
+--pending` carries out one course per transaction; until then `is_stale`
+tells readers to fall back to LessonProgress.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BitmapRebuild, Enrollment, LessonProgress
+
+
+def to_int(bitmap):
+    return int.from_bytes(bytes(bitmap or b''), 'little')
+
+
+def to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def popcount(bitmap):
+    return to_int(bitmap).bit_count()
+
+
+def covers(bitmap, lesson_orders):
+    """True when every lesson order in `lesson_orders` (non-empty) is set."""
+    mask = 0
+    for order in lesson_orders:
+        mask |= 1 << order
+    return bool(mask) and to_int(bitmap) & mask == mask
+
+
+def apply_changes(bitmap, changes):
+    """Return `bitmap` with each {order: completed} change applied."""
+    value = to_int(bitmap)
+    for order, completed in changes.items():
+        if completed:
+            value |= 1 << order
+        else:
+            value &= ~(1 << order)
+    return to_bytes(value)
+
+
+def schedule_rebuild(course_ids):
+    """Mark the courses' bitmaps stale; call inside the transaction that made them so."""
+    now = timezone.now()
+    BitmapRebuild.objects.bulk_create(
+        [BitmapRebuild(course_id=course_id, requested_at=now) for course_id in set(course_ids)],
+        update_conflicts=True,
+        unique_fields=['course'],
+        update_fields=['requested_at'],
+    )
+
+
+def is_stale(course_id):
+    return BitmapRebuild.objects.filter(course_id=course_id).exists()
+
+
+def rebuild_course_bitmaps(course_ids, batch_size=1000):
+    """
+    Recompute every enrollment bitmap of the given courses from
+    LessonProgress, one course per transaction. Returns the number of
+    enrollments written.
+    """
+    return sum(_rebuild_course(course_id, batch_size) for course_id in course_ids)
+
+
+def process_pending(batch_size=1000):
+    """Rebuild every course with a scheduled rebuild, oldest request first. Returns the number of courses."""
+    courses = 0
+    while True:
+        with transaction.atomic():
+            # SKIP LOCKED lets several workers share the queue
+            pending = BitmapRebuild.objects.select_for_update(skip_locked=True).order_by('requested_at').first()
+            if pending is None:
+                return courses
+            _rebuild_course(pending.course_id, batch_size)
+        courses += 1
+
+
+def _rebuild_course(course_id, batch_size):
+    with transaction.atomic():
+        # Drop the marker first: a lesson write that schedules a new rebuild
+        # meanwhile waits for this transaction and then re-queues the course.
+        BitmapRebuild.objects.filter(course_id=course_id).delete()
+        # Progress writes update bitmaps under the enrollment row lock, so once
+        # every row is locked none can land between the read and the write below.
+        enrollment_ids = list(
+            Enrollment.objects.select_for_update().filter(course_id=course_id)
+            .order_by('id').values_list('id', 'student_id')
+        )
+        completed = defaultdict(int)
+        rows = LessonProgress.objects.filter(
+            lesson__course_id=course_id,
+            is_completed=True
+        ).values_list('student_id', 'lesson__order')
+        for student_id, order in rows.iterator(chunk_size=batch_size):
+            completed[student_id] |= 1 << order
+
+        for start in range(0, len(enrollment_ids), batch_size):
+            Enrollment.objects.bulk_update(
+                [
+                    Enrollment(id=enrollment_id, completed_lessons_bitmap=to_bytes(completed.get(student_id, 0)))
+                    for enrollment_id, student_id in enrollment_ids[start:start + batch_size]
+                ],
+                ['completed_lessons_bitmap'],
+            )
+    return len(enrollment_ids)
+
+
+def completion_report(course, lesson_orders):
+    """
+    Course-wide completion figures from the enrollment bitmaps, aggregated
+    with NumPy: the bitmaps are stacked into one uint8 matrix and unpacked
+    into a students x lessons bit matrix, so per-lesson and per-student
+    totals are single vectorized sums.
+    """
+    import numpy as np
+
+    bitmaps = [
+        bytes(bitmap or b'')
+        for bitmap in Enrollment.objects.filter(course=course).values_list('completed_lessons_bitmap', flat=True)
+    ]
+    lesson_orders = list(lesson_orders)
+    if not bitmaps or not lesson_orders:
+        return {
+            'enrollments': len(bitmaps),
+            'lessons': len(lesson_orders),
+            'completion_rate': None,
+            'students_completed': 0,
+            'lesson_completion_rates': {},
+        }
+
+    width = max(max(lesson_orders) // 8 + 1, max(len(bitmap) for bitmap in bitmaps))
+    matrix = np.zeros((len(bitmaps), width), dtype=np.uint8)
+    for row, bitmap in enumerate(bitmaps):
+        matrix[row, :len(bitmap)] = np.frombuffer(bitmap, dtype=np.uint8)
+    bits = np.unpackbits(matrix, axis=1, bitorder='little')[:, lesson_orders]
+
+    per_lesson = bits.sum(axis=0) / len(bitmaps)
+    per_student = bits.sum(axis=1)
+    return {
+        'enrollments': len(bitmaps),
+        'lessons': len(lesson_orders),
+        'completion_rate': round(float(per_student.sum()) / bits.size * 100),
+        'students_completed': int((per_student == len(lesson_orders)).sum()),
+        'lesson_completion_rates': {
+            order: round(float(rate) * 100) for order, rate in zip(lesson_orders, per_lesson)
+        },
+    }
@@ -0,0 +1,31 @@
+"""
+Query budgets: the most SQL queries a view may run for one request,
+declared next to the view and enforced by the QueryBudgetMixin test suites.
+
+    @query_budget(4)                     every method
+    @query_budget(GET=3, POST=6)         per HTTP method
+    @query_budget(list=4, create=5)      per action, on a ViewSet
+
+Put it above @api_view on function views. Budgets count statements sent
+to the database for a cold request (empty caches), savepoints excluded.
+"""
+
+
+def query_budget(default=None, **budgets):
+    def decorate(view):
+        view.query_budget = {**budgets, **({'*': default} if default is not None else {})}
+        return view
+    return decorate
+
+
+def budget_for(view_func, method):
+    """The budget of the resolved `view_func` for `method`, or None if undeclared."""
+    budgets = getattr(view_func, 'query_budget', None)
+    if budgets is None:
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budgets = getattr(view_class, 'query_budget', None)
+    if budgets is None:
+        return None
+    actions = getattr(view_func, 'actions', None)
+    key = actions.get(method.lower()) if actions else method.upper()
+    return budgets.get(key, budgets.get('*'))
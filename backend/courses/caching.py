@@ -0,0 +1,102 @@
+"""
+Versioned response cache for the course catalog.
+
+Cached payloads are keyed by catalog version, visibility scope, action and
+query params. Any change that alters what the catalog shows bumps the
+version instead of deleting keys, so stale entries simply stop being read
+and age out. Enrollment-driven counters are not versioned: they refresh
+when an entry expires (CATALOG_CACHE_TIMEOUT). With a timeout of 0 (the
+default without a shared cache backend) nothing is cached.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'catalog:version'
+LOCK_TIMEOUT = 10  # seconds a recomputation may hold the single-flight lock
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_catalog_version()
+
+
+def get_scope(user):
+    """Anonymous users and students share one view of the catalog."""
+    if not user.is_authenticated or user.role == 'STUDENT':
+        return 'public'
+    if user.role == 'INSTRUCTOR':
+        return f'instructor:{user.pk}'
+    return 'admin'
+
+
+def make_key(request, action, pk=None):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    scope = get_scope(request.user)
+    return f'catalog:{get_catalog_version()}:{scope}:{action}:{pk}:{digest}'
+
+
+def enabled():
+    return settings.CATALOG_CACHE_TIMEOUT > 0
+
+
+def peek(key):
+    return cache.get(key) if enabled() else None
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    Return the cached value for `key`, computing it at most once at a time.
+
+    The first caller to miss takes a short-lived lock (cache.add is atomic on
+    every backend) and recomputes; concurrent callers poll for its result
+    instead of all hitting the database. If the lock holder does not finish
+    within LOCK_TIMEOUT, waiters fall back to computing themselves.
+    """
+    if timeout is None:
+        timeout = settings.CATALOG_CACHE_TIMEOUT
+    if timeout <= 0:
+        return compute()
+
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout=timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return compute()
@@ -0,0 +1,74 @@
+"""
+Conditional GET helpers (ETag / Last-Modified).
+
+Views derive validators from cheap version stamps (max timestamps, row counts)
+so a matching If-None-Match is answered with 304 before anything is
+serialized.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    If-None-Match wins when present; If-Modified-Since is only consulted for
+    resources that report a last_modified which also moves on deletions.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(',')}
+        return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+    if last_modified is not None:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return since is not None and int(last_modified.timestamp()) <= since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Representations depend on the caller; make browsers revalidate every time.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+
+class ConditionalListMixin:
+    """
+    Add ETag/Last-Modified validation to a ListAPIView.
+
+    get_version_stamp() returns (parts, last_modified): `parts` is any
+    repr-able tuple that changes whenever the list does, and `last_modified`
+    is a datetime or None. The default suits querysets whose rows carry a
+    `version_field` timestamp; override it when the list depends on more.
+    """
+    version_field = 'updated_at'
+
+    def get_version_stamp(self):
+        # Deleting a row moves no timestamp, so only the ETag (via the count) covers it.
+        stamp = self.get_queryset().order_by().aggregate(count=Count('pk'), changed=Max(self.version_field))
+        return (stamp['count'], stamp['changed']), None
+
+    def list(self, request, *args, **kwargs):
+        parts, last_modified = self.get_version_stamp()
+        etag = make_etag(request.get_full_path(), *parts)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
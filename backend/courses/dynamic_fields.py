@@ -0,0 +1,93 @@
+"""
+Sparse fieldsets for API responses.
+
+Serializers using DynamicFieldsMixin honour two query parameters on the
+top-level object:
+
+    ?fields=title,price    render only these fields (plus id, always kept)
+    ?expand=instructor     swap in (or add) the nested representations the
+                           serializer lists in get_expandable_fields()
+
+Dropped fields are removed from the serializer before rendering, so their
+SerializerMethodFields never run. Views use requested_fields(),
+expanded_fields() and only_fields() to load just the columns, joins and
+annotations the response needs.
+
+Both parameters only shape reads (GET, HEAD, OPTIONS). Writes validate
+against and return the full serializer, so ?fields= can never drop an
+input the serializer needs.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class DynamicFieldsMixin:
+    def get_expandable_fields(self):
+        """{name: serializer field} representations available through ?expand="""
+        return {}
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self.is_top_level():
+            return fields
+
+        expand = parse_list(request.query_params.get('expand'))
+        if expand:
+            expandable = self.get_expandable_fields()
+            unknown = expand - expandable.keys()
+            if unknown:
+                raise serializers.ValidationError(
+                    {'expand': f"Unknown field(s) {sorted(unknown)}; expandable: {sorted(expandable)}."}
+                )
+            for name in expand:
+                fields[name] = expandable[name]
+
+        requested = parse_list(request.query_params.get('fields'))
+        if requested:
+            unknown = requested - fields.keys()
+            if unknown:
+                raise serializers.ValidationError(
+                    {'fields': f"Unknown field(s) {sorted(unknown)}."}
+                )
+            keep = requested | expand | {'id'}
+            fields = {name: field for name, field in fields.items() if name in keep}
+        return fields
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Names of the top-level fields this request will render."""
+        return set(cls(context={'request': request}).fields)
+
+    @classmethod
+    def expanded_fields(cls, request):
+        if request.method not in SAFE_METHODS:
+            return set()
+        return parse_list(request.query_params.get('expand'))
+
+    @classmethod
+    def only_fields(cls, request):
+        """
+        Model fields the rendered fields read, for QuerySet.only(). Method
+        fields name what they read in Meta.field_dependencies.
+        """
+        model = cls.Meta.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        dependencies = getattr(cls.Meta, 'field_dependencies', {})
+        columns = {model._meta.pk.name}
+        for name, field in cls(context={'request': request}).fields.items():
+            columns.update(dependencies.get(name, ()))
+            source = field.source.split('.')[0]
+            if source in concrete:
+                columns.add(source)
+        return sorted(columns)
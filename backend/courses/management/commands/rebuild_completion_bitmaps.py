@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import bitmaps
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute enrollment completion bitmaps from LessonProgress, one course per transaction. "
+        "With --pending, only courses whose lessons were deleted or reordered since their last rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help='Only rebuild the given course id (repeatable).',
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Work off the rebuilds scheduled by lesson writes.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='With --pending, keep polling for new rebuilds instead of exiting once none are left.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when nothing is pending (with --loop).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Enrollments updated per query.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['pending']:
+            total = 0
+            while True:
+                total += bitmaps.process_pending(batch_size=batch_size)
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt completion bitmaps for {total} pending course(s)."))
+            return
+
+        course_ids = options['course_ids'] or self.all_course_ids(batch_size)
+        written = bitmaps.rebuild_course_bitmaps(course_ids, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt completion bitmaps for {written} enrollment(s)."))
+
+    def all_course_ids(self, batch_size):
+        """Every course id, fetched a page at a time."""
+        last_id = 0
+        while True:
+            page = list(
+                Course.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            yield from page
+            if len(page) < batch_size:
+                return
+            last_id = page[-1]
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import CourseStats
+
+
+class Command(BaseCommand):
+    help = "Recompute CourseStats counters from enrollments, lessons, progress and paid orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help='Only rebuild the given course id (repeatable).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows upserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        written = CourseStats.rebuild(
+            course_ids=options['course_ids'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {written} course(s)."))
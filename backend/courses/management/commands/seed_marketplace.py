@@ -0,0 +1,108 @@
+import argparse
+import re
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.seeding import MarketplaceSeeder
+
+SUFFIXES = {'': 1, 'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000}
+
+
+def count(value):
+    """A row count such as 5000, 5_000, 5k or 1.5M."""
+    match = re.fullmatch(r'(\d[\d_]*(?:\.\d+)?)([kmb]?)', value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid count {value!r}; use e.g. 5000, 5k or 1.5M")
+    return int(float(match.group(1).replace('_', '')) * SUFFIXES[match.group(2)])
+
+
+def rate(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise argparse.ArgumentTypeError('must be between 0 and 1')
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic marketplace for load and query-plan testing, e.g. "
+        "--instructors 5k --courses 100k --students 1M --enrollments 10M. Rows are skewed like real "
+        "traffic and streamed in with COPY; the same arguments (including --seed and --end) give the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instructors', type=count, default=50)
+        parser.add_argument('--courses', type=count, default=1_000)
+        parser.add_argument('--students', type=count, default=10_000)
+        parser.add_argument('--enrollments', type=count, default=50_000, help='Total enrollments across students.')
+        parser.add_argument('--lessons-per-course', type=int, default=8, help='Average lessons per course.')
+        parser.add_argument(
+            '--progress-rate',
+            type=rate,
+            default=0.5,
+            help='Fraction of enrollments with lesson progress (one row per lesson reached).',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            default=None,
+            help='Last day of activity (YYYY-MM-DD, default today); activity covers the --days before it.',
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Students whose activity is generated and copied per batch.',
+        )
+        parser.add_argument(
+            '--password',
+            default=None,
+            help='Password for every generated user (default: unusable).',
+        )
+        parser.add_argument(
+            '--check-foreign-keys',
+            action='store_true',
+            help='Keep foreign key checks on. They are skipped by default when the database user may do so.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Email prefix of generated users; must not be in use yet.',
+        )
+
+    def handle(self, *args, **options):
+        if options['instructors'] < 1 or options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--instructors, --days and --batch-size must be at least 1.')
+        if get_user_model().objects.filter(email__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users with the prefix {options['prefix']!r} already exist; pass another --prefix.")
+
+        started = time.monotonic()
+        seeder = MarketplaceSeeder(
+            instructors=options['instructors'],
+            courses=options['courses'],
+            students=options['students'],
+            enrollments=options['enrollments'],
+            lessons_per_course=options['lessons_per_course'],
+            progress_rate=options['progress_rate'],
+            seed=options['seed'],
+            end=options['end'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            prefix=options['prefix'],
+            check_foreign_keys=options['check_foreign_keys'],
+            log=self.stdout.write if options['verbosity'] > 0 else None,
+        )
+        counts = seeder.run()
+
+        total = sum(counts.values())
+        for model, rows in counts.items():
+            self.stdout.write(f"  {model._meta.label}: {rows:,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} rows in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 00:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+    Order = apps.get_model('orders', 'Order')
+
+    def aggregate(queryset, func, group_by='course', output_field=None):
+        grouped = queryset.order_by().values(group_by).annotate(total=func).values('total')
+        output_field = output_field or IntegerField()
+        return Coalesce(Subquery(grouped, output_field=output_field), Value(0), output_field=output_field)
+
+    courses = Course.objects.annotate(
+        enrollment_total=aggregate(Enrollment.objects.filter(course=OuterRef('pk')), Count('*')),
+        lesson_total=aggregate(Lesson.objects.filter(course=OuterRef('pk')), Count('*')),
+        completed_total=aggregate(
+            LessonProgress.objects.filter(lesson__course=OuterRef('pk'), is_completed=True),
+            Count('*'),
+            group_by='lesson__course',
+        ),
+        duration_total=aggregate(Lesson.objects.filter(course=OuterRef('pk')), Sum('duration_minutes')),
+        revenue_total=aggregate(
+            Order.objects.filter(course=OuterRef('pk'), status='PAID'),
+            Sum('amount'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+    CourseStats.objects.bulk_create(
+        [
+            CourseStats(
+                course_id=course.pk,
+                enrollment_count=course.enrollment_total,
+                lesson_count=course.lesson_total,
+                completed_progress_count=course.completed_total,
+                total_duration_minutes=course.duration_total,
+                revenue=course.revenue_total,
+            )
+            for course in courses.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_lesson_video_file'),
+        ('orders', '0002_cartitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('enrollment_count', models.PositiveIntegerField(default=0)),
+                ('lesson_count', models.PositiveIntegerField(default=0)),
+                ('completed_progress_count', models.PositiveIntegerField(default=0)),
+                ('total_duration_minutes', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'course stats',
+            },
+        ),
+        migrations.RunPython(backfill_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:00
+
+import django.db.models.constraints
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_lesson_video_upload'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='lesson',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='lesson',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], fields=('course', 'order'), name='unique_lesson_order'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:02
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_completion_bitmaps(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+
+    completed = defaultdict(int)
+    rows = LessonProgress.objects.filter(is_completed=True).values_list(
+        'student_id', 'lesson__course_id', 'lesson__order'
+    )
+    for student_id, course_id, order in rows.iterator(chunk_size=2000):
+        completed[(student_id, course_id)] |= 1 << order
+
+    batch = []
+    for enrollment in Enrollment.objects.only('id', 'student_id', 'course_id').iterator(chunk_size=1000):
+        value = completed.get((enrollment.student_id, enrollment.course_id), 0)
+        if not value:
+            continue
+        enrollment.completed_lessons_bitmap = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+        batch.append(enrollment)
+        if len(batch) >= 1000:
+            Enrollment.objects.bulk_update(batch, ['completed_lessons_bitmap'])
+            batch = []
+    if batch:
+        Enrollment.objects.bulk_update(batch, ['completed_lessons_bitmap'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_lesson_order_deferrable_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons_bitmap',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_completion_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes on tables that are live in production
+    atomic = False
+
+    dependencies = [
+        ('courses', '0014_enrollment_completion_bitmap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='lessonprogress',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['lesson'], name='progress_completed_lesson_idx'),
+        ),
+        # Covered by course_instructor_created_idx
+        migrations.AlterField(
+            model_name='course',
+            name='instructor',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'role': 'INSTRUCTOR'}, on_delete=django.db.models.deletion.CASCADE, related_name='courses', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
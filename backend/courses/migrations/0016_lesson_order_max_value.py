@@ -0,0 +1,19 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:55
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_hot_table_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='order',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MaxValueValidator(10000)]),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.9 on 2026-10-18 02:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_lesson_order_max_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BitmapRebuild',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='courses.course')),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,5 +1,60 @@
-from django.db import models
+import uuid
+
+from django.apps import apps
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.core.validators import MaxValueValidator
+from django.utils import timezone
+
+
+def _count_subquery(queryset, group_by='course'):
+    """Correlated COUNT(*) over `queryset`, grouped on its course column."""
+    counted = queryset.order_by().values(group_by).annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def _sum_subquery(queryset, field, output_field, group_by='course'):
+    """Correlated SUM(field) over `queryset`, grouped on its course column."""
+    summed = queryset.order_by().values(group_by).annotate(total=Sum(field)).values('total')
+    return Coalesce(Subquery(summed, output_field=output_field), Value(0), output_field=output_field)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_catalog_stats(self, user=None, fields=None):
+        """
+        Annotate the figures CourseSerializer exposes so a whole page of
+        courses is serialized without any per-course queries:
+        enrollment_total, lesson_total, completed_progress_total (read from
+        the CourseStats row) and user_is_enrolled.
+
+        `fields` limits the annotations to those the named serializer fields
+        read; None annotates everything.
+        """
+        def wanted(*names):
+            return fields is None or any(name in fields for name in names)
+
+        queryset = self
+        if wanted('enrollment_count', 'completion_rate'):
+            queryset = queryset.annotate(enrollment_total=Coalesce(F('stats__enrollment_count'), Value(0)))
+        if wanted('completion_rate'):
+            queryset = queryset.annotate(
+                lesson_total=Coalesce(F('stats__lesson_count'), Value(0)),
+                completed_progress_total=Coalesce(F('stats__completed_progress_count'), Value(0)),
+            )
+        if not wanted('is_enrolled'):
+            return queryset
+
+        if user is not None and user.is_authenticated:
+            return queryset.annotate(
+                user_is_enrolled=Exists(
+                    Enrollment.objects.filter(student=user, course=OuterRef('pk'))
+                )
+            )
+        return queryset.annotate(user_is_enrolled=Value(False))
 
 
 class Course(models.Model):
@@ -12,10 +67,37 @@ class Course(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'INSTRUCTOR'},
-        related_name="courses"
+        related_name="courses",
+        db_index=False  # course_instructor_created_idx leads with instructor
     )
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Stored tsvector maintained by Postgres; titles rank above descriptions.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        # Catalog access paths: approved courses ordered by the keyset
+        # (created_at, id) or by price, optionally narrowed by category.
+        indexes = [
+            models.Index(fields=['is_approved', '-created_at', '-id'], name='course_approved_created_idx'),
+            models.Index(
+                fields=['is_approved', 'category', '-created_at', '-id'],
+                name='course_approved_category_idx'
+            ),
+            models.Index(fields=['is_approved', 'price', 'id'], name='course_approved_price_idx'),
+            models.Index(fields=['instructor', '-created_at', '-id'], name='course_instructor_created_idx'),
+            GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -34,6 +116,8 @@ class Enrollment(models.Model):
         related_name="enrollments"
     )
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    # Bit N set = lesson with order N completed; see courses/bitmaps.py
+    completed_lessons_bitmap = models.BinaryField(default=b"", editable=False)
 
     class Meta:
         unique_together = ("student", "course")
@@ -41,6 +125,29 @@ class Enrollment(models.Model):
     def __str__(self):
         return f"{self.student.full_name} enrolled in {self.course.title}"
 
+
+class BitmapRebuild(models.Model):
+    """
+    A course whose enrollment completion bitmaps went stale when its lessons
+    were deleted or reordered. Recorded in the same transaction as that
+    write and worked off by `manage.py rebuild_completion_bitmaps --pending`.
+    """
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+"
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Bitmap rebuild for course {self.course_id}"
+
+# Lesson.order doubles as the bit index of Enrollment.completed_lessons_bitmap,
+# so it is capped to keep every bitmap small (at most ~1.25 KB).
+MAX_LESSON_ORDER = 10_000
+
+
 class Lesson(models.Model):
     course = models.ForeignKey(
         Course,
@@ -51,13 +158,22 @@ class Lesson(models.Model):
     description = models.TextField(blank=True, default="")
     video_url = models.URLField(blank=True, null=True)
     video_file = models.FileField(upload_to='lesson_videos/', blank=True, null=True)
-    order = models.PositiveIntegerField()
+    order = models.PositiveIntegerField(validators=[MaxValueValidator(MAX_LESSON_ORDER)])
     duration_minutes = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order"]
-        unique_together = ("course", "order")
+        constraints = [
+            # Deferrable so a bulk reorder can swap positions inside one
+            # transaction (SET CONSTRAINTS ... DEFERRED); immediate otherwise.
+            models.UniqueConstraint(
+                fields=["course", "order"],
+                name="unique_lesson_order",
+                deferrable=models.Deferrable.IMMEDIATE,
+            ),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -79,7 +195,168 @@ class LessonProgress(models.Model):
 
     class Meta:
         unique_together = ("student", "lesson")
+        indexes = [
+            # Per-course completion counts and bitmap rebuilds read completed rows only
+            models.Index(
+                fields=["lesson"],
+                condition=models.Q(is_completed=True),
+                name="progress_completed_lesson_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.full_name} - {self.lesson.title}"
 
+
+
+class LessonVideoUpload(models.Model):
+    """
+    A resumable, chunked upload of a lesson video. Chunks are appended to a
+    part file under MEDIA_ROOT/lesson_videos/ and the file is attached to the
+    lesson once every byte has arrived and the checksum matches.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        COMPLETE = "COMPLETE", "Complete"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name="video_uploads"
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="video_uploads"
+    )
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} for {self.lesson.title}"
+
+
+class CourseStats(models.Model):
+    """
+    Denormalized per-course counters, kept current by the enrollment, lesson,
+    progress and payment write paths so catalog reads never have to COUNT(*)
+    over tables that grow with every student.
+    Run `manage.py rebuild_course_stats` to repair drift.
+    """
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+    enrollment_count = models.PositiveIntegerField(default=0)
+    lesson_count = models.PositiveIntegerField(default=0)
+    completed_progress_count = models.PositiveIntegerField(default=0)
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "course stats"
+
+    def __str__(self):
+        return f"Stats for {self.course.title}"
+
+    @classmethod
+    def increment(cls, course_id, **deltas):
+        """
+        Atomically apply counter deltas, e.g. increment(course.id, enrollment_count=1).
+        Call it after the write it records; a missing row is rebuilt from
+        scratch, which already includes that write.
+        """
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not updates:
+            return
+        updates['updated_at'] = timezone.now()
+        if not cls.objects.filter(course_id=course_id).update(**updates):
+            cls.rebuild(course_ids=[course_id])
+
+    @classmethod
+    def rebuild(cls, course_ids=None, batch_size=500):
+        """
+        Recompute counters from the source tables and upsert them.
+        Rebuilds every course when `course_ids` is None. Returns the number
+        of rows written.
+        """
+        Order = apps.get_model('orders', 'Order')
+        OrderItem = apps.get_model('orders', 'OrderItem')
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+        courses = Course.objects.order_by('pk').annotate(
+            enrollment_total=_count_subquery(
+                Enrollment.objects.filter(course=OuterRef('pk'))
+            ),
+            lesson_total=_count_subquery(
+                Lesson.objects.filter(course=OuterRef('pk'))
+            ),
+            completed_progress_total=_count_subquery(
+                LessonProgress.objects.filter(lesson__course=OuterRef('pk'), is_completed=True),
+                group_by='lesson__course'
+            ),
+            duration_total=_sum_subquery(
+                Lesson.objects.filter(course=OuterRef('pk')),
+                'duration_minutes',
+                IntegerField()
+            ),
+            order_revenue=_sum_subquery(
+                Order.objects.filter(course=OuterRef('pk'), status='PAID'),
+                'amount',
+                money
+            ),
+            item_revenue=_sum_subquery(
+                OrderItem.objects.filter(course=OuterRef('pk'), order__status='PAID'),
+                'price',
+                money
+            ),
+        ).values_list(
+            'pk', 'enrollment_total', 'lesson_total', 'completed_progress_total',
+            'duration_total', 'order_revenue', 'item_revenue'
+        )
+        if course_ids is not None:
+            courses = courses.filter(pk__in=course_ids)
+
+        written = 0
+        now = timezone.now()
+        batch = []
+        for row in courses.iterator(chunk_size=batch_size):
+            course_id, enrollments, lessons, completed, duration, order_revenue, item_revenue = row
+            batch.append(cls(
+                course_id=course_id,
+                enrollment_count=enrollments,
+                lesson_count=lessons,
+                completed_progress_count=completed,
+                total_duration_minutes=duration,
+                revenue=order_revenue + item_revenue,
+                updated_at=now,
+            ))
+            if len(batch) >= batch_size:
+                written += cls._upsert(batch)
+                batch = []
+        if batch:
+            written += cls._upsert(batch)
+        return written
+
+    @classmethod
+    def _upsert(cls, rows):
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['course'],
+                update_fields=[
+                    'enrollment_count', 'lesson_count', 'completed_progress_count',
+                    'total_duration_minutes', 'revenue', 'updated_at',
+                ],
+            )
+        return len(rows)
@@ -0,0 +1,91 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class CourseCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the course catalog.
+
+    Every response is a page of `page_size` (default 20, at most 100)
+    courses; clients follow the `next` link for more.
+
+    Every ordering is (field, id), and the cursor position is that pair, so
+    each page starts strictly after the last row of the previous one:
+    WHERE field > v OR (field = v AND id > pk). DRF's own cursor only keys
+    on the first field and falls back to an offset for ties, which stops
+    advancing past `offset_cutoff` equal values (e.g. every free course).
+    Positions are unique, so cursors never carry an offset.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    # Public `ordering` values -> ORDER BY clause; both keys run the same direction
+    ORDERINGS = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        return self.ORDERINGS.get(request.query_params.get('ordering'), self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            queryset = queryset.filter(self.after(queryset.model, position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, model, position, reverse):
+        """Rows strictly past `position` ("value|pk") in the direction of travel."""
+        value, _, pk = position.rpartition('|')
+        field = model._meta.get_field(self.ordering[0].lstrip('-'))
+        try:
+            value, pk = field.to_python(value), model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        lookup = 'lt' if self.ordering[0].startswith('-') != reverse else 'gt'
+        return Q(**{f'{field.name}__{lookup}': value}) | Q(**{field.name: value, f'pk__{lookup}': pk})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.position_of(self.page[-1]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.position_of(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def position_of(self, instance):
+        field = instance._meta.get_field(self.ordering[0].lstrip('-'))
+        return f'{field.value_to_string(instance)}|{instance.pk}'
@@ -0,0 +1,372 @@
+"""
+Synthetic marketplace data at production volume, for `manage.py seed_marketplace`.
+
+Rows are generated in Python and streamed into Postgres with COPY. Ids are
+assigned here, so related rows are written without reading anything back.
+Popularity is skewed the way a real catalog is: a course's share of
+enrollments follows a Zipf law over a shuffled catalog, enrollments per
+student follow a Pareto distribution, and a few instructors own most
+courses. The same arguments and seed produce the same rows on an empty
+database.
+"""
+import bisect
+import itertools
+import random
+import time
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+
+from orders.models import CartItem, Order, Payment
+from reviews.models import Review
+from . import bitmaps
+from .models import Course, CourseStats, Enrollment, Lesson, LessonProgress
+
+User = get_user_model()
+
+TOPICS = [
+    'Python', 'Django', 'React', 'SQL', 'Machine Learning', 'UX Design', 'Figma', 'Marketing',
+    'Photography', 'Guitar', 'Excel', 'Public Speaking', 'Kubernetes', 'Rust', 'Statistics', 'Finance',
+]
+LEVELS = ['for Beginners', 'Bootcamp', 'Masterclass', 'in Practice', 'from Scratch', 'Advanced']
+CATEGORIES = ['Development', 'Design', 'Business', 'Marketing', 'Data Science', 'Photography', 'Music']
+PRICES = [0, 199, 499, 999, 1999, 2999]
+PRICE_WEIGHTS = [15, 20, 30, 20, 10, 5]
+RATING_WEIGHTS = [1, 1, 3, 8, 12]  # 1 to 5 stars
+
+COPY_CHUNK = 10_000  # lines per write to the COPY stream
+
+
+class MarketplaceSeeder:
+    """
+    `enrollments` is met exactly unless it exceeds what the catalog allows
+    (each student takes at most half the approved courses). Rates are the
+    chance per enrollment, or per student for carts and abandoned orders.
+    """
+    zipf_exponent = 1.0
+    pareto_alpha = 1.5
+    approved_rate = 0.9
+    finished_rate = 0.25    # of started enrollments, every lesson completed
+    review_rate = 0.4       # of finished enrollments
+    cart_rate = 0.3
+    abandoned_rate = 0.1    # an unpaid order for a course never bought
+
+    def __init__(self, instructors, courses, students, enrollments, lessons_per_course=8,
+                 progress_rate=0.5, seed=0, end=None, days=365, batch_size=10_000,
+                 password=None, prefix='seed', check_foreign_keys=True, log=None):
+        self.instructors = instructors
+        self.courses = courses
+        self.students = students
+        self.enrollments = enrollments
+        self.lessons_per_course = lessons_per_course
+        self.progress_rate = progress_rate
+        self.batch_size = batch_size
+        self.password = make_password(password) if password else '!'
+        self.prefix = prefix
+        self.check_foreign_keys = check_foreign_keys
+        self.log = log or (lambda message: None)
+        self.rng = random.Random(seed)
+        self.days = days
+        start = (end or date.today()) - timedelta(days=days)
+        self.day_names = [(start + timedelta(days=n)).isoformat() for n in range(days + 1)]
+        self.counts = Counter()
+
+    def run(self):
+        """Generate and insert everything in one transaction; returns rows written per model."""
+        with transaction.atomic():
+            if not self.check_foreign_keys:
+                self.skip_foreign_key_checks()
+            self.reserve_ids()
+            self.seed_users()
+            self.seed_courses()
+            self.seed_activity()
+            self.seed_stats()
+            self.reset_sequences()
+            started = time.monotonic()
+        self.log(f'Committed in {time.monotonic() - started:.1f}s')
+
+        started = time.monotonic()
+        tables = [model._meta.db_table for model in self.counts]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE ' + ', '.join(connection.ops.quote_name(table) for table in tables))
+        self.log(f'Analyzed in {time.monotonic() - started:.1f}s')
+        return self.counts
+
+    # -- helpers ---------------------------------------------------------
+
+    def stamp(self, day):
+        """A timestamp at a random second of day number `day`."""
+        second = self.rng.randrange(86400)
+        return f'{self.day_names[day]} {second // 3600:02}:{second // 60 % 60:02}:{second % 60:02}+00'
+
+    def copy(self, model, columns, lines):
+        """Stream tab-separated `lines` into `model`'s table with COPY."""
+        meta = model._meta
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            connection.ops.quote_name(meta.db_table),
+            ', '.join(connection.ops.quote_name(meta.get_field(name).column) for name in columns),
+        )
+        with connection.cursor() as cursor, cursor.copy(sql) as stream:
+            for chunk in itertools.batched(lines, COPY_CHUNK):
+                stream.write(''.join(chunk))
+                self.counts[model] += len(chunk)
+
+    def timed(self, label, started, models):
+        elapsed = time.monotonic() - started
+        rows = sum(self.counts[model] for model in models)
+        self.log(f'{label}: {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-6):,.0f} rows/s)')
+
+    def skip_foreign_key_checks(self):
+        """
+        Every generated reference points at a row written earlier, so the
+        deferred FK checks only slow the commit. Skipping them takes
+        superuser rights; without them the checks stay on.
+        """
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL session_replication_role = replica')
+        except DatabaseError as error:
+            self.log(f'Checking foreign keys: {error}'.strip())
+
+    def reserve_ids(self):
+        models = [User, Course, Lesson, Enrollment, LessonProgress, Order, Payment, CartItem, Review]
+        self.next_id = {model: (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1 for model in models}
+
+    def take_id(self, model):
+        value = self.next_id[model]
+        self.next_id[model] = value + 1
+        return value
+
+    def reset_sequences(self):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(self.next_id)):
+                cursor.execute(sql)
+
+    # -- users and catalog -----------------------------------------------
+
+    def seed_users(self):
+        started = time.monotonic()
+        first = self.next_id[User]
+        self.instructor_ids = range(first, first + self.instructors)
+        self.student_ids = range(first + self.instructors, first + self.instructors + self.students)
+        self.next_id[User] = self.student_ids.stop
+
+        def rows():
+            for role, ids in (('INSTRUCTOR', self.instructor_ids), ('STUDENT', self.student_ids)):
+                kind = role.lower()
+                for n, user_id in enumerate(ids):
+                    yield (
+                        f'{user_id}\t{self.password}\tf\t{self.prefix}-{kind}{n}@example.com\t'
+                        f'{role.title()} {n}\t{role}\tt\tf\t{self.stamp(self.rng.randrange(self.days))}\n'
+                    )
+
+        self.copy(User, [
+            'id', 'password', 'is_superuser', 'email', 'full_name', 'role', 'is_active', 'is_staff', 'created_at'
+        ], rows())
+        self.timed('Users', started, [User])
+
+    def seed_courses(self):
+        started = time.monotonic()
+        rng = self.rng
+        owners = zipf_cumulative(self.instructors, self.zipf_exponent)
+        first = self.next_id[Course]
+        self.course_ids = range(first, first + self.courses)
+        self.next_id[Course] = self.course_ids.stop
+
+        self.price = [rng.choices(PRICES, PRICE_WEIGHTS)[0] for _ in self.course_ids]
+        self.approved = [rng.random() < self.approved_rate for _ in self.course_ids]
+        self.created_day = [rng.randrange(self.days) for _ in self.course_ids]
+        low, high = max(1, self.lessons_per_course // 2), max(1, self.lessons_per_course * 3 // 2)
+        self.lesson_count = [rng.randint(low, high) for _ in self.course_ids]
+        self.first_lesson = []
+        self.duration = []
+
+        def course_rows():
+            for n, course_id in enumerate(self.course_ids):
+                topic, level = rng.choice(TOPICS), rng.choice(LEVELS)
+                instructor = self.instructor_ids[pick(rng, owners)]
+                created = self.stamp(self.created_day[n])
+                yield (
+                    f'{course_id}\t{topic} {level} #{n}\tLearn {topic.lower()} step by step with hands-on projects.\t'
+                    f'{self.price[n]}\t{rng.choice(CATEGORIES)}\t{instructor}\t'
+                    f'{"t" if self.approved[n] else "f"}\t{created}\t{created}\n'
+                )
+
+        def lesson_rows():
+            for n, course_id in enumerate(self.course_ids):
+                self.first_lesson.append(self.next_id[Lesson])
+                created = self.stamp(self.created_day[n])
+                total = 0
+                for order in range(1, self.lesson_count[n] + 1):
+                    minutes = rng.randint(3, 30)
+                    total += minutes
+                    yield f'{self.take_id(Lesson)}\t{course_id}\tLesson {order}\t\t{order}\t{minutes}\t{created}\t{created}\n'
+                self.duration.append(total)
+
+        self.copy(Course, [
+            'id', 'title', 'description', 'price', 'category', 'instructor', 'is_approved', 'created_at', 'updated_at'
+        ], course_rows())
+        self.copy(Lesson, [
+            'id', 'course', 'title', 'description', 'order', 'duration_minutes', 'created_at', 'updated_at'
+        ], lesson_rows())
+        self.timed('Courses and lessons', started, [Course, Lesson])
+
+    # -- student activity ------------------------------------------------
+
+    def enrollment_counts(self, cap):
+        """Pareto-distributed enrollments per student, adjusted to sum to the target."""
+        rng = self.rng
+        target = min(self.enrollments, cap * self.students)
+        if target < self.enrollments:
+            self.log(f'Only {target:,} enrollments fit: each student takes at most {cap:,} course(s).')
+        if not target:
+            return array('I', [0]) * self.students
+        mean = self.pareto_alpha / (self.pareto_alpha - 1)
+        scale = target / self.students / mean
+        counts = array('I', (min(cap, int(scale * rng.paretovariate(self.pareto_alpha) + rng.random()))
+                             for _ in range(self.students)))
+        total = sum(counts)
+        while total != target:
+            n = rng.randrange(self.students)
+            if total < target and counts[n] < cap:
+                counts[n] += 1
+                total += 1
+            elif total > target and counts[n]:
+                counts[n] -= 1
+                total -= 1
+        return counts
+
+    def seed_activity(self):
+        started = time.monotonic()
+        rng = self.rng
+        catalog = [n for n, approved in enumerate(self.approved) if approved]
+        rng.shuffle(catalog)  # popularity is independent of id and age
+        popularity = zipf_cumulative(len(catalog), self.zipf_exponent)
+        counts = self.enrollment_counts(len(catalog) // 2)
+
+        self.enrolled = [0] * self.courses
+        self.completed = [0] * self.courses
+        self.revenue = [0] * self.courses
+
+        def choose(taken):
+            """A popular course not in `taken`; falls back to uniform once the head is exhausted."""
+            for _ in range(20):
+                course = catalog[pick(rng, popularity)]
+                if course not in taken:
+                    return course
+            while True:
+                course = rng.choice(catalog)
+                if course not in taken:
+                    return course
+
+        models = [Enrollment, LessonProgress, Order, Payment, Review, CartItem]
+        for offset in range(0, self.students, self.batch_size):
+            lines = {model: [] for model in models}
+            for n in range(offset, min(offset + self.batch_size, self.students)):
+                student_id = self.student_ids[n]
+                taken = set()
+                for _ in range(counts[n]):
+                    taken.add(choose(taken))
+                for course in sorted(taken):
+                    self.enroll(lines, student_id, course)
+                if catalog and rng.random() < self.abandoned_rate:
+                    course = choose(taken)
+                    if self.price[course]:
+                        self.order(lines, student_id, course, rng.choice(['FAILED', 'EXPIRED', 'CREATED']),
+                                   rng.randint(self.created_day[course], self.days))
+                if catalog and rng.random() < self.cart_rate and len(taken) + 3 < len(catalog):
+                    cart = set()
+                    for _ in range(rng.randint(1, 3)):
+                        cart.add(choose(taken | cart))
+                    for course in sorted(cart):
+                        lines[CartItem].append(
+                            f'{self.take_id(CartItem)}\t{student_id}\t{self.course_ids[course]}\t'
+                            f'{self.stamp(rng.randint(self.created_day[course], self.days))}\n'
+                        )
+
+            self.copy(Enrollment, ['id', 'student', 'course', 'enrolled_at', 'completed_lessons_bitmap'],
+                      lines[Enrollment])
+            self.copy(LessonProgress, ['id', 'student', 'lesson', 'is_completed', 'completed_at'],
+                      lines[LessonProgress])
+            self.copy(Order, ['id', 'user', 'course', 'amount', 'status', 'razorpay_order_id',
+                              'created_at', 'updated_at'], lines[Order])
+            self.copy(Payment, ['id', 'order', 'razorpay_payment_id', 'razorpay_signature', 'paid_at'],
+                      lines[Payment])
+            self.copy(Review, ['id', 'course', 'student', 'rating', 'comment', 'created_at', 'updated_at'],
+                      lines[Review])
+            self.copy(CartItem, ['id', 'user', 'course', 'created_at'], lines[CartItem])
+            self.timed(f'Students {min(offset + self.batch_size, self.students):,}/{self.students:,}',
+                       started, models)
+
+    def enroll(self, lines, student_id, course):
+        rng = self.rng
+        day = rng.randint(self.created_day[course], self.days)
+        when = self.stamp(day)
+        course_id = self.course_ids[course]
+        self.enrolled[course] += 1
+
+        if self.price[course]:
+            self.order(lines, student_id, course, 'PAID', day, when)
+
+        done, total = 0, self.lesson_count[course]
+        if rng.random() < self.progress_rate:
+            done = total if rng.random() < self.finished_rate else rng.randrange(total)
+            first = self.first_lesson[course]
+            for order in range(1, done + 1):
+                lines[LessonProgress].append(
+                    f'{self.take_id(LessonProgress)}\t{student_id}\t{first + order - 1}\tt\t{when}\n'
+                )
+            if done < total:
+                lines[LessonProgress].append(
+                    f'{self.take_id(LessonProgress)}\t{student_id}\t{first + done}\tf\t\\N\n'
+                )
+            self.completed[course] += done
+        # Bits 1..done: the lessons with those orders are complete
+        bitmap = bitmaps.to_bytes((1 << (done + 1)) - 2).hex()
+        lines[Enrollment].append(f'{self.take_id(Enrollment)}\t{student_id}\t{course_id}\t{when}\t\\\\x{bitmap}\n')
+
+        if done == total and rng.random() < self.review_rate:
+            rating = rng.choices(range(1, 6), RATING_WEIGHTS)[0]
+            lines[Review].append(f'{self.take_id(Review)}\t{course_id}\t{student_id}\t{rating}\t\t{when}\t{when}\n')
+
+    def order(self, lines, student_id, course, status, day, when=None):
+        when = when or self.stamp(day)
+        order_id = self.take_id(Order)
+        price = self.price[course]
+        lines[Order].append(
+            f'{order_id}\t{student_id}\t{self.course_ids[course]}\t{price}\t{status}\t'
+            f'order_seed{order_id}\t{when}\t{when}\n'
+        )
+        if status == 'PAID':
+            self.revenue[course] += price
+            lines[Payment].append(f'{self.take_id(Payment)}\t{order_id}\tpay_seed{order_id}\t\t{when}\n')
+
+    def seed_stats(self):
+        """CourseStats from the tallies kept while generating, instead of a rebuild over every table."""
+        started = time.monotonic()
+        now = f'{self.day_names[-1]} 00:00:00+00'
+        self.copy(CourseStats, [
+            'course', 'enrollment_count', 'lesson_count', 'completed_progress_count',
+            'total_duration_minutes', 'revenue', 'updated_at',
+        ], (
+            f'{course_id}\t{self.enrolled[n]}\t{self.lesson_count[n]}\t{self.completed[n]}\t'
+            f'{self.duration[n]}\t{self.revenue[n]}\t{now}\n'
+            for n, course_id in enumerate(self.course_ids)
+        ))
+        self.timed('Course stats', started, [CourseStats])
+
+
+def zipf_cumulative(size, exponent):
+    """Cumulative Zipf weights over ranks 0..size-1, for `pick`."""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+def pick(rng, cumulative):
+    """A rank drawn from `cumulative` weights."""
+    return min(bisect.bisect(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
@@ -1,7 +1,15 @@
+from urllib.parse import urlencode
+
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Course, Enrollment, Lesson, LessonProgress
 
-class CourseSerializer(serializers.ModelSerializer):
+from accounts.serializers import UserSummarySerializer
+from . import bitmaps, streaming
+from .access import get_access
+from .dynamic_fields import DynamicFieldsMixin
+from .models import Course, Enrollment, Lesson, LessonProgress, LessonVideoUpload
+
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     instructor = serializers.StringRelatedField(read_only=True)  # shows __str__ of user
     is_enrolled = serializers.SerializerMethodField()
     enrollment_count = serializers.SerializerMethodField()
@@ -9,20 +17,24 @@ class CourseSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['instructor', 'is_approved', 'created_at']
+
+    def get_expandable_fields(self):
+        return {'instructor': UserSummarySerializer(read_only=True)}
     
     def get_is_enrolled(self, obj):
         """Check if the current user is enrolled in this course"""
+        if hasattr(obj, 'user_is_enrolled'):
+            return obj.user_is_enrolled
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return Enrollment.objects.filter(
-                student=request.user,
-                course=obj
-            ).exists()
+            return get_access(request).is_enrolled(obj.id)
         return False
 
     def get_enrollment_count(self, obj):
+        if hasattr(obj, 'enrollment_total'):
+            return obj.enrollment_total
         return Enrollment.objects.filter(course=obj).count()
 
     def get_completion_rate(self, obj):
@@ -30,31 +42,72 @@ class CourseSerializer(serializers.ModelSerializer):
         Compute average lesson completion across enrolled students.
         Formula: completed lesson progresses / (lesson_count * enrollment_count) * 100.
         Returns an integer percentage or None when data is insufficient.
+
+        Uses the with_catalog_stats() annotations when present and falls
+        back to counting queries for instances loaded without them.
         """
-        lesson_count = Lesson.objects.filter(course=obj).count()
-        enrollment_count = Enrollment.objects.filter(course=obj).count()
+        if hasattr(obj, 'lesson_total'):
+            lesson_count = obj.lesson_total
+            enrollment_count = obj.enrollment_total
+        else:
+            lesson_count = Lesson.objects.filter(course=obj).count()
+            enrollment_count = Enrollment.objects.filter(course=obj).count()
         if lesson_count == 0 or enrollment_count == 0:
             return None
 
         total_slots = lesson_count * enrollment_count
-        completed = LessonProgress.objects.filter(
-            lesson__course=obj,
-            is_completed=True
-        ).count()
+        if hasattr(obj, 'completed_progress_total'):
+            completed = obj.completed_progress_total
+        else:
+            completed = LessonProgress.objects.filter(
+                lesson__course=obj,
+                is_completed=True
+            ).count()
 
         return round((completed / total_slots) * 100)
 
+class CourseSummarySerializer(serializers.ModelSerializer):
+    """
+    The few course fields order and cart listings show. Querysets feeding it
+    can load just those columns with `.only(*CourseSummarySerializer.load_only('course'))`.
+    """
+    instructor_name = serializers.CharField(source='instructor.full_name', read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'price', 'thumbnail', 'instructor_name']
+        read_only_fields = fields
+
+    @staticmethod
+    def load_only(prefix):
+        """Field paths to pass to .only() when the course is reached through `prefix`."""
+        return [
+            f'{prefix}__{field}'
+            for field in ('id', 'title', 'price', 'thumbnail', 'instructor__id', 'instructor__full_name')
+        ]
+
 class EnrollmentSerializer(serializers.ModelSerializer):
+    completed_lessons = serializers.SerializerMethodField()
+
     class Meta:
         model = Enrollment
-        fields = '__all__'
+        exclude = ['completed_lessons_bitmap']
         read_only_fields = ['student', 'created_at']
 
-class LessonSerializer(serializers.ModelSerializer):
+    def get_completed_lessons(self, obj):
+        return bitmaps.popcount(obj.completed_lessons_bitmap)
+
+class LessonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    stream_url = serializers.SerializerMethodField()
+
     class Meta:
         model = Lesson
-        fields = ['id', 'course', 'title', 'description', 'video_url', 'video_file', 'order', 'duration_minutes']
+        fields = [
+            'id', 'course', 'title', 'description', 'video_url', 'video_file', 'stream_url',
+            'order', 'duration_minutes'
+        ]
         read_only_fields = ['id']  # id is auto-generated
+        field_dependencies = {'stream_url': ['video_file']}
         extra_kwargs = {
             'video_url': {
                 'required': False,
@@ -67,6 +120,18 @@ class LessonSerializer(serializers.ModelSerializer):
             }
         }
     
+    def get_expandable_fields(self):
+        return {'course': CourseSummarySerializer(read_only=True)}
+
+    def get_stream_url(self, obj):
+        """Signed, expiring URL for the uploaded video that supports Range requests."""
+        request = self.context.get('request')
+        if not obj.video_file or not request or not request.user.is_authenticated:
+            return None
+        url = reverse('lesson-video', args=[obj.id])
+        query = urlencode(streaming.sign(obj.id, request.user.id))
+        return request.build_absolute_uri(f'{url}?{query}')
+
     def create(self, validated_data):
         """
         When creating a lesson with a video file, automatically set video_url to the file path.
@@ -85,12 +150,31 @@ class LessonSerializer(serializers.ModelSerializer):
         Ensure the instructor creating/updating the lesson owns the course.
         """
         request = self.context.get('request')
-        course = attrs.get('course')
-        if request and request.user.role == 'INSTRUCTOR':
+        course = attrs.get('course') or getattr(self.instance, 'course', None)
+        if request and request.user.role == 'INSTRUCTOR' and course is not None:
             if course.instructor != request.user:
                 raise serializers.ValidationError("You can only add lessons to your own courses.")
         return attrs
     
+class LessonOutlineItemSerializer(serializers.ModelSerializer):
+    """
+    One entry of a bulk lesson outline. Entries with an id update that
+    lesson, entries without one create a lesson; list position sets order.
+    """
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'description', 'video_url', 'duration_minutes']
+        extra_kwargs = {
+            'video_url': {
+                'required': False,
+                'allow_null': True,
+                'allow_blank': True,
+            },
+        }
+
+
 class LessonProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = LessonProgress
@@ -108,3 +192,42 @@ class LessonProgressSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+
+class LessonVideoUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LessonVideoUpload
+        fields = ['id', 'lesson', 'filename', 'total_size', 'received_bytes', 'sha256', 'status', 'created_at']
+        read_only_fields = ['id', 'received_bytes', 'status', 'created_at']
+
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Total size must be greater than zero.")
+        return value
+
+    def validate_sha256(self, value):
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value.lower())):
+            raise serializers.ValidationError("Must be a hex-encoded SHA-256 digest.")
+        return value.lower()
+
+
+class ProgressSyncItemSerializer(serializers.Serializer):
+    lesson_id = serializers.IntegerField()
+    is_completed = serializers.BooleanField(default=True)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class ProgressSyncSerializer(serializers.ListSerializer):
+    child = ProgressSyncItemSerializer()
+    MAX_ITEMS = 500
+
+    def __init__(self, *args, **kwargs):
+        # ListSerializer.__init__ resets max_length from kwargs, so a class
+        # attribute would be ignored.
+        kwargs.setdefault('max_length', self.MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def validate(self, attrs):
+        lesson_ids = [item['lesson_id'] for item in attrs]
+        if len(lesson_ids) != len(set(lesson_ids)):
+            raise serializers.ValidationError("Each lesson may appear only once.")
+        return attrs
@@ -0,0 +1,328 @@
+"""
+Helpers for the performance test suites: a bulk seeder for realistic table
+volumes, assertions over captured queries and their EXPLAIN plans, and the
+per-route query budget harness.
+"""
+import json
+import random
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from urllib.parse import urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import authentication
+
+from orders.models import CartItem, Order, OrderItem, Payment
+from reviews.models import Review
+from .budgets import budget_for
+from .models import Course, CourseStats, Enrollment, Lesson, LessonProgress
+
+User = get_user_model()
+
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def seed_volume(courses=200, students=200, instructors=10, lessons_per_course=5,
+                enrollments_per_student=5, orders_per_student=5, seed=0):
+    """
+    Bulk-insert a marketplace of the given size and ANALYZE it so the
+    planner sees real statistics. Returns the users, courses and orders a
+    test needs to address specific rows.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    # Passwords are never checked by these suites, so skip the hasher.
+    users = User.objects.bulk_create(
+        [User(email=f'instructor{i}@example.com', full_name=f'Instructor {i}', role='INSTRUCTOR', password='!')
+         for i in range(instructors)]
+        + [User(email=f'student{i}@example.com', full_name=f'Student {i}', role='STUDENT', password='!')
+           for i in range(students)]
+        + [User(email='admin@example.com', full_name='Admin', role='ADMIN', password='!')]
+    )
+    teachers, learners, admin = users[:instructors], users[instructors:-1], users[-1]
+
+    course_rows = Course.objects.bulk_create([
+        Course(
+            title=f'Course {i}', description=f'Everything about topic {i}',
+            price=Decimal(rng.choice([0, 199, 499, 999])), instructor=teachers[i % instructors],
+            is_approved=i % 10 != 0, category=rng.choice(['development', 'design', 'business']),
+        )
+        for i in range(courses)
+    ])
+    CourseStats.objects.bulk_create([CourseStats(course=course) for course in course_rows])
+    lessons = Lesson.objects.bulk_create([
+        Lesson(course=course, title=f'Lesson {n}', order=n, duration_minutes=10)
+        for course in course_rows for n in range(1, lessons_per_course + 1)
+    ])
+    lessons_by_course = {}
+    for lesson in lessons:
+        lessons_by_course.setdefault(lesson.course_id, []).append(lesson)
+
+    # Popular courses draw most enrollments, as in the real catalog.
+    weights = [1 / (rank + 1) for rank in range(courses)]
+    enrollments, progress, reviews, orders = [], [], [], []
+    for student in learners:
+        picked = set(rng.choices(course_rows, weights=weights, k=enrollments_per_student))
+        for course in picked:
+            enrollments.append(Enrollment(student=student, course=course))
+            for lesson in lessons_by_course[course.id]:
+                done = rng.random() < 0.4
+                progress.append(LessonProgress(
+                    student=student, lesson=lesson, is_completed=done, completed_at=now if done else None
+                ))
+            if rng.random() < 0.3:
+                reviews.append(Review(course=course, student=student, rating=rng.randint(1, 5)))
+        for _ in range(orders_per_student):
+            course = rng.choices(course_rows, weights=weights)[0]
+            orders.append(Order(
+                user=student, course=course, amount=course.price or Decimal('199'),
+                status=rng.choices(['PAID', 'CREATED', 'FAILED'], weights=[6, 3, 1])[0],
+            ))
+    Enrollment.objects.bulk_create(enrollments, ignore_conflicts=True)
+    LessonProgress.objects.bulk_create(progress, ignore_conflicts=True)
+    Review.objects.bulk_create(reviews, ignore_conflicts=True)
+    orders = Order.objects.bulk_create(orders)
+    Payment.objects.bulk_create([
+        Payment(order=order, razorpay_payment_id=f'pay_seed{order.id}')
+        for order in orders if order.status == 'PAID'
+    ])
+
+    # A few cart checkouts, so earnings and revenue read OrderItem too.
+    carts = Order.objects.bulk_create([
+        Order(user=student, amount=Decimal('998'), status='PAID') for student in learners[:students // 10]
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, course=course, price=Decimal('499'))
+        for order in carts for course in rng.sample(course_rows, 2)
+    ], ignore_conflicts=True)
+    CartItem.objects.bulk_create([
+        CartItem(user=student, course=rng.choice(course_rows)) for student in learners
+    ], ignore_conflicts=True)
+
+    # Spread creation times so date ordering and truncation are meaningful.
+    for model, rows in ((Order, orders + carts), (Course, course_rows)):
+        for row in rows:
+            row.created_at = now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86400))
+        model.objects.bulk_update(rows, ['created_at'], batch_size=1000)
+
+    CourseStats.rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return {
+        'instructors': teachers,
+        'students': learners,
+        'admin': admin,
+        'courses': course_rows,
+        'orders': orders,
+        'tokens': {
+            token.user_id: token.key
+            for token in Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+        },
+    }
+
+
+def explain(sql, seqscan=False):
+    """
+    The JSON plan Postgres chooses for `sql`. Sequential scans are
+    discouraged unless `seqscan` is set: on test-sized tables they are
+    genuinely cheapest, so this shows which index the planner would use at
+    production volume, and a seq scan in the plan means no index fits.
+    """
+    with connection.cursor() as cursor:
+        if not seqscan:
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute('RESET enable_seqscan')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def scans_of(plan, table):
+    """(node type, index name) for every scan of `table` in `plan`."""
+    scans = []
+    for node in plan_nodes(plan):
+        if node.get('Relation Name') != table:
+            continue
+        if node['Node Type'] == 'Bitmap Heap Scan':
+            scans += [
+                (child['Node Type'], child['Index Name'])
+                for child in plan_nodes(node) if child['Node Type'] == 'Bitmap Index Scan'
+            ]
+        else:
+            scans.append((node['Node Type'], node.get('Index Name')))
+    return scans
+
+
+class QueryPlanAssertions:
+    """Mixin for TestCase: assertions over queries captured with CaptureQueriesContext."""
+
+    def main_query(self, captured, table):
+        """The first captured listing (SELECT ... ORDER BY) that reads `table`."""
+        for query in captured:
+            sql = query['sql']
+            if sql.startswith(('SELECT', '(SELECT')) and f'FROM "{table}"' in sql and 'ORDER BY' in sql:
+                return sql
+        self.fail(f'No listing query on {table} among {len(captured)} captured queries')
+
+    def assertUsesIndex(self, sql, table, index=None):
+        """No sequential scan of `table` in the plan of `sql`, and `index` (if given) is scanned."""
+        plan = explain(sql)
+        scans = scans_of(plan, table)
+        self.assertTrue(scans, f'{table} is not scanned by:\n{sql}')
+        self.assertNotIn(
+            'Seq Scan', {kind for kind, _ in scans},
+            f'Sequential scan of {table}:\n{sql}\n\n{json.dumps(plan, indent=2)}'
+        )
+        if index is not None:
+            self.assertIn(
+                index, {name for kind, name in scans if kind in INDEX_SCANS},
+                f'{index} not used for {table}; scans: {scans}\n{sql}'
+            )
+
+
+class Call:
+    """
+    One request of a budget scenario. `path` and `data` may be callables of
+    the scenario context; `user` names a context entry (None = anonymous);
+    `setup(ctx)` runs first, uncounted, and may return extra context.
+    """
+
+    def __init__(self, method, path, user=None, data=None, status=200, setup=None, **extra):
+        self.method = method.upper()
+        self.path = path
+        self.user = user
+        self.data = data
+        self.status = status
+        self.setup = setup
+        self.extra = extra
+
+
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def route_names(urlconf):
+    """Names of every route in the `urlconf` module."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    walk(import_module(urlconf).urlpatterns)
+    return names
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for TestCase. Calls every route of `urlconf` at each data size in `sizes` and fails if
+    a request's query count changes with the data size or exceeds the
+    budget declared on its view (courses.budgets.query_budget). Each call
+    runs in a rolled-back savepoint with empty caches.
+
+    Subclasses set `urlconf`, build the context of named rows with
+    `prepare(data)` and map every route name to its Calls in `scenarios`.
+    """
+    urlconf = None
+    sizes = (
+        dict(courses=12, students=12, instructors=2, lessons_per_course=3,
+             enrollments_per_student=3, orders_per_student=3),
+        dict(courses=36, students=36, instructors=2, lessons_per_course=9,
+             enrollments_per_student=9, orders_per_student=9),
+    )
+    scenarios = {}
+
+    def prepare(self, data):
+        return {}
+
+    def test_query_budgets(self):
+        counts = {}
+        for size in self.sizes:
+            with transaction.atomic():
+                data = seed_volume(**size)
+                ctx = {**data, **self.prepare(data)}
+                for name, calls in self.scenarios.items():
+                    for n, call in enumerate(calls):
+                        label = f'{name} {call.method} as {call.user or "anonymous"}'
+                        counts.setdefault((name, n, label), []).append(self.measure(call, ctx))
+                transaction.set_rollback(True)
+
+        missing = route_names(self.urlconf) - self.scenarios.keys()
+        self.assertFalse(missing, f'Routes without a query budget scenario: {sorted(missing)}')
+
+        for (name, n, label), runs in counts.items():
+            with self.subTest(route=name, call=n):
+                budget = runs[0]['budget']
+                sizes = [run['count'] for run in runs]
+                worst = max(runs, key=lambda run: run['count'])
+                self.assertEqual(
+                    len(set(sizes)), 1,
+                    f'{label}: query count grows with data size {sizes}\n' + self.format_sql(worst)
+                )
+                self.assertIsNotNone(
+                    budget, f'{label}: no @query_budget declared on {runs[0]["view"]} (measured {sizes[0]})'
+                )
+                self.assertLessEqual(
+                    worst['count'], budget,
+                    f'{label}: {worst["count"]} queries, budget {budget}\n' + self.format_sql(worst)
+                )
+
+    def measure(self, call, ctx):
+        with transaction.atomic():
+            if call.setup:
+                ctx = {**ctx, **(call.setup(ctx) or {})}
+            path = call.path(ctx) if callable(call.path) else call.path
+            data = call.data(ctx) if callable(call.data) else call.data
+
+            client = APIClient()
+            if call.user:
+                client.credentials(HTTP_AUTHORIZATION='Token ' + ctx['tokens'][ctx[call.user].pk])
+            cache.clear()
+            authentication.get_cache().clear()
+
+            with CaptureQueriesContext(connection) as captured:
+                extra = call.extra if 'content_type' in call.extra else {'format': 'json', **call.extra}
+                response = getattr(client, call.method.lower())(path, data, **extra)
+            transaction.set_rollback(True)
+
+        self.assertEqual(
+            response.status_code, call.status,
+            f'{call.method} {path}: {response.status_code} {getattr(response, "content", b"")[:300]}'
+        )
+        match = resolve(urlparse(path).path)
+        queries = [
+            query['sql'] for query in captured.captured_queries
+            if not query['sql'].startswith(SAVEPOINT_STATEMENTS)
+        ]
+        return {
+            'count': len(queries),
+            'sql': queries,
+            'budget': budget_for(match.func, call.method),
+            'view': match._func_path,
+        }
+
+    @staticmethod
+    def format_sql(run):
+        return '\n'.join(f'  {n}. {sql[:400]}' for n, sql in enumerate(run['sql'], 1))
@@ -1,3 +1,1079 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from . import access, bitmaps, caching, streaming, uploads
+from .models import MAX_LESSON_ORDER, Course, CourseStats, Enrollment, Lesson, LessonProgress, LessonVideoUpload
+from .pagination import CourseCursorPagination
+from .testing import Call, QueryBudgetMixin, QueryPlanAssertions, seed_volume
+
+MEDIA_ROOT = tempfile.mkdtemp()
+VIDEO = b'fake video bytes'
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+class CourseQueryPlanTests(QueryPlanAssertions, TestCase):
+    """
+    The listing query behind each course endpoint is answered from an
+    index, checked with EXPLAIN against a seeded, ANALYZEd catalog.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_volume(courses=400, students=150, instructors=20)
+
+    def capture(self, url, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION='Token ' + self.data['tokens'][user.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return ctx.captured_queries
+
+    def test_catalog_page(self):
+        sql = self.main_query(self.capture('/api/courses/?page_size=20'), 'courses_course')
+        self.assertUsesIndex(sql, 'courses_course', 'course_approved_created_idx')
+
+    def test_catalog_category_page(self):
+        sql = self.main_query(self.capture('/api/courses/?page_size=20&category=design'), 'courses_course')
+        self.assertUsesIndex(sql, 'courses_course', 'course_approved_category_idx')
+
+    def test_catalog_price_page(self):
+        sql = self.main_query(self.capture('/api/courses/?page_size=20&ordering=price'), 'courses_course')
+        self.assertUsesIndex(sql, 'courses_course', 'course_approved_price_idx')
+
+    def test_instructor_courses(self):
+        queries = self.capture('/api/courses/?page_size=20', self.data['instructors'][0])
+        sql = self.main_query(queries, 'courses_course')
+        self.assertUsesIndex(sql, 'courses_course', 'course_instructor_created_idx')
+
+    def test_lesson_list(self):
+        course = self.data['courses'][1]
+        sql = self.main_query(self.capture(f'/api/courses/{course.id}/lessons/', self.data['admin']), 'courses_lesson')
+        self.assertUsesIndex(sql, 'courses_lesson')
+
+    def test_completed_progress_rebuild(self):
+        # Runs whenever lessons are deleted or reordered
+        with CaptureQueriesContext(connection) as ctx:
+            bitmaps.rebuild_course_bitmaps([self.data['courses'][1].id])
+        sql = next(q['sql'] for q in ctx.captured_queries if 'courses_lessonprogress' in q['sql'])
+        self.assertUsesIndex(sql, 'courses_lessonprogress', 'progress_completed_lesson_idx')
+
+
+class CourseCursorPaginationTests(TestCase):
+    """Pages advance on (field, id) even when every course ties on the ordering field."""
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='teacher@example.com', password='pass', full_name='Teacher', role='INSTRUCTOR'
+        )
+        Course.objects.bulk_create([
+            Course(title=f'Free {n}', description='', price=0, instructor=instructor, is_approved=True)
+            for n in range(23)
+        ])
+        Course.objects.update(created_at=timezone.now())
+        cls.ids = set(Course.objects.values_list('id', flat=True))
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            self.assertLess(len(pages), 10, f'Pagination is not advancing: {pages}')
+            response = APIClient().get(url)
+            self.assertEqual(response.status_code, 200, response.content[:300])
+            pages.append([course['id'] for course in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    # DRF's offset fallback for ties gives up past offset_cutoff; the keyset never needs it
+    @mock.patch.object(CourseCursorPagination, 'offset_cutoff', 2)
+    def test_ties_page_forward_and_back(self):
+        for ordering in ('price', '-price', 'created_at', '-created_at'):
+            with self.subTest(ordering=ordering):
+                pages = self.walk(f'/api/courses/?page_size=5&ordering={ordering}', 'next')
+                seen = [pk for page in pages for pk in page]
+                self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+                self.assertEqual(len(seen), len(set(seen)))
+                self.assertEqual(set(seen), self.ids)
+
+                # Previous links from the last page retrace the same pages
+                last = APIClient().get(f'/api/courses/?page_size=5&ordering={ordering}')
+                for _ in range(4):
+                    last = APIClient().get(last.data['next'])
+                back = self.walk(last.data['previous'], 'previous')
+                self.assertEqual(back, list(reversed(pages[:-1])))
+
+    def test_plain_list_is_paginated(self):
+        pages = self.walk('/api/courses/', 'next')
+        self.assertEqual([len(page) for page in pages], [20, 3])
+        response = APIClient().get('/api/courses/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 23)
+        with mock.patch.object(CourseCursorPagination, 'max_page_size', 10):
+            self.assertEqual(len(APIClient().get('/api/courses/?page_size=1000').data['results']), 10)
+
+    def test_tampered_cursor(self):
+        response = APIClient().get('/api/courses/?page_size=5&cursor=cD1ub3QtYS1kYXRlfDE%3D')
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+
+        def course(title, description, is_approved=True):
+            return Course.objects.create(
+                title=title, description=description, price=0, instructor=cls.instructor, is_approved=is_approved
+            )
+
+        # Created first, so the id tie-break alone would list it last
+        cls.in_title = course('Watercolor painting', 'Brushes and paper.')
+        cls.in_description = course('Art basics', 'Includes a short watercolor module.')
+        cls.unrelated = course('Python', 'Programming for beginners.')
+        cls.draft = course('Watercolor masterclass', 'Not reviewed yet.', is_approved=False)
+
+    def search(self, user=None, query='watercolor', **params):
+        client = APIClient()
+        if user:
+            client.force_authenticate(user)
+        response = client.get('/api/courses/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [course['id'] for course in response.data]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search(), [self.in_title.id, self.in_description.id])
+        # Stemmed, websearch syntax
+        self.assertEqual(self.search(query='paintings -art'), [self.in_title.id])
+
+    def test_unapproved_courses_are_hidden(self):
+        for user in (None, self.student):
+            with self.subTest(user=user):
+                self.assertNotIn(self.draft.id, self.search(user))
+        self.assertEqual(set(self.search(self.instructor)), {self.in_title.id, self.in_description.id, self.draft.id})
+
+    def test_limit_and_missing_query(self):
+        self.assertEqual(self.search(limit=1), [self.in_title.id])
+        self.assertEqual(APIClient().get('/api/courses/search/').status_code, 400)
+        self.assertEqual(APIClient().get('/api/courses/search/?q=art&limit=x').status_code, 400)
+
+
+class LessonFixture:
+    """Mixin for TestCase: an instructor's approved course with one lesson and an enrolled student."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        cls.course = Course.objects.create(
+            title='Video course', description='', price=0, instructor=cls.instructor, is_approved=True
+        )
+        cls.lesson = Lesson.objects.create(course=cls.course, title='Intro', order=1)
+        Enrollment.objects.create(student=cls.student, course=cls.course)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.get_or_create(user=user)[0].key)
+        return client
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class LessonVideoUploadTests(LessonFixture, TestCase):
+    data = b'0123456789abcdefghijklmno'
+
+    def setUp(self):
+        self.client = self.client_for(self.instructor)
+        response = self.client.post('/api/lessons/video-uploads/', {
+            'lesson': self.lesson.id, 'filename': 'intro.mp4', 'total_size': len(self.data),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.url = f"/api/lessons/video-uploads/{response.data['id']}/"
+        self.upload = LessonVideoUpload.objects.get(id=response.data['id'])
+
+    def put_chunk(self, start, end, body=None):
+        return self.client.put(
+            self.url, self.data[start:end + 1] if body is None else body,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.data)}',
+        )
+
+    def complete(self, sha256=None):
+        return self.client.post(self.url + 'complete/', {
+            'sha256': sha256 or hashlib.sha256(self.data).hexdigest()
+        }, format='json')
+
+    def test_resume_from_offset_and_finalize(self):
+        self.assertEqual(self.put_chunk(0, 9).data['received_bytes'], 10)
+        # A client that lost track asks where to resume
+        self.assertEqual(self.client.get(self.url).data['received_bytes'], 10)
+        self.assertEqual(self.put_chunk(10, len(self.data) - 1).data['received_bytes'], len(self.data))
+
+        response = self.complete()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.lesson.refresh_from_db()
+        with self.lesson.video_file.open('rb') as video:
+            self.assertEqual(video.read(), self.data)
+        self.assertFalse(os.path.exists(uploads.part_path(self.upload)))
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.status, LessonVideoUpload.Status.COMPLETE)
+        self.assertEqual(self.complete().status_code, 409)
+
+    def test_wrong_offset_conflicts(self):
+        self.put_chunk(0, 9)
+        response = self.put_chunk(5, 14)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received_bytes'], 10)
+        # Past the declared total
+        self.assertEqual(self.put_chunk(10, len(self.data)).status_code, 400)
+
+    @override_settings(LESSON_VIDEO_MAX_CHUNK_SIZE=8)
+    def test_oversize_chunk_rejected(self):
+        self.assertEqual(self.put_chunk(0, 9).status_code, 413)
+        self.assertEqual(self.put_chunk(0, 7).status_code, 200)
+
+    def test_interrupted_chunk_keeps_received_bytes(self):
+        # The connection drops after 4 of 10 bytes
+        received = uploads.write_chunk(self.upload, BytesIO(self.data[:4]), 0, 10)
+        self.assertEqual(received, 4)
+        # Bytes past the recorded offset (a torn write) are dropped on resume
+        with open(uploads.part_path(self.upload), 'ab') as part:
+            part.write(b'garbage')
+        self.upload.received_bytes = received
+        self.upload.save()
+        self.assertEqual(self.put_chunk(4, len(self.data) - 1).data['received_bytes'], len(self.data))
+        with open(uploads.part_path(self.upload), 'rb') as part:
+            self.assertEqual(part.read(), self.data)
+
+    def test_finalize_checks_size_and_checksum(self):
+        self.put_chunk(0, 9)
+        self.assertEqual(self.complete().status_code, 400)
+        self.put_chunk(10, len(self.data) - 1)
+        self.assertEqual(self.complete(sha256='0' * 64).status_code, 400)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.status, LessonVideoUpload.Status.PENDING)
+        self.assertEqual(self.complete().status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, VIDEO_SENDFILE_BACKEND='')
+class LessonVideoStreamTests(LessonFixture, TestCase):
+    data = bytes(range(100))
+
+    def setUp(self):
+        self.attach(self.data)
+        self.url = f'/api/lessons/{self.lesson.id}/video/'
+
+    def attach(self, content):
+        os.makedirs(os.path.join(MEDIA_ROOT, uploads.UPLOAD_DIR), exist_ok=True)
+        name = os.path.join(uploads.UPLOAD_DIR, f'stream-{self.lesson.id}.mp4')
+        with open(os.path.join(MEDIA_ROOT, name), 'wb') as video:
+            video.write(content)
+        Lesson.objects.filter(pk=self.lesson.pk).update(video_file=name)
+
+    def fetch(self, range_header=None, client=None, params=None):
+        headers = {'HTTP_RANGE': range_header} if range_header else {}
+        response = (client or self.client_for(self.student)).get(self.url, params or {}, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_whole_file(self):
+        response, body = self.fetch()
+        self.assertEqual((response.status_code, body), (200, self.data))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_ranges(self):
+        cases = {
+            'bytes=10-19': (10, 19),
+            'bytes=90-': (90, 99),       # open range
+            'bytes=-5': (95, 99),        # suffix range
+            'bytes=-500': (0, 99),       # suffix longer than the file
+            'bytes=95-200': (95, 99),    # end clamped to the file
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(range=header):
+                response, body = self.fetch(header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.data[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/100')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=100-', 'bytes=50-40', 'bytes=-0'):
+            with self.subTest(range=header):
+                response, _ = self.fetch(header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_multi_range_and_malformed_fall_back_to_whole_file(self):
+        for header in ('bytes=0-1,5-6', 'items=0-5', 'bytes=-'):
+            with self.subTest(range=header):
+                response, body = self.fetch(header)
+                self.assertEqual((response.status_code, body), (200, self.data))
+
+    def test_empty_file(self):
+        self.attach(b'')
+        response, body = self.fetch()
+        self.assertEqual((response.status_code, body), (200, b''))
+        self.assertEqual(self.fetch('bytes=0-')[0].status_code, 416)
+
+    def test_signed_url(self):
+        params = streaming.sign(self.lesson.id, self.student.id)
+        response, body = self.fetch('bytes=0-9', client=APIClient(), params=params)
+        self.assertEqual((response.status_code, body), (206, self.data[:10]))
+
+        tampered = [
+            {**params, 'sig': '0' * len(params['sig'])},
+            {**params, 'uid': self.instructor.id},
+            {**params, 'expires': params['expires'] + 1},
+            {**params, 'expires': 'soon'},
+        ]
+        for bad in tampered:
+            with self.subTest(params=bad):
+                self.assertEqual(self.fetch(client=APIClient(), params=bad)[0].status_code, 403)
+
+        # Signed correctly, but already expired
+        past = int(time.time()) - 1
+        expired = {'uid': self.student.id, 'expires': past,
+                   'sig': streaming._signature(self.lesson.id, self.student.id, past)}
+        self.assertEqual(self.fetch(client=APIClient(), params=expired)[0].status_code, 403)
+
+    def test_unenrolled_student_is_refused(self):
+        outsider = User.objects.create_user(
+            email='outsider@example.com', password='pass', full_name='Outsider', role='STUDENT'
+        )
+        self.assertEqual(self.fetch(client=self.client_for(outsider))[0].status_code, 403)
+
+
+class LessonOrderLimitTests(LessonFixture, TestCase):
+    """Lesson order is the completion bitmap's bit index, so it must stay small."""
+
+    def setUp(self):
+        self.client = self.client_for(self.instructor)
+
+    def test_create_and_update_reject_huge_order(self):
+        data = {'course': self.course.id, 'title': 'Far away', 'order': 2_000_000_000}
+        response = self.client.post('/api/lessons/create/', data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('order', response.data)
+        response = self.client.patch(f'/api/lessons/{self.lesson.id}/update/', {'order': MAX_LESSON_ORDER + 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Lesson.objects.get(pk=self.lesson.pk).order, 1)
+
+        data['order'] = MAX_LESSON_ORDER
+        self.assertEqual(self.client.post('/api/lessons/create/', data).status_code, 201)
+
+    def test_bulk_outline_length_is_capped(self):
+        outline = [{'title': f'Lesson {i}'} for i in range(MAX_LESSON_ORDER + 1)]
+        response = self.client.put(f'/api/courses/{self.course.id}/lessons/bulk/', outline, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Lesson.objects.filter(course=self.course).count(), 1)
+
+
+class LessonBulkTests(LessonFixture, TestCase):
+    def setUp(self):
+        self.client = self.client_for(self.instructor)
+        self.url = f'/api/courses/{self.course.id}/lessons/bulk/'
+        self.second = Lesson.objects.create(course=self.course, title='Second', order=2)
+
+    def put(self, outline):
+        response = self.client.put(self.url, outline, format='json')
+        with connection.cursor() as cursor:
+            # TestCase never commits; check the deferred unique constraint now.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        return response
+
+    def outline(self):
+        return list(Lesson.objects.filter(course=self.course).order_by('order').values_list('id', 'title', 'order'))
+
+    def test_update_create_and_delete_by_omission(self):
+        response = self.put([
+            {'title': 'New first'},
+            {'id': self.second.id, 'title': 'Second, renamed', 'duration_minutes': 7},
+        ])
+        self.assertEqual(response.status_code, 200)
+        created = Lesson.objects.get(title='New first')
+        self.assertEqual(self.outline(), [(created.id, 'New first', 1), (self.second.id, 'Second, renamed', 2)])
+        self.assertEqual(Lesson.objects.get(pk=self.second.pk).duration_minutes, 7)
+        self.assertFalse(Lesson.objects.filter(pk=self.lesson.pk).exists())
+        self.assertEqual([lesson['id'] for lesson in response.data], [created.id, self.second.id])
+
+    def test_order_is_list_position(self):
+        third = Lesson.objects.create(course=self.course, title='Third', order=9)
+        outline = [{'id': lesson.id, 'title': lesson.title, 'order': 50} for lesson in (self.lesson, self.second, third)]
+        self.assertEqual(self.put(outline).status_code, 200)
+        self.assertEqual([order for _, _, order in self.outline()], [1, 2, 3])
+
+    def test_swap_positions(self):
+        # One UPDATE per row, so the swap passes through a duplicate position
+        bulk_update = Lesson.objects.bulk_update
+        outline = [{'id': self.second.id, 'title': 'Second'}, {'id': self.lesson.id, 'title': 'Intro'}]
+        with mock.patch.object(Lesson.objects, 'bulk_update',
+                               side_effect=lambda objs, fields: bulk_update(objs, fields, batch_size=1)):
+            self.assertEqual(self.put(outline).status_code, 200)
+        self.assertEqual(self.outline(), [(self.second.id, 'Second', 1), (self.lesson.id, 'Intro', 2)])
+
+    def test_foreign_and_duplicate_ids_are_rejected(self):
+        other = Course.objects.create(title='Other', description='', price=0, instructor=self.instructor)
+        foreign = Lesson.objects.create(course=other, title='Elsewhere', order=1)
+        before = self.outline()
+        for outline in (
+            [{'id': self.lesson.id, 'title': 'Intro'}, {'id': foreign.id, 'title': 'Stolen'}],
+            [{'id': self.lesson.id, 'title': 'Intro'}, {'id': self.lesson.id, 'title': 'Again'}],
+        ):
+            self.assertEqual(self.put(outline).status_code, 400)
+        self.assertEqual(self.outline(), before)
+        self.assertEqual(Lesson.objects.get(pk=foreign.pk).course, other)
+
+    def test_other_instructor_is_refused(self):
+        other = User.objects.create_user(
+            email='other@example.com', password='pass', full_name='Other', role='INSTRUCTOR'
+        )
+        response = self.client_for(other).put(self.url, [{'title': 'Mine'}], format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(self.outline()), 2)
+
+
+class SparseFieldsetTests(LessonFixture, TestCase):
+    def setUp(self):
+        self.client = self.client_for(self.instructor)
+
+    def course_sql(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/courses/{self.course.id}/?{query}')
+        self.assertEqual(response.status_code, 200)
+        sql = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "courses_course"'))
+        return response.data, sql
+
+    def test_fields_select_columns_and_joins(self):
+        data, sql = self.course_sql('fields=title')
+        self.assertEqual(set(data), {'id', 'title'})
+        self.assertNotIn('"courses_course"."description"', sql)
+        self.assertNotIn('"accounts_user"', sql)
+
+        data, sql = self.course_sql('fields=title&expand=instructor')
+        self.assertEqual(set(data), {'id', 'title', 'instructor'})
+        self.assertEqual(data['instructor']['id'], self.instructor.id)
+        self.assertIn('JOIN "accounts_user"', sql)
+
+        data, sql = self.course_sql('')
+        self.assertIn('"courses_course"."description"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        for query in ('fields=title,nope', 'expand=nope'):
+            response = self.client.get(f'/api/courses/{self.course.id}/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+        response = self.client.get(f'/api/courses/{self.course.id}/lessons/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_writes_ignore_fields(self):
+        data = {'course': self.course.id, 'title': 'Second', 'order': 2}
+        response = self.client.post('/api/lessons/create/?fields=title', data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['course'], self.course.id)
+        self.assertEqual(Lesson.objects.get(pk=response.data['id']).course, self.course)
+
+        response = self.client.patch(f'/api/lessons/{self.lesson.id}/update/?fields=title', {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['order'], 1)
+        self.assertEqual(Lesson.objects.get(pk=self.lesson.pk).title, 'Renamed')
+
+    def test_partial_update_checks_lesson_owner(self):
+        other = User.objects.create_user(
+            email='other@example.com', password='pass', full_name='Other', role='INSTRUCTOR'
+        )
+        response = self.client_for(other).patch(f'/api/lessons/{self.lesson.id}/update/', {'title': 'Mine'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Lesson.objects.get(pk=self.lesson.pk).title, 'Intro')
+
+
+class ConditionalGetTests(LessonFixture, TestCase):
+    def revalidate(self, client, url):
+        """Fetch `url`, check that its ETag revalidates to a 304, and return the ETag."""
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def assertChanged(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_catalog_list(self):
+        etag = self.revalidate(self.client, '/api/courses/')
+        self.client_for(self.instructor).patch(f'/api/courses/{self.course.id}/', {'title': 'Retitled'})
+        self.assertChanged(self.client, '/api/courses/', etag)
+
+    def test_course_detail(self):
+        url = f'/api/courses/{self.course.id}/'
+        etag = self.revalidate(self.client, url)
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.client_for(self.instructor).patch(url, {'title': 'Retitled'})
+        self.assertChanged(self.client, url, etag)
+
+    def test_malformed_course_id_is_not_found(self):
+        for cache_timeout in (0, 60):
+            with self.subTest(cache_timeout=cache_timeout), override_settings(CATALOG_CACHE_TIMEOUT=cache_timeout):
+                self.assertEqual(self.client.get('/api/courses/abc/').status_code, 404)
+
+    def test_lessons(self):
+        student, instructor = self.client_for(self.student), self.client_for(self.instructor)
+        url = f'/api/courses/{self.course.id}/lessons/'
+        etag = self.revalidate(student, url)
+        instructor.patch(f'/api/lessons/{self.lesson.id}/update/', {'course': self.course.id, 'title': 'Welcome'})
+        self.assertChanged(student, url, etag)
+
+        etag = self.revalidate(student, url)
+        instructor.delete(f'/api/lessons/{self.lesson.id}/delete/')
+        self.assertChanged(student, url, etag)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=60)
+class CatalogCacheTests(LessonFixture, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.other = Course.objects.create(
+            title='Other course', description='', price=0, instructor=self.instructor, is_approved=True
+        )
+
+    def titles(self, response):
+        return {course['id']: course['title'] for course in response.data['results']}
+
+    def test_hit_skips_database_until_version_bump(self):
+        self.client.get('/api/courses/')
+        # Changes that skip the write paths are not seen until the version moves
+        Course.objects.filter(pk=self.other.pk).update(title='Renamed quietly')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/')
+        self.assertEqual(self.titles(response)[self.other.id], 'Other course')
+
+        caching.bump_catalog_version()
+        self.assertEqual(self.titles(self.client.get('/api/courses/'))[self.other.id], 'Renamed quietly')
+
+    def test_writes_invalidate_list_and_detail(self):
+        detail = f'/api/courses/{self.other.id}/'
+        self.client.get('/api/courses/')
+        self.client.get(detail)
+        response = self.client_for(self.instructor).patch(detail, {'title': 'Retitled'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(self.client.get('/api/courses/'))[self.other.id], 'Retitled')
+        self.assertEqual(self.client.get(detail).data['title'], 'Retitled')
+
+    def test_is_enrolled_is_merged_per_user(self):
+        # The anonymous request fills the cache entry that the student then reads
+        anonymous = self.client.get('/api/courses/').data['results']
+        self.assertEqual({course['is_enrolled'] for course in anonymous}, {False})
+
+        enrolled = {
+            course['id']: course['is_enrolled']
+            for course in self.client_for(self.student).get('/api/courses/').data['results']
+        }
+        self.assertEqual(enrolled, {self.course.id: True, self.other.id: False})
+        self.assertEqual(
+            {course['is_enrolled'] for course in self.client.get('/api/courses/').data['results']}, {False}
+        )
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=0)
+    def test_disabled_cache_reads_through(self):
+        self.client.get('/api/courses/')
+        Course.objects.filter(pk=self.other.pk).update(title='Renamed quietly')
+        self.assertEqual(self.titles(self.client.get('/api/courses/'))[self.other.id], 'Renamed quietly')
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=60)
+@mock.patch.object(caching, 'LOCK_POLL_INTERVAL', 0.01)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_waiter_uses_lock_holder_result(self):
+        cache.add('flight:lock', 1)
+        timer = threading.Timer(0.05, lambda: cache.set('flight', 'from holder'))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        compute = mock.Mock(return_value='from waiter')
+        self.assertEqual(caching.get_or_compute('flight', compute), 'from holder')
+        compute.assert_not_called()
+
+    def test_waiter_computes_when_holder_gives_up(self):
+        cache.add('flight:lock', 1)
+        timer = threading.Timer(0.05, lambda: cache.delete('flight:lock'))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(caching.get_or_compute('flight', lambda: 'from waiter'), 'from waiter')
+
+    def test_miss_computes_once_and_caches(self):
+        compute = mock.Mock(return_value='fresh')
+        for _ in range(2):
+            self.assertEqual(caching.get_or_compute('flight', compute), 'fresh')
+        compute.assert_called_once()
+        self.assertIsNone(cache.get('flight:lock'))
+
+
+@override_settings(ENROLLMENT_CACHE_TIMEOUT=300)
+class EnrollmentAccessCacheTests(LessonFixture, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.newcomer = User.objects.create_user(
+            email='newcomer@example.com', password='pass', full_name='Newcomer', role='STUDENT'
+        )
+        self.client = self.client_for(self.newcomer)
+        self.url = f'/api/courses/{self.course.id}/progress/'
+
+    def test_cached_denial_is_rechecked(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        # Enrolled through another worker, whose version bump this process's cache never saw
+        Enrollment.objects.bulk_create([Enrollment(student=self.newcomer, course=self.course)])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIn(self.course.id, access.load_enrolled_course_ids(self.newcomer.pk))
+
+    def test_unenrolled_student_is_denied(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class CourseProgressTests(LessonFixture, TestCase):
+    def setUp(self):
+        Lesson.objects.filter(pk=self.lesson.pk).update(duration_minutes=10)
+        self.second = Lesson.objects.create(course=self.course, title='Second', order=2, duration_minutes=20)
+        self.third = Lesson.objects.create(course=self.course, title='Third', order=3, duration_minutes=30)
+        self.client = self.client_for(self.student)
+        self.url = f'/api/courses/{self.course.id}/progress/'
+
+    def progress(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def complete(self, lesson, is_completed=True):
+        LessonProgress.objects.update_or_create(
+            student=self.student, lesson=lesson, defaults={'is_completed': is_completed}
+        )
+
+    def test_nothing_completed(self):
+        self.assertEqual(self.progress(), {
+            'course_id': self.course.id,
+            'total_lessons': 3,
+            'completed_lessons': 0,
+            'total_duration_minutes': 60,
+            'completed_duration_minutes': 0,
+            'completed_lesson_ids': [],
+            'percent_complete': 0,
+            'next_lesson': {'id': self.lesson.id, 'title': 'Intro', 'order': 1, 'duration_minutes': 10},
+        })
+
+    def test_partial_progress(self):
+        self.complete(self.third)
+        self.complete(self.lesson)
+        self.complete(self.second, is_completed=False)
+        # Another student's progress doesn't count
+        other = User.objects.create_user(
+            email='other@example.com', password='pass', full_name='Other', role='STUDENT'
+        )
+        LessonProgress.objects.create(student=other, lesson=self.second, is_completed=True)
+
+        data = self.progress()
+        self.assertEqual(data['completed_lessons'], 2)
+        self.assertEqual(data['completed_duration_minutes'], 40)
+        self.assertEqual(data['completed_lesson_ids'], [self.lesson.id, self.third.id])
+        self.assertEqual(data['percent_complete'], 67)
+        self.assertEqual(data['next_lesson']['id'], self.second.id)
+
+    def test_all_completed(self):
+        for lesson in (self.lesson, self.second, self.third):
+            self.complete(lesson)
+        data = self.progress()
+        self.assertEqual((data['completed_lessons'], data['percent_complete']), (3, 100))
+        self.assertEqual(data['completed_duration_minutes'], 60)
+        self.assertIsNone(data['next_lesson'])
+
+    def test_unenrolled_student_is_refused(self):
+        Enrollment.objects.filter(student=self.student).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class CourseProgressSyncTests(LessonFixture, TestCase):
+    def setUp(self):
+        self.client = self.client_for(self.student)
+        self.url = f'/api/courses/{self.course.id}/progress/sync/'
+
+    def test_batch_size_is_capped(self):
+        batch = [{'lesson_id': self.lesson.id + i} for i in range(501)]
+        response = self.client.post(self.url, batch, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LessonProgress.objects.exists())
+
+    def test_resync_counts_completion_once(self):
+        for _ in range(2):
+            response = self.client.post(self.url, [{'lesson_id': self.lesson.id}], format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(CourseStats.objects.get(course=self.course).completed_progress_count, 1)
+        enrollment = Enrollment.objects.get(student=self.student, course=self.course)
+        self.assertTrue(bitmaps.covers(enrollment.completed_lessons_bitmap, [self.lesson.order]))
+
+
+class ProgressConcurrencyTests(TransactionTestCase):
+    """Racing progress writes from one student must count each completion once."""
+
+    def setUp(self):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        self.course = Course.objects.create(
+            title='Course', description='', price=0, instructor=instructor, is_approved=True
+        )
+        self.lessons = [Lesson.objects.create(course=self.course, title=f'Lesson {i}', order=i) for i in range(5)]
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def race(self, url, data, threads=4):
+        barrier = threading.Barrier(threads)
+        statuses = []
+
+        def worker():
+            client = APIClient()
+            client.force_authenticate(self.student)
+            try:
+                barrier.wait()
+                statuses.append(client.post(url, data, format='json').status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.assertEqual(statuses, [200] * threads)
+
+    def test_concurrent_syncs_count_completion_once(self):
+        batch = [{'lesson_id': lesson.id} for lesson in self.lessons]
+        self.race(f'/api/courses/{self.course.id}/progress/sync/', batch)
+        self.assertEqual(CourseStats.objects.get(course=self.course).completed_progress_count, len(self.lessons))
+
+    def test_concurrent_completes_count_completion_once(self):
+        lesson = self.lessons[2]
+        self.race(f'/api/lessons/{lesson.id}/complete/', {'is_completed': True})
+        self.assertEqual(CourseStats.objects.get(course=self.course).completed_progress_count, 1)
+        enrollment = Enrollment.objects.get(student=self.student, course=self.course)
+        self.assertEqual(bitmaps.to_int(enrollment.completed_lessons_bitmap), 1 << lesson.order)
+
+
+class CompletionBitmapTests(TestCase):
+    def test_covers(self):
+        bitmap = bitmaps.apply_changes(b'', {1: True, 2: True, 9: True})
+        self.assertTrue(bitmaps.covers(bitmap, [1, 2, 9]))
+        self.assertTrue(bitmaps.covers(bitmap, [2]))
+        self.assertFalse(bitmaps.covers(bitmap, [1, 3]))
+        self.assertFalse(bitmaps.covers(bitmap, []))
+        self.assertFalse(bitmaps.covers(bitmaps.apply_changes(bitmap, {9: False}), [9]))
+        self.assertEqual(bitmaps.popcount(bitmap), 3)
+
+    def test_completion_report(self):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        course = Course.objects.create(title='Course', description='', price=0, instructor=instructor)
+        done = [{1, 2, 3}, {1, 2}, {1}, set()]
+        for i, orders in enumerate(done):
+            student = User.objects.create_user(
+                email=f'student{i}@example.com', password='pass', full_name=f'Student {i}', role='STUDENT'
+            )
+            Enrollment.objects.create(
+                student=student, course=course,
+                completed_lessons_bitmap=bitmaps.apply_changes(b'', dict.fromkeys(orders, True)),
+            )
+        self.assertEqual(bitmaps.completion_report(course, [1, 2, 3]), {
+            'enrollments': 4,
+            'lessons': 3,
+            'completion_rate': 50,  # 6 of 12 lesson completions
+            'students_completed': 1,
+            'lesson_completion_rates': {1: 75, 2: 50, 3: 25},
+        })
+        self.assertEqual(bitmaps.completion_report(course, [])['completion_rate'], None)
+
+
+class DeferredBitmapRebuildTests(LessonFixture, TestCase):
+    def setUp(self):
+        self.second = Lesson.objects.create(course=self.course, title='Second', order=2)
+        client = self.client_for(self.student)
+        for lesson in (self.lesson, self.second):
+            client.post(f'/api/lessons/{lesson.id}/complete/')
+        self.instructor_client = self.client_for(self.instructor)
+
+    def bitmap(self):
+        return bitmaps.to_int(Enrollment.objects.get(student=self.student, course=self.course).completed_lessons_bitmap)
+
+    def test_reorder_schedules_rebuild(self):
+        third = Lesson.objects.create(course=self.course, title='Third', order=3)
+        self.assertEqual(self.bitmap(), 0b110)
+        outline = [{'id': lesson.id, 'title': lesson.title} for lesson in (third, self.lesson, self.second)]
+        response = self.instructor_client.put(f'/api/courses/{self.course.id}/lessons/bulk/', outline, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # The request only queued the rebuild
+        self.assertEqual(self.bitmap(), 0b110)
+        self.assertTrue(bitmaps.is_stale(self.course.id))
+        completion = self.instructor_client.get(f'/api/courses/{self.course.id}/completion/').data
+        self.assertTrue(completion['stale'])
+
+        out = StringIO()
+        call_command('rebuild_completion_bitmaps', '--pending', stdout=out)
+        self.assertIn('1 pending course(s)', out.getvalue())
+        self.assertEqual(self.bitmap(), 0b1100)  # the completed lessons moved to orders 2 and 3
+        self.assertFalse(bitmaps.is_stale(self.course.id))
+        completion = self.instructor_client.get(f'/api/courses/{self.course.id}/completion/').data
+        self.assertFalse(completion['stale'])
+        self.assertEqual(completion['lesson_completion_rates'], {1: 0, 2: 100, 3: 100})
+
+    def test_delete_schedules_rebuild(self):
+        self.instructor_client.delete(f'/api/lessons/{self.second.id}/delete/')
+        self.assertTrue(bitmaps.is_stale(self.course.id))
+        self.assertEqual(bitmaps.process_pending(), 1)
+        self.assertEqual(self.bitmap(), 0b10)
+        self.assertEqual(bitmaps.process_pending(), 0)
+
+    def test_full_rebuild_command(self):
+        Enrollment.objects.update(completed_lessons_bitmap=b'')
+        out = StringIO()
+        call_command('rebuild_completion_bitmaps', '--batch-size', '1', stdout=out)
+        self.assertIn('1 enrollment(s)', out.getvalue())
+        self.assertEqual(self.bitmap(), 0b110)
+
+
+class CourseStatsWritePathTests(LessonFixture, TestCase):
+    """Each write path keeps CourseStats equal to a rebuild from the source tables."""
+
+    def setUp(self):
+        CourseStats.rebuild(course_ids=[self.course.id])
+        self.instructor_client = self.client_for(self.instructor)
+
+    def assertStats(self, **expected):
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual({field: getattr(stats, field) for field in expected}, expected)
+        CourseStats.rebuild(course_ids=[self.course.id])
+        rebuilt = CourseStats.objects.get(course=self.course)
+        self.assertEqual({field: getattr(rebuilt, field) for field in expected}, expected)
+
+    def test_enroll_and_unenroll(self):
+        newcomer = User.objects.create_user(
+            email='newcomer@example.com', password='pass', full_name='Newcomer', role='STUDENT'
+        )
+        client = self.client_for(newcomer)
+        response = client.post('/api/enrollments/', {'course': self.course.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertStats(enrollment_count=2)
+
+        self.assertEqual(client.delete(f"/api/enrollments/{response.data['id']}/").status_code, 204)
+        self.assertStats(enrollment_count=1)
+
+    def test_lesson_create_update_delete(self):
+        response = self.instructor_client.post('/api/lessons/create/', {
+            'course': self.course.id, 'title': 'Second', 'order': 2, 'duration_minutes': 10,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertStats(lesson_count=2, total_duration_minutes=10)
+
+        lesson_id = response.data['id']
+        self.instructor_client.patch(f'/api/lessons/{lesson_id}/update/', {
+            'course': self.course.id, 'duration_minutes': 25,
+        })
+        self.assertStats(lesson_count=2, total_duration_minutes=25)
+
+        LessonProgress.objects.create(student=self.student, lesson_id=lesson_id, is_completed=True)
+        CourseStats.rebuild(course_ids=[self.course.id])
+        self.instructor_client.delete(f'/api/lessons/{lesson_id}/delete/')
+        self.assertStats(lesson_count=1, total_duration_minutes=0, completed_progress_count=0)
+
+    def test_complete_and_uncomplete(self):
+        client = self.client_for(self.student)
+        url = f'/api/lessons/{self.lesson.id}/complete/'
+        for _ in range(2):
+            self.assertEqual(client.post(url, {'is_completed': True}).status_code, 200)
+        self.assertStats(completed_progress_count=1)
+        client.post(url, {'is_completed': False})
+        self.assertStats(completed_progress_count=0)
+
+    def test_rebuild_command_repairs_drift(self):
+        other = Course.objects.create(title='Other', description='', price=0, instructor=self.instructor)
+        CourseStats.rebuild(course_ids=[other.id])
+        CourseStats.objects.update(enrollment_count=99, lesson_count=99)
+
+        out = StringIO()
+        call_command('rebuild_course_stats', '--course', str(self.course.id), stdout=out)
+        self.assertIn('1 course(s)', out.getvalue())
+        self.assertStats(enrollment_count=1, lesson_count=1)
+        self.assertEqual(CourseStats.objects.get(course=other).enrollment_count, 99)
+
+        call_command('rebuild_course_stats', stdout=StringIO())
+        self.assertEqual(CourseStats.objects.get(course=other).enrollment_count, 0)
+
+
+class SeedMarketplaceTests(TestCase):
+    counters = ['course', 'enrollment_count', 'lesson_count', 'completed_progress_count',
+                'total_duration_minutes', 'revenue']
+
+    def seed(self, prefix):
+        call_command(
+            'seed_marketplace', '--instructors=3', '--courses=40', '--students=0.2k', '--enrollments=1k',
+            '--seed=5', '--end=2026-01-31', f'--prefix={prefix}', stdout=StringIO()
+        )
+        return self.enrollments(prefix)
+
+    def enrollments(self, prefix):
+        rows = Enrollment.objects.filter(student__email__startswith=f'{prefix}-').select_related('student', 'course')
+        return [
+            (e.student.full_name, e.course.title, e.enrolled_at, bytes(e.completed_lessons_bitmap))
+            for e in rows.order_by('id')
+        ]
+
+    def test_seed_is_consistent_and_deterministic(self):
+        first = self.seed('one')
+        self.assertEqual(len(first), 1000)
+        self.assertEqual(first, self.seed('two'))
+
+        # Counters and bitmaps written while generating match a rebuild from the rows
+        stats = list(CourseStats.objects.order_by('pk').values_list(*self.counters))
+        CourseStats.rebuild()
+        self.assertEqual(stats, list(CourseStats.objects.order_by('pk').values_list(*self.counters)))
+        bitmaps.rebuild_course_bitmaps([row[0] for row in stats])
+        self.assertEqual(first, self.enrollments('one'))
+
+
+def completed_upload(ctx):
+    upload = LessonVideoUpload.objects.create(
+        lesson=ctx['lesson'], uploaded_by=ctx['owner'], filename='intro.mp4',
+        total_size=len(VIDEO), received_bytes=len(VIDEO)
+    )
+    os.makedirs(os.path.dirname(uploads.part_path(upload)), exist_ok=True)
+    with open(uploads.part_path(upload), 'wb') as part:
+        part.write(VIDEO)
+    return {'upload': upload}
+
+
+def pending_upload(ctx):
+    return {'upload': LessonVideoUpload.objects.create(
+        lesson=ctx['lesson'], uploaded_by=ctx['owner'], filename='intro.mp4', total_size=len(VIDEO)
+    )}
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CourseQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'courses.urls'
+
+    def prepare(self, data):
+        course, other = data['courses'][1], data['courses'][3]
+        student = data['students'][0]
+        enrollment, _ = Enrollment.objects.get_or_create(student=student, course=course)
+        Enrollment.objects.filter(student=student, course=other).delete()
+        LessonProgress.objects.filter(student=student, lesson__course=course).delete()
+        bitmaps.rebuild_course_bitmaps([course.id])
+        return {
+            'student': student,
+            'owner': data['instructors'][1],
+            'course': course,
+            'other_course': other,
+            'enrollment': enrollment,
+            'lesson': Lesson.objects.filter(course=course).order_by('order').first(),
+            'lessons': list(Lesson.objects.filter(course=course).order_by('order')),
+        }
+
+    scenarios = {
+        'api-root': [Call('get', '/api/')],
+        'course-list': [
+            Call('get', '/api/courses/?page_size=20'),
+            Call('post', '/api/courses/', 'owner', status=201, data={
+                'title': 'New course', 'description': 'About it', 'price': '499.00', 'category': 'design',
+            }),
+        ],
+        'course-detail': [
+            Call('get', lambda ctx: f"/api/courses/{ctx['course'].id}/", 'student'),
+            Call('patch', lambda ctx: f"/api/courses/{ctx['course'].id}/", 'owner', data={'title': 'Renamed'}),
+            Call('delete', lambda ctx: f"/api/courses/{ctx['course'].id}/", 'owner', status=204),
+        ],
+        'course-search': [Call('get', '/api/courses/search/?q=topic')],
+        'course-approve': [Call('post', lambda ctx: f"/api/courses/{ctx['course'].id}/approve/", 'admin')],
+        'course-reject': [Call('post', lambda ctx: f"/api/courses/{ctx['course'].id}/reject/", 'admin')],
+        'course-completion': [Call('get', lambda ctx: f"/api/courses/{ctx['course'].id}/completion/", 'owner')],
+        'enrollment-list': [
+            Call('get', '/api/enrollments/', 'student'),
+            Call('post', '/api/enrollments/', 'student', status=201,
+                 data=lambda ctx: {'course': ctx['other_course'].id}),
+        ],
+        'enrollment-detail': [
+            Call('get', lambda ctx: f"/api/enrollments/{ctx['enrollment'].id}/", 'student'),
+            Call('delete', lambda ctx: f"/api/enrollments/{ctx['enrollment'].id}/", 'student', status=204),
+        ],
+        'lesson-list': [
+            Call('get', lambda ctx: f"/api/courses/{ctx['course'].id}/lessons/", 'student'),
+            Call('get', lambda ctx: f"/api/courses/{ctx['course'].id}/lessons/", 'owner'),
+        ],
+        'lesson-bulk': [Call(
+            'put', lambda ctx: f"/api/courses/{ctx['course'].id}/lessons/bulk/", 'owner',
+            data=lambda ctx: [{'id': lesson.id, 'title': lesson.title} for lesson in reversed(ctx['lessons'])]
+            + [{'title': 'Appendix'}],
+        )],
+        'lesson-create': [Call('post', '/api/lessons/create/', 'owner', status=201, data=lambda ctx: {
+            'course': ctx['course'].id, 'title': 'Extra', 'order': 100, 'duration_minutes': 5,
+        })],
+        'lesson-update': [
+            Call('get', lambda ctx: f"/api/lessons/{ctx['lesson'].id}/update/", 'owner'),
+            Call('put', lambda ctx: f"/api/lessons/{ctx['lesson'].id}/update/", 'owner', data=lambda ctx: {
+                'course': ctx['course'].id, 'title': 'Retitled', 'order': ctx['lesson'].order,
+            }),
+        ],
+        'lesson-delete': [Call('delete', lambda ctx: f"/api/lessons/{ctx['lesson'].id}/delete/", 'owner', status=204)],
+        # No video is attached to the seeded lessons
+        'lesson-video': [Call('get', lambda ctx: f"/api/lessons/{ctx['lesson'].id}/video/", 'student', status=404)],
+        'lesson-video-upload-create': [Call('post', '/api/lessons/video-uploads/', 'owner', status=201, data=lambda ctx: {
+            'lesson': ctx['lesson'].id, 'filename': 'intro.mp4', 'total_size': len(VIDEO),
+        })],
+        'lesson-video-upload': [
+            Call('get', lambda ctx: f"/api/lessons/video-uploads/{ctx['upload'].id}/", 'owner', setup=pending_upload),
+            Call('put', lambda ctx: f"/api/lessons/video-uploads/{ctx['upload'].id}/", 'owner', setup=pending_upload,
+                 data=VIDEO, content_type='application/octet-stream',
+                 HTTP_CONTENT_RANGE=f'bytes 0-{len(VIDEO) - 1}/{len(VIDEO)}'),
+        ],
+        'lesson-video-upload-complete': [Call(
+            'post', lambda ctx: f"/api/lessons/video-uploads/{ctx['upload'].id}/complete/", 'owner',
+            setup=completed_upload, data={'sha256': hashlib.sha256(VIDEO).hexdigest()},
+        )],
+        'lesson-complete': [Call('post', lambda ctx: f"/api/lessons/{ctx['lesson'].id}/complete/", 'student')],
+        'course-progress': [Call('get', lambda ctx: f"/api/courses/{ctx['course'].id}/progress/", 'student')],
+        'course-progress-sync': [Call(
+            'post', lambda ctx: f"/api/courses/{ctx['course'].id}/progress/sync/", 'student',
+            data=lambda ctx: [{'lesson_id': lesson.id, 'is_completed': True} for lesson in ctx['lessons']],
+        )],
+    }
@@ -0,0 +1,79 @@
+"""
+File handling for resumable lesson video uploads.
+
+Chunks are streamed from the request straight into a part file, so memory
+use is bounded by COPY_BUFFER_SIZE no matter how large the video is.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+
+UPLOAD_DIR = 'lesson_videos'
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+def part_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, '.uploads', f'{upload.id}.part')
+
+
+def write_chunk(upload, stream, offset, length):
+    """
+    Append `length` bytes from `stream` at `offset` and return the new
+    received byte count. The caller must hold a lock on the upload row.
+    """
+    if offset != upload.received_bytes:
+        raise UploadError(f"Expected offset {upload.received_bytes}, got {offset}.")
+    if offset + length > upload.total_size:
+        raise UploadError("Chunk runs past the declared total size.")
+
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as part:
+        # Drop bytes left behind by an interrupted chunk before appending.
+        part.truncate(offset)
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                break
+            part.write(data)
+            remaining -= len(data)
+
+    if remaining:
+        # Connection dropped mid-chunk: keep what arrived, the client resumes from there.
+        return offset + length - remaining
+    return offset + length
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload, sha256):
+    """
+    Verify the assembled file against `sha256` and move it into the lesson
+    video directory. Returns the storage name for Lesson.video_file.
+    """
+    path = part_path(upload)
+    if upload.received_bytes != upload.total_size or not os.path.exists(path):
+        raise UploadError(f"Upload incomplete: {upload.received_bytes} of {upload.total_size} bytes received.")
+
+    if file_sha256(path) != sha256.lower():
+        raise UploadError("Checksum mismatch.")
+
+    name = default_storage.get_available_name(
+        os.path.join(UPLOAD_DIR, get_valid_filename(upload.filename))
+    )
+    os.replace(path, default_storage.path(name))
+    return name
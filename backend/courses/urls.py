@@ -1,5 +1,6 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import APIRootView, DefaultRouter
+from .budgets import query_budget
 from .views import (
     CourseViewSet,
     EnrollmentViewSet,
@@ -8,9 +9,22 @@ from .views import (
     LessonListView,
     LessonCompleteView,
     CourseProgressView,
+    LessonVideoUploadCreateView,
+    LessonVideoUploadView,
+    LessonVideoUploadCompleteView,
+    LessonVideoView,
+    LessonBulkView,
+    CourseProgressSyncView,
 )
 
+
+@query_budget(0)
+class CoursesRootView(APIRootView):
+    pass
+
+
 router = DefaultRouter()
+router.APIRootView = CoursesRootView
 router.register(r'courses', CourseViewSet, basename='course')
 router.register(r'enrollments', EnrollmentViewSet, basename='enrollment')
 
@@ -19,11 +33,23 @@ urlpatterns = [
 
     # Lesson URLs
     path('courses/<int:course_id>/lessons/', LessonListView.as_view(), name='lesson-list'),
+    path('courses/<int:course_id>/lessons/bulk/', LessonBulkView.as_view(), name='lesson-bulk'),
     path('lessons/create/', LessonCreateView.as_view(), name='lesson-create'),
     path('lessons/<int:pk>/update/', LessonUpdateDeleteView.as_view(), name='lesson-update'),
     path('lessons/<int:pk>/delete/', LessonUpdateDeleteView.as_view(), name='lesson-delete'),
+    path('lessons/<int:lesson_id>/video/', LessonVideoView.as_view(), name='lesson-video'),
+
+    # Resumable lesson video uploads
+    path('lessons/video-uploads/', LessonVideoUploadCreateView.as_view(), name='lesson-video-upload-create'),
+    path('lessons/video-uploads/<uuid:upload_id>/', LessonVideoUploadView.as_view(), name='lesson-video-upload'),
+    path(
+        'lessons/video-uploads/<uuid:upload_id>/complete/',
+        LessonVideoUploadCompleteView.as_view(),
+        name='lesson-video-upload-complete'
+    ),
 
     # Lesson Progress URLs
     path('lessons/<int:lesson_id>/complete/', LessonCompleteView.as_view(), name='lesson-complete'),
     path('courses/<int:course_id>/progress/', CourseProgressView.as_view(), name='course-progress'),
+    path('courses/<int:course_id>/progress/sync/', CourseProgressSyncView.as_view(), name='course-progress-sync'),
 ]
@@ -3,36 +3,101 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.views import APIView
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import Count, F, FilteredRelation, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.utils import timezone
 
-from .models import Course, Enrollment, Lesson, LessonProgress
+from . import bitmaps, caching, conditional, streaming, uploads
+from .access import IsEnrolledInCourse, get_access
+from .budgets import query_budget
+from .models import MAX_LESSON_ORDER, Course, CourseStats, Enrollment, Lesson, LessonProgress, LessonVideoUpload
+from .pagination import CourseCursorPagination
 from .serializers import (
     CourseSerializer,
     EnrollmentSerializer,
     LessonSerializer,
-    LessonProgressSerializer
+    LessonOutlineItemSerializer,
+    LessonProgressSerializer,
+    LessonVideoUploadSerializer,
+    ProgressSyncSerializer
 )
 from accounts.permissions import IsInstructor, IsAdmin, IsStudent
 
 # -------------------------
 # Course APIs
 # -------------------------
+@query_budget(
+    list=2, retrieve=4, create=7, update=3, partial_update=3, destroy=18,
+    search=1, approve=3, reject=3, completion=5
+)
 class CourseViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSerializer
+    pagination_class = CourseCursorPagination
+    # Responses shared through the catalog cache; is_enrolled is merged per user.
+    cached_actions = ['list', 'retrieve']
+    # Read-only actions whose queries follow ?fields= / ?expand=
+    sparse_actions = ['list', 'retrieve', 'search']
 
     def get_queryset(self):
         user = self.request.user
+        courses = Course.objects.all()
+        fields = None
+        if self.action in self.sparse_actions:
+            fields = CourseSerializer.requested_fields(self.request)
+            courses = courses.only(*CourseSerializer.only_fields(self.request))
+        if fields is None or 'instructor' in fields:
+            courses = courses.select_related('instructor')
+        courses = courses.with_catalog_stats(
+            None if self.action in self.cached_actions else user,
+            fields=fields
+        )
+
+        if self.action in ['list', 'search']:
+            courses = self.filter_catalog(courses)
 
         if not user.is_authenticated:
-            return Course.objects.filter(is_approved=True)
+            return courses.filter(is_approved=True)
 
         if user.role == 'STUDENT':
-            return Course.objects.filter(is_approved=True)
+            return courses.filter(is_approved=True)
 
         if user.role == 'INSTRUCTOR':
-            return Course.objects.filter(instructor=user)
-
-        return Course.objects.all()  # ADMIN
+            return courses.filter(instructor=user)
+
+        return courses  # ADMIN
+
+    def filter_catalog(self, courses):
+        """
+        Apply the `category`, `min_price`, `max_price` and `ordering` query params.
+        """
+        params = self.request.query_params
+
+        category = params.get('category')
+        if category:
+            courses = courses.filter(category=category)
+
+        for param, lookup in (('min_price', 'price__gte'), ('max_price', 'price__lte')):
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                courses = courses.filter(**{lookup: Decimal(value)})
+            except InvalidOperation:
+                raise ValidationError({param: "Must be a number."})
+
+        ordering = CourseCursorPagination.ORDERINGS.get(
+            params.get('ordering'), CourseCursorPagination.ordering
+        )
+        return courses.order_by(*ordering)
 
     def get_permissions(self):
         if self.action == 'create':
@@ -41,21 +106,149 @@ class CourseViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated, IsInstructor]
         elif self.action in ['approve', 'reject']:
             permission_classes = [permissions.IsAuthenticated, IsAdmin]
-        elif self.action in ['list', 'retrieve']:
+        elif self.action == 'completion':
+            permission_classes = [permissions.IsAuthenticated, IsInstructor | IsAdmin]
+        elif self.action in ['list', 'retrieve', 'search']:
             permission_classes = [permissions.AllowAny]
         else:
             permission_classes = [permissions.IsAuthenticated]
 
         return [permission() for permission in permission_classes]
 
+    def list(self, request, *args, **kwargs):
+        return self.catalog_response(
+            'list', None,
+            lambda: super(CourseViewSet, self).list(request, *args, **kwargs).data
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.catalog_response(
+            'retrieve', kwargs.get('pk'),
+            lambda: super(CourseViewSet, self).retrieve(request, *args, **kwargs).data
+        )
+
+    def catalog_response(self, action, pk, render):
+        """
+        Serve a cached catalog payload with ETag validation.
+
+        Cache entries carry the version stamp they were rendered from, so a
+        hit is validated without touching the database; on a miss the stamp
+        is computed first and a matching If-None-Match returns 304 before
+        anything is serialized.
+        """
+        request = self.request
+        key = caching.make_key(request, action, pk)
+        entry = caching.peek(key)
+
+        if entry is None:
+            stamp = self.get_version_stamp(pk)
+            etag = self.make_catalog_etag(stamp)
+            if conditional.is_not_modified(request, etag, stamp[-1]):
+                return conditional.not_modified_response(etag, stamp[-1])
+            entry = caching.get_or_compute(key, lambda: (stamp, render()))
+
+        stamp, data = entry
+        etag = self.make_catalog_etag(stamp)
+        if conditional.is_not_modified(request, etag, stamp[-1]):
+            return conditional.not_modified_response(etag, stamp[-1])
+
+        response = Response(self.merge_enrollment(data))
+        return conditional.set_validators(response, etag, stamp[-1])
+
+    def get_version_stamp(self, pk=None):
+        """
+        (count, newest course change, newest stats change, last_modified) for
+        the visible courses. Lists report no last_modified because deleting a
+        course does not move any timestamp.
+        """
+        courses = self.get_queryset().order_by()
+        if pk is not None:
+            try:
+                courses = courses.filter(pk=pk)
+            except (TypeError, ValueError, DjangoValidationError):
+                raise Http404  # as get_object() would for a malformed pk
+        stamp = courses.aggregate(
+            count=Count('id'),
+            course_changed=Max('updated_at'),
+            stats_changed=Max('stats__updated_at'),
+        )
+        last_modified = None
+        if pk is not None and stamp['course_changed'] is not None:
+            last_modified = max(filter(None, [stamp['course_changed'], stamp['stats_changed']]))
+        return (stamp['count'], stamp['course_changed'], stamp['stats_changed'], last_modified)
+
+    def make_catalog_etag(self, stamp):
+        return conditional.make_etag(
+            self.request.get_full_path(),
+            caching.get_scope(self.request.user),
+            stamp,
+            sorted(self.get_enrolled_course_ids()),
+        )
+
+    def get_enrolled_course_ids(self):
+        return get_access(self.request).enrolled_course_ids
+
+    def merge_enrollment(self, data):
+        """
+        Fill in is_enrolled for the current user on a cached payload, which
+        is always rendered as if for an anonymous visitor.
+        """
+        if isinstance(data, dict):
+            courses = data['results'] if 'results' in data else [data]
+        else:
+            courses = data
+
+        enrolled = self.get_enrolled_course_ids()
+        for course in courses:
+            if 'is_enrolled' in course:  # absent when left out of ?fields=
+                course['is_enrolled'] = course['id'] in enrolled
+        return data
+
     def perform_create(self, serializer):
-        serializer.save(instructor=self.request.user)
+        with transaction.atomic():
+            course = serializer.save(instructor=self.request.user)
+            CourseStats.objects.create(course=course)
+        caching.bump_catalog_version()
+
+    def perform_update(self, serializer):
+        serializer.save()
+        caching.bump_catalog_version()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        caching.bump_catalog_version()
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over course titles and descriptions, best matches first.
+        Accepts the catalog filters plus `limit` (default 20, max 100).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+
+        search_query = SearchQuery(query, search_type='websearch', config='english')
+        courses = (
+            self.get_queryset()
+            .filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-id')[:max(limit, 1)]
+        )
+        serializer = self.get_serializer(courses, many=True)
+        return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         course = self.get_object()
         course.is_approved = True
         course.save()
+        caching.bump_catalog_version()
         return Response({"message": "Course approved successfully"})
 
     @action(detail=True, methods=['post'])
@@ -63,12 +256,29 @@ class CourseViewSet(viewsets.ModelViewSet):
         course = self.get_object()
         course.is_approved = False
         course.save()
+        caching.bump_catalog_version()
         return Response({"message": "Course rejected successfully"})
 
+    @action(detail=True, methods=['get'])
+    def completion(self, request, pk=None):
+        """
+        Course-wide completion rates, aggregated from the enrollment bitmaps.
+        `stale` is true while a rebuild after a lesson delete or reorder is
+        still pending, and the figures may lag until it runs.
+        """
+        course = self.get_object()
+        orders = Lesson.objects.filter(course=course).values_list('order', flat=True)
+        return Response({
+            'course_id': course.id,
+            'stale': bitmaps.is_stale(course.id),
+            **bitmaps.completion_report(course, orders),
+        })
+
 
 # -------------------------
 # Enrollment APIs
 # -------------------------
+@query_budget(list=2, retrieve=2, create=5, destroy=4)
 class EnrollmentViewSet(viewsets.ModelViewSet):
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsStudent]
@@ -79,18 +289,23 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         course = serializer.validated_data['course']
 
-        if Enrollment.objects.filter(
-            student=self.request.user,
-            course=course
-        ).exists():
+        if get_access(self.request).is_enrolled(course.id):
             raise ValidationError("You are already enrolled in this course.")
 
-        serializer.save(student=self.request.user)
+        with transaction.atomic():
+            serializer.save(student=self.request.user)
+            CourseStats.increment(course.id, enrollment_count=1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            CourseStats.increment(instance.course_id, enrollment_count=-1)
 
 
 # -------------------------
 # Lesson APIs
 # -------------------------
+@query_budget(6)
 class LessonCreateView(generics.CreateAPIView):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
@@ -100,9 +315,17 @@ class LessonCreateView(generics.CreateAPIView):
         course = serializer.validated_data['course']
         if course.instructor != self.request.user:
             raise PermissionDenied("You can only add lessons to your own courses.")
-        serializer.save()
+        with transaction.atomic():
+            lesson = serializer.save()
+            CourseStats.increment(
+                course.id,
+                lesson_count=1,
+                total_duration_minutes=lesson.duration_minutes or 0
+            )
+        caching.bump_catalog_version()
 
 
+@query_budget(GET=2, PUT=9, PATCH=9, DELETE=12)
 class LessonUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
@@ -112,45 +335,303 @@ class LessonUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         lesson = self.get_object()
         if lesson.course.instructor != self.request.user:
             raise PermissionDenied("You can only update lessons in your own courses.")
-        serializer.save()
+        with transaction.atomic():
+            updated = serializer.save()
+            if updated.course_id != lesson.course_id:
+                # Progress moves with the lesson, so recount both courses.
+                CourseStats.rebuild(course_ids=[lesson.course_id, updated.course_id])
+            else:
+                CourseStats.increment(
+                    updated.course_id,
+                    total_duration_minutes=(updated.duration_minutes or 0) - (lesson.duration_minutes or 0)
+                )
+            if (updated.course_id, updated.order) != (lesson.course_id, lesson.order):
+                bitmaps.schedule_rebuild([lesson.course_id, updated.course_id])
+        caching.bump_catalog_version()
 
     def perform_destroy(self, instance):
         if instance.course.instructor != self.request.user:
             raise PermissionDenied("You can only delete lessons in your own courses.")
-        instance.delete()
-
-
-class LessonListView(generics.ListAPIView):
+        with transaction.atomic():
+            completed = instance.progress.filter(is_completed=True).count()
+            instance.delete()
+            CourseStats.increment(
+                instance.course_id,
+                lesson_count=-1,
+                total_duration_minutes=-(instance.duration_minutes or 0),
+                completed_progress_count=-completed
+            )
+            if completed:
+                bitmaps.schedule_rebuild([instance.course_id])
+        caching.bump_catalog_version()
+
+
+@query_budget(4)
+class LessonListView(conditional.ConditionalListMixin, generics.ListAPIView):
     serializer_class = LessonSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_version_stamp(self):
+        # Lesson deletes and enrollments both move the course's stats row.
+        stamp = self.get_queryset().order_by().aggregate(
+            count=Count('id'),
+            lessons_changed=Max('updated_at'),
+            stats_changed=Max('course__stats__updated_at'),
+        )
+        changed = [stamp['lessons_changed'], stamp['stats_changed']]
+        last_modified = max(filter(None, changed), default=None)
+        # Signed stream URLs are per user and roll over with their expiry window.
+        signing = (self.request.user.pk, streaming.current_expiry())
+        return (stamp['count'], *changed, *signing), last_modified
+
     def get_queryset(self):
         course_id = self.kwargs.get('course_id')
         user = self.request.user
+        lessons = Lesson.objects.only(*LessonSerializer.only_fields(self.request))
+        if 'course' in LessonSerializer.expanded_fields(self.request):
+            lessons = lessons.select_related('course__instructor')
 
         # Admin can see all lessons
         if user.role == 'ADMIN':
-            return Lesson.objects.filter(course_id=course_id)
+            return lessons.filter(course_id=course_id)
 
         # Instructors see lessons in their own course
         if user.role == 'INSTRUCTOR':
-            return Lesson.objects.filter(course_id=course_id, course__instructor=user)
+            return lessons.filter(course_id=course_id, course__instructor=user)
 
         # Students see lessons only if enrolled
         if user.role == 'STUDENT':
-            if Enrollment.objects.filter(student=user, course_id=course_id).exists():
-                return Lesson.objects.filter(course_id=course_id)
+            if get_access(self.request).confirm_enrolled(course_id):
+                return lessons.filter(course_id=course_id)
             else:
                 return Lesson.objects.none()
 
         return Lesson.objects.none()
 
 
+@query_budget(12)
+class LessonBulkView(APIView):
+    """
+    Replace a course's lesson outline in one transaction.
+
+    The body is the full ordered list of lessons: entries with an id are
+    updated, entries without one are created, existing lessons that are left
+    out are deleted, and every lesson's order becomes its 1-based position.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+    outline_fields = ['title', 'description', 'video_url', 'duration_minutes', 'order']
+
+    def put(self, request, course_id):
+        try:
+            course = Course.objects.get(id=course_id)
+        except Course.DoesNotExist:
+            return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        if course.instructor_id != request.user.id:
+            raise PermissionDenied("You can only edit lessons in your own courses.")
+
+        serializer = LessonOutlineItemSerializer(data=request.data, many=True, max_length=MAX_LESSON_ORDER)
+        serializer.is_valid(raise_exception=True)
+        outline = serializer.validated_data
+
+        existing = {lesson.id: lesson for lesson in Lesson.objects.filter(course=course)}
+        ids = [item['id'] for item in outline if 'id' in item]
+        if len(ids) != len(set(ids)):
+            raise ValidationError("Each lesson id may appear only once.")
+        unknown = set(ids) - existing.keys()
+        if unknown:
+            raise ValidationError(f"Lessons {sorted(unknown)} do not belong to this course.")
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        reordered = False
+        for position, item in enumerate(outline, start=1):
+            values = {**item, 'order': position}
+            lesson = existing.get(values.pop('id', None))
+            if lesson is None:
+                to_create.append(Lesson(course=course, **values))
+                continue
+            reordered = reordered or lesson.order != position
+            if any(getattr(lesson, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(lesson, field, value)
+                lesson.updated_at = now  # bulk_update() skips auto_now
+                to_update.append(lesson)
+        to_delete = existing.keys() - set(ids)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Positions are checked for uniqueness at commit, so swaps don't collide.
+                cursor.execute('SET CONSTRAINTS unique_lesson_order DEFERRED')
+            if to_delete:
+                Lesson.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                Lesson.objects.bulk_update(to_update, self.outline_fields + ['updated_at'])
+            if to_create:
+                Lesson.objects.bulk_create(to_create)
+            CourseStats.rebuild(course_ids=[course.id])
+            if to_delete or reordered:
+                # Completion bits are keyed by lesson order.
+                bitmaps.schedule_rebuild([course.id])
+        caching.bump_catalog_version()
+
+        lessons = Lesson.objects.filter(course=course)
+        return Response(LessonSerializer(lessons, many=True, context={'request': request}).data)
+
+
+@query_budget(3)
+class LessonVideoView(APIView):
+    """
+    Stream a lesson's uploaded video with HTTP Range support.
+
+    Accepts either a signed URL from LessonSerializer.stream_url, which skips
+    the access check, or an authenticated request checked the same way as
+    LessonListView.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, lesson_id):
+        try:
+            lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+        except Lesson.DoesNotExist:
+            return Response({"detail": "Lesson not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if not streaming.verify(lesson.id, request.query_params) and not self.has_access(request, lesson):
+            return Response({"detail": "You do not have access to this video."}, status=status.HTTP_403_FORBIDDEN)
+
+        if not lesson.video_file or not lesson.video_file.storage.exists(lesson.video_file.name):
+            return Response({"detail": "This lesson has no uploaded video."}, status=status.HTTP_404_NOT_FOUND)
+
+        return streaming.serve_file(request, lesson.video_file.path, lesson.video_file.name)
+
+    def has_access(self, request, lesson):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if user.role == 'ADMIN':
+            return True
+        if user.role == 'INSTRUCTOR':
+            return lesson.course.instructor_id == user.id
+        if user.role == 'STUDENT':
+            return get_access(request).confirm_enrolled(lesson.course_id)
+        return False
+
+
+# -------------------------
+# Lesson Video Upload APIs
+# -------------------------
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+@query_budget(5)
+class LessonVideoUploadCreateView(generics.CreateAPIView):
+    serializer_class = LessonVideoUploadSerializer
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def perform_create(self, serializer):
+        lesson = serializer.validated_data['lesson']
+        if lesson.course.instructor != self.request.user:
+            raise PermissionDenied("You can only upload videos to your own lessons.")
+        serializer.save(uploaded_by=self.request.user)
+
+
+@query_budget(GET=2, PUT=3)
+class LessonVideoUploadView(APIView):
+    """
+    GET reports how many bytes have been received so a client can resume.
+    PUT appends one chunk; the raw request body is the chunk and
+    `Content-Range: bytes <start>-<end>/<total>` gives its offset.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get_upload(self, upload_id, lock=False):
+        uploads_qs = LessonVideoUpload.objects.filter(uploaded_by=self.request.user)
+        if lock:
+            uploads_qs = uploads_qs.select_for_update()
+        try:
+            return uploads_qs.get(id=upload_id)
+        except LessonVideoUpload.DoesNotExist:
+            return None
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            return Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(LessonVideoUploadSerializer(upload).data)
+
+    def put(self, request, upload_id):
+        match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+        if not match:
+            return Response(
+                {"detail": "Content-Range header of the form 'bytes start-end/total' is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end, total = (int(value) for value in match.groups())
+        length = end - start + 1
+        if length <= 0 or length != int(request.headers.get('Content-Length') or 0):
+            return Response({"detail": "Content-Range does not match the request body."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if length > settings.LESSON_VIDEO_MAX_CHUNK_SIZE:
+            return Response({"detail": "Chunk too large."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        with transaction.atomic():
+            upload = self.get_upload(upload_id, lock=True)
+            if upload is None:
+                return Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+            if upload.status != LessonVideoUpload.Status.PENDING or total != upload.total_size:
+                return Response({"detail": "Upload is not accepting this chunk."}, status=status.HTTP_409_CONFLICT)
+            try:
+                upload.received_bytes = uploads.write_chunk(upload, request.stream, start, length)
+            except uploads.UploadError as exc:
+                return Response({"detail": str(exc), "received_bytes": upload.received_bytes},
+                                status=status.HTTP_409_CONFLICT)
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+
+        return Response(LessonVideoUploadSerializer(upload).data)
+
+
+@query_budget(4)
+class LessonVideoUploadCompleteView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def post(self, request, upload_id):
+        with transaction.atomic():
+            try:
+                upload = LessonVideoUpload.objects.select_for_update().select_related('lesson').get(
+                    id=upload_id, uploaded_by=request.user
+                )
+            except LessonVideoUpload.DoesNotExist:
+                return Response({"detail": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+            if upload.status != LessonVideoUpload.Status.PENDING:
+                return Response({"detail": "Upload already completed."}, status=status.HTTP_409_CONFLICT)
+
+            sha256 = request.data.get('sha256') or upload.sha256
+            if not sha256:
+                return Response({"detail": "sha256 is required."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                name = uploads.finalize(upload, sha256)
+            except uploads.UploadError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Same result as LessonSerializer.create with an uploaded file.
+            lesson = upload.lesson
+            lesson.video_file.name = name
+            lesson.video_url = lesson.video_file.url
+            lesson.save(update_fields=['video_file', 'video_url', 'updated_at'])
+
+            upload.status = LessonVideoUpload.Status.COMPLETE
+            upload.save(update_fields=['status', 'updated_at'])
+        caching.bump_catalog_version()
+
+        serializer = LessonSerializer(lesson, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 # -------------------------
 # Lesson Progress APIs
 # -------------------------
+@query_budget(9)
 class LessonCompleteView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    permission_classes = [permissions.IsAuthenticated, IsStudent, IsEnrolledInCourse]
 
     def post(self, request, lesson_id):
         user = request.user
@@ -159,43 +640,159 @@ class LessonCompleteView(APIView):
         except Lesson.DoesNotExist:
             return Response({"detail": "Lesson not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check enrollment
-        if not Enrollment.objects.filter(student=user, course=lesson.course).exists():
-            return Response({"detail": "You are not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
-
-        # Get or create progress
-        progress, created = LessonProgress.objects.get_or_create(student=user, lesson=lesson)
+        self.check_object_permissions(request, lesson)
 
         is_completed = request.data.get('is_completed', True)
         # normalize to boolean
         if isinstance(is_completed, str):
             is_completed = is_completed.lower() in ['true', '1', 'yes', 'on']
 
-        progress.is_completed = bool(is_completed)
-        if progress.is_completed:
-            if not progress.completed_at:
-                progress.completed_at = timezone.now()
-        else:
-            progress.completed_at = None
-
-        progress.save()
+        with transaction.atomic():
+            # Lock the enrollment first, as CourseProgressSyncView does, so two
+            # concurrent completes can't both count the same lesson.
+            enrollment = Enrollment.objects.select_for_update().filter(
+                student=user, course_id=lesson.course_id
+            ).only('id', 'completed_lessons_bitmap').first()
+
+            # Get or create progress
+            progress, created = LessonProgress.objects.get_or_create(student=user, lesson=lesson)
+            was_completed = progress.is_completed
+
+            progress.is_completed = bool(is_completed)
+            if progress.is_completed:
+                if not progress.completed_at:
+                    progress.completed_at = timezone.now()
+            else:
+                progress.completed_at = None
+
+            progress.save()
+            CourseStats.increment(
+                lesson.course_id,
+                completed_progress_count=int(progress.is_completed) - int(was_completed)
+            )
+            if progress.is_completed != was_completed and enrollment is not None:
+                enrollment.completed_lessons_bitmap = bitmaps.apply_changes(
+                    enrollment.completed_lessons_bitmap, {lesson.order: progress.is_completed}
+                )
+                enrollment.save(update_fields=['completed_lessons_bitmap'])
 
         serializer = LessonProgressSerializer(progress)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CourseProgressView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsStudent]
-
-    def get(self, request, course_id):
+def get_progress_summary(user, course_id):
+    """
+    Progress of `user` through a course, computed with one aggregate over
+    lessons LEFT JOINed to that student's progress rows, plus a lookup of the
+    next incomplete lesson by its (course, order) key.
+    """
+    done = Q(own_progress__is_completed=True)
+    summary = Lesson.objects.filter(course_id=course_id).order_by().annotate(
+        own_progress=FilteredRelation('progress', condition=Q(progress__student=user)),
+    ).aggregate(
+        total_lessons=Count('id'),
+        completed_lessons=Count('id', filter=done),
+        total_duration_minutes=Coalesce(Sum('duration_minutes'), 0),
+        completed_duration_minutes=Coalesce(Sum('duration_minutes', filter=done), 0),
+        completed_lesson_ids=ArrayAgg('id', filter=done, ordering='order', default=[]),
+        next_lesson_order=Min('order', filter=~done),
+    )
+
+    next_order = summary.pop('next_lesson_order')
+    next_lesson = None
+    if next_order is not None:
+        next_lesson = Lesson.objects.filter(course_id=course_id, order=next_order).values(
+            'id', 'title', 'order', 'duration_minutes'
+        ).first()
+
+    total = summary['total_lessons']
+    return {
+        'course_id': course_id,
+        **summary,
+        'percent_complete': round(summary['completed_lessons'] / total * 100) if total else 0,
+        'next_lesson': next_lesson,
+    }
+
+
+@query_budget(9)
+class CourseProgressSyncView(APIView):
+    """
+    Apply a batch of offline progress updates in one request:
+    [{"lesson_id", "is_completed", "completed_at"}, ...]. Enrollment is
+    checked once and all rows are upserted together.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStudent, IsEnrolledInCourse]
+
+    def post(self, request, course_id):
         user = request.user
 
-        # Check enrollment
-        if not Enrollment.objects.filter(student=user, course_id=course_id).exists():
-            return Response({"detail": "You are not enrolled in this course."}, status=status.HTTP_403_FORBIDDEN)
-
-        lessons = Lesson.objects.filter(course_id=course_id)
-        progress_list = LessonProgress.objects.filter(student=user, lesson__in=lessons)
+        serializer = ProgressSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = {item['lesson_id']: item for item in serializer.validated_data}
+
+        lesson_orders = dict(
+            Lesson.objects.filter(course_id=course_id, id__in=entries).values_list('id', 'order')
+        )
+        lesson_ids = lesson_orders.keys()
+        unknown = entries.keys() - lesson_ids
+        if unknown:
+            raise ValidationError(f"Lessons {sorted(unknown)} do not belong to this course.")
+
+        with transaction.atomic():
+            # Lock the enrollment first so concurrent syncs from the same student
+            # are serialized: the completion delta below is computed from rows
+            # that cannot change (or appear) until this transaction commits.
+            enrollment = Enrollment.objects.select_for_update().filter(
+                student=user, course_id=course_id
+            ).only('id', 'completed_lessons_bitmap').first()
+            existing = {
+                progress.lesson_id: progress
+                for progress in LessonProgress.objects.filter(student=user, lesson_id__in=lesson_ids)
+            }
+
+            now = timezone.now()
+            rows = []
+            changes = {}
+            completed_delta = 0
+            for lesson_id, entry in entries.items():
+                previous = existing.get(lesson_id)
+                was_completed = bool(previous and previous.is_completed)
+                completed_at = None
+                if entry['is_completed']:
+                    # Keep the first completion time, as LessonCompleteView does.
+                    completed_at = (
+                        previous.completed_at if was_completed and previous.completed_at
+                        else entry.get('completed_at') or now
+                    )
+                completed_delta += int(entry['is_completed']) - int(was_completed)
+                if entry['is_completed'] != was_completed:
+                    changes[lesson_orders[lesson_id]] = entry['is_completed']
+                rows.append(LessonProgress(
+                    student=user,
+                    lesson_id=lesson_id,
+                    is_completed=entry['is_completed'],
+                    completed_at=completed_at,
+                ))
+
+            LessonProgress.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['student', 'lesson'],
+                update_fields=['is_completed', 'completed_at'],
+            )
+            CourseStats.increment(course_id, completed_progress_count=completed_delta)
+            if changes and enrollment is not None:
+                enrollment.completed_lessons_bitmap = bitmaps.apply_changes(
+                    enrollment.completed_lessons_bitmap, changes
+                )
+                enrollment.save(update_fields=['completed_lessons_bitmap'])
+
+        return Response(get_progress_summary(user, course_id), status=status.HTTP_200_OK)
+
+
+@query_budget(4)
+class CourseProgressView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsStudent, IsEnrolledInCourse]
 
-        serializer = LessonProgressSerializer(progress_list, many=True)
-        return Response(serializer.data)
+    def get(self, request, course_id):
+        return Response(get_progress_summary(request.user, course_id))
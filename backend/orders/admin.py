@@ -1,9 +1,16 @@
 from django.contrib import admin
-from .models import Order, Payment, CartItem
+from .models import Order, OrderItem, Payment, CartItem, WebhookEvent
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ['course', 'price']
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    inlines = [OrderItemInline]
     list_display = ['id', 'user', 'course', 'amount', 'status', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['user__username', 'course__title', 'razorpay_order_id']
@@ -22,3 +29,11 @@ class CartItemAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'course', 'created_at']
     search_fields = ['user__username', 'course__title']
     readonly_fields = ['created_at']
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_id', 'event', 'received_at', 'processed_at', 'attempts']
+    list_filter = ['event', 'processed_at']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'event', 'payload', 'received_at']
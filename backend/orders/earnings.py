@@ -0,0 +1,153 @@
+"""
+Instructor earnings, computed in the database.
+
+A sale is either a paid single-course Order or a line of a paid cart Order
+(OrderItem). Both are projected onto the same columns so totals and series
+are GROUP BY aggregates over each source merged in Python, and the sale
+list is one UNION ALL keyset-paginated on (sold_at, order_pk, course_pk).
+"""
+import base64
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+SALE_COLUMNS = ['order_pk', 'course_pk', 'course_title', 'buyer', 'amount_paid', 'sold_at']
+INTERVALS = {'day': TruncDay, 'month': TruncMonth}
+# Day series reach back this far unless `since` is given
+DAY_SERIES_SPAN = timedelta(days=30)
+
+
+class CursorError(ValueError):
+    pass
+
+
+def sale_sources(instructor):
+    """The two querysets of sales of `instructor`'s courses, with matching annotations."""
+    orders = Order.objects.filter(course__instructor=instructor, status='PAID').annotate(
+        order_pk=F('id'),
+        course_pk=F('course_id'),
+        course_title=F('course__title'),
+        buyer=F('user_id'),
+        amount_paid=F('amount'),
+        sold_at=F('created_at'),
+    )
+    lines = OrderItem.objects.filter(course__instructor=instructor, order__status='PAID').annotate(
+        order_pk=F('order_id'),
+        course_pk=F('course_id'),
+        course_title=F('course__title'),
+        buyer=F('order__user_id'),
+        amount_paid=F('price'),
+        sold_at=F('order__created_at'),
+    )
+    return orders, lines
+
+
+def summarize(instructor, interval='month', since=None):
+    """
+    Gross revenue, sale and order counts, per-course breakdown and a
+    revenue series per `interval` ('day' or 'month').
+    """
+    per_course = {}
+    series = defaultdict(lambda: {'revenue': Decimal('0'), 'sales': 0})
+    order_count = 0
+    if interval == 'day' and since is None:
+        since = timezone.now() - DAY_SERIES_SPAN
+
+    for source in sale_sources(instructor):
+        totals = source.order_by().values('course_pk', 'course_title').annotate(
+            revenue=Sum('amount_paid'),
+            sales=Count('*'),
+        )
+        for row in totals:
+            course = per_course.setdefault(row['course_pk'], {
+                'course_id': row['course_pk'],
+                'title': row['course_title'],
+                'revenue': Decimal('0'),
+                'sales': 0,
+            })
+            course['revenue'] += row['revenue']
+            course['sales'] += row['sales']
+
+        # Single-course and cart orders never overlap, so distinct counts add up.
+        order_count += source.order_by().aggregate(orders=Count('order_pk', distinct=True))['orders']
+
+        points = source.order_by()
+        if since is not None:
+            points = points.filter(sold_at__gte=since)
+        points = points.annotate(period=INTERVALS[interval]('sold_at')).values('period').annotate(
+            revenue=Sum('amount_paid'),
+            sales=Count('*'),
+        )
+        for row in points:
+            point = series[row['period']]
+            point['revenue'] += row['revenue']
+            point['sales'] += row['sales']
+
+    courses = sorted(per_course.values(), key=lambda course: course['revenue'], reverse=True)
+    return {
+        'gross_revenue': sum((course['revenue'] for course in courses), Decimal('0')),
+        'sales_count': sum(course['sales'] for course in courses),
+        'order_count': order_count,
+        'courses': courses,
+        'series': {
+            'interval': interval,
+            'points': [
+                {'period': period.date(), **values}
+                for period, values in sorted(series.items())
+            ],
+        },
+    }
+
+
+def encode_cursor(sale):
+    raw = f"{sale['sold_at'].isoformat()}|{sale['order_pk']}|{sale['course_pk']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        sold_at, order_pk, course_pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(sold_at), int(order_pk), int(course_pk)
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError("Invalid cursor.")
+
+
+def sales_page(instructor, page_size, cursor=None):
+    """
+    Up to `page_size` sales, newest first, after `cursor`. Returns the rows
+    and the cursor for the next page (None on the last page).
+    """
+    orders, lines = sale_sources(instructor)
+    if cursor:
+        sold_at, order_pk, course_pk = decode_cursor(cursor)
+        after = (
+            Q(sold_at__lt=sold_at)
+            | Q(sold_at=sold_at, order_pk__lt=order_pk)
+            | Q(sold_at=sold_at, order_pk=order_pk, course_pk__lt=course_pk)
+        )
+        orders, lines = orders.filter(after), lines.filter(after)
+
+    sales = list(
+        orders.values(*SALE_COLUMNS)
+        .union(lines.values(*SALE_COLUMNS), all=True)
+        .order_by('-sold_at', '-order_pk', '-course_pk')[:page_size + 1]
+    )
+    next_cursor = encode_cursor(sales[page_size - 1]) if len(sales) > page_size else None
+    return [
+        {
+            'id': sale['order_pk'],
+            'course': sale['course_pk'],
+            'course_title': sale['course_title'],
+            'user': sale['buyer'],
+            'amount': sale['amount_paid'],
+            'status': 'PAID',
+            'created_at': sale['sold_at'],
+        }
+        for sale in sales[:page_size]
+    ], next_cursor
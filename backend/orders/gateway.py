@@ -0,0 +1,231 @@
+"""
+Process-wide Razorpay client.
+
+Every call goes through one razorpay.Client whose requests session keeps a
+pool of keep-alive connections, applies connect/read timeouts, retries
+requests that are safe to repeat (with jittered exponential backoff), stops
+calling the gateway while a circuit breaker is open and records latency and
+error counts. Point RAZORPAY_BASE_URL at `manage.py run_stub_gateway` to
+exercise it locally.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+import razorpay
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 2.0
+
+
+class GatewayUnavailable(requests.exceptions.RequestException):
+    """Raised without contacting Razorpay while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. Once `reset_timeout`
+    seconds have passed a single trial request is let through: success
+    closes the circuit, failure keeps it open for another period.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()  # hold everyone else back until the trial finishes
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning("Razorpay circuit opened after %s consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+
+
+class GatewayMetrics:
+    """Request, error, retry and latency counters, plus a window of recent latencies."""
+
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.by_outcome = {}
+
+    def record(self, seconds, outcome):
+        with self.lock:
+            self.requests += 1
+            self.errors += outcome != 'ok'
+            self.by_outcome[outcome] = self.by_outcome.get(outcome, 0) + 1
+            self.latencies.append(seconds)
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_rejected(self):
+        with self.lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            outcomes = dict(self.by_outcome)
+            counts = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'rejected': self.rejected,
+            }
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000, 1)
+
+        return {
+            **counts,
+            'outcomes': outcomes,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)},
+        }
+
+
+class GatewaySession(requests.Session):
+    """requests.Session with pooling, timeouts, retries, circuit breaking and metrics."""
+
+    def __init__(self, timeout, max_retries, pool_size, breaker, metrics):
+        super().__init__()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self.metrics = metrics
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + self.max_retries
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            if not self.breaker.allow():
+                self.metrics.record_rejected()
+                raise GatewayUnavailable("Payment gateway is temporarily unavailable.")
+
+            started = time.monotonic()
+            try:
+                response = super().request(method, url, **kwargs)
+            except requests.exceptions.RequestException as exc:
+                self.metrics.record(time.monotonic() - started, type(exc).__name__)
+                self.breaker.record_failure()
+                # A connect timeout never reached Razorpay, so even a POST is safe to resend.
+                retriable = isinstance(exc, requests.exceptions.ConnectTimeout) or (
+                    idempotent and isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                )
+                if last or not retriable:
+                    raise
+            else:
+                elapsed = time.monotonic() - started
+                if response.status_code >= 500:
+                    self.metrics.record(elapsed, f'http_{response.status_code}')
+                    self.breaker.record_failure()
+                else:
+                    # 4xx responses are the caller's problem, not a sign the gateway is down.
+                    self.metrics.record(elapsed, 'ok' if response.ok else f'http_{response.status_code}')
+                    self.breaker.record_success()
+                if last or not (idempotent and response.status_code in RETRY_STATUSES):
+                    return response
+
+            self.metrics.record_retry()
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+
+metrics = GatewayMetrics()
+_breaker = None
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared razorpay.Client, built on first use."""
+    global _breaker, _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _breaker = CircuitBreaker(settings.RAZORPAY_BREAKER_THRESHOLD, settings.RAZORPAY_BREAKER_RESET)
+                session = GatewaySession(
+                    timeout=(settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT),
+                    max_retries=settings.RAZORPAY_MAX_RETRIES,
+                    pool_size=settings.RAZORPAY_POOL_SIZE,
+                    breaker=_breaker,
+                    metrics=metrics,
+                )
+                _client = razorpay.Client(
+                    session=session,
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    base_url=settings.RAZORPAY_BASE_URL,
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client so the next call picks up current settings."""
+    global _breaker, _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _breaker = _client = None
+
+
+def status():
+    return {
+        'circuit': _breaker.state if _breaker else 'closed',
+        **metrics.snapshot(),
+    }
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith('RAZORPAY_'):
+        reset_client()
@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    # Orders are never deleted: a payment.captured webhook can still arrive
+    # for an abandoned order, and webhooks.payment_captured fulfils it.
+    help = "Mark orders left in CREATED longer than --older-than minutes as EXPIRED."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=24 * 60,
+            help='Age in minutes after which a CREATED order counts as abandoned.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Orders updated per statement.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['older_than'])
+        stale = Order.objects.filter(status='CREATED', created_at__lt=cutoff)
+
+        processed = 0
+        last_id = 0
+        while True:
+            # Each batch is its own short autocommit statement, so row locks are
+            # held only briefly and concurrent payment verification isn't blocked.
+            ids = list(
+                stale.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            # Re-check the status: an order may have been paid since it was selected.
+            processed += Order.objects.filter(id__in=ids, status='CREATED').update(
+                status='EXPIRED', updated_at=timezone.now()
+            )
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f"Expired {processed} stale order(s)."))
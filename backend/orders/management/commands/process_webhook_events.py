@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply stored Razorpay webhook events: mark orders paid and enroll their buyers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Events claimed per transaction.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting once the inbox is empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when the inbox is empty (with --loop).',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        last_id = 0
+        while True:
+            handled, last_id = webhooks.process_pending(batch_size=options['batch_size'], after_id=last_id)
+            total += handled
+            if handled:
+                continue
+            if not options['loop']:
+                break
+            # Start over from the oldest event, so failed ones are retried once per poll.
+            last_id = 0
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} webhook event(s)."))
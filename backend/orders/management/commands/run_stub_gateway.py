@@ -0,0 +1,85 @@
+import json
+import random
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    """Answers the Razorpay order and payment endpoints the app calls."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real gateway
+    orders = {}
+
+    def do_POST(self):
+        # Read the body even when failing, or it corrupts the next request on the connection.
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not self.delay_or_fail():
+            return
+        if self.path.rstrip('/') != '/v1/orders':
+            return self.send_json(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'Not found'}})
+        order = {
+            'id': f'order_stub{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': body.get('amount'),
+            'currency': body.get('currency', 'INR'),
+            'receipt': body.get('receipt'),
+            'status': 'created',
+            'created_at': int(time.time()),
+        }
+        self.orders[order['id']] = order
+        self.send_json(200, order)
+
+    def do_GET(self):
+        if not self.delay_or_fail():
+            return
+        match = re.fullmatch(r'/v1/orders/([\w-]+)/?', self.path)
+        if match and match.group(1) in self.orders:
+            return self.send_json(200, self.orders[match.group(1)])
+        self.send_json(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'The id provided does not exist'}})
+
+    def delay_or_fail(self):
+        time.sleep(self.server.latency)
+        if random.random() < self.server.failure_rate:
+            self.send_json(503, {'error': {'code': 'SERVER_ERROR', 'description': 'Stub gateway failure'}})
+            return False
+        return True
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the Razorpay API (set RAZORPAY_BASE_URL to its address)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0, help='Seconds added to every response.')
+        parser.add_argument('--failure-rate', type=float, default=0, help='Fraction of requests answered with 503.')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), StubGatewayHandler)
+        server.latency = options['latency']
+        server.failure_rate = options['failure_rate']
+        server.verbose = options['verbosity'] > 1
+        self.stdout.write(f"Stub gateway listening on http://{options['host']}:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
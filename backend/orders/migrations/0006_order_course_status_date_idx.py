@@ -0,0 +1,20 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_enrollment_completion_bitmap'),
+        ('orders', '0005_webhook_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['course', 'status', 'created_at'], name='order_course_status_date_idx'),
+        ),
+    ]
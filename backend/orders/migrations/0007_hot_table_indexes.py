@@ -0,0 +1,39 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes on tables that are live in production
+    atomic = False
+
+    dependencies = [
+        ('courses', '0015_hot_table_indexes'),
+        ('orders', '0006_order_course_status_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'PAID')), fields=['course', '-created_at'], name='order_paid_course_idx'),
+        ),
+        # Covered by order_user_created_idx
+        migrations.AlterField(
+            model_name='order',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL),
+        ),
+        # Superseded by order_paid_course_idx, dropped once that exists
+        RemoveIndexConcurrently(
+            model_name='order',
+            name='order_course_status_date_idx',
+        ),
+    ]
@@ -30,26 +30,86 @@ class Order(models.Model):
         ('CREATED', 'Created'),
         ('PAID', 'Paid'),
         ('FAILED', 'Failed'),
+        ('EXPIRED', 'Expired'),
     ]
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='orders'
+        related_name='orders',
+        db_index=False  # order_user_created_idx leads with user
     )
+    # Null for cart checkouts, whose courses are listed in `items`.
     course = models.ForeignKey(
         Course,
         on_delete=models.CASCADE,
-        related_name='orders'
+        related_name='orders',
+        null=True,
+        blank=True
     )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='CREATED')
     razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
+    # Client-supplied Idempotency-Key header of the request that created the order
+    idempotency_key = models.CharField(max_length=64, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_order_idempotency_key'
+            )
+        ]
+        indexes = [
+            # Lets the stale-order reaper find abandoned orders without scanning paid ones
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='CREATED'),
+                name='order_pending_created_idx'
+            ),
+            # A user's order history, newest first
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # Instructor earnings and revenue rebuilds only ever read paid orders
+            models.Index(
+                fields=['course', '-created_at'],
+                condition=models.Q(status='PAID'),
+                name='order_paid_course_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order {self.id} - user={self.user_id}"
+
+    def get_course_lines(self):
+        """(course_id, amount) for every course this order pays for."""
+        if self.course_id:
+            return [(self.course_id, self.amount)]
+        return list(self.items.values_list('course_id', 'price'))
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='order_items'
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'course'], name='unique_order_course_item')
+        ]
+
     def __str__(self):
-        return f"Order {self.id} - {self.user.username} - {self.course.title}"
+        return f"OrderItem order={self.order_id} course={self.course_id}"
 
 
 class Payment(models.Model):
@@ -64,3 +124,29 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment {self.id} - Order {self.order.id}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Raw Razorpay webhook delivery, stored as soon as its signature checks
+    out and applied later by `manage.py process_webhook_events`.
+    """
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(processed_at__isnull=True),
+                name='webhook_event_pending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f"WebhookEvent {self.event_id} - {self.event}"
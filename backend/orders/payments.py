@@ -0,0 +1,55 @@
+"""
+Order fulfilment shared by browser verification (verify_payment) and
+Razorpay webhooks.
+"""
+from django.db import transaction
+
+from courses.access import bump_enrollment_version
+from courses.models import CourseStats, Enrollment
+from .models import CartItem, Order, Payment
+
+
+def fulfil_order(order, razorpay_payment_id, razorpay_signature=''):
+    """
+    Record the payment, mark the order PAID and enroll the buyer in every
+    course on it, then drop those courses from their cart, all in one
+    transaction. The order row is locked first, so concurrent calls for the
+    same order fulfil it once; later calls change nothing.
+    Returns (course ids on the order, whether this call fulfilled it).
+    """
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order.pk)
+        lines = order.get_course_lines()
+        course_ids = [course_id for course_id, _ in lines]
+        if order.status == 'PAID':
+            return course_ids, False
+
+        Payment.objects.create(
+            order=order,
+            razorpay_payment_id=razorpay_payment_id,
+            razorpay_signature=razorpay_signature
+        )
+
+        order.status = 'PAID'
+        order.save(update_fields=['status', 'updated_at'])
+
+        already_enrolled = set(
+            Enrollment.objects.filter(student_id=order.user_id, course_id__in=course_ids)
+            .values_list('course_id', flat=True)
+        )
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=order.user_id, course_id=course_id) for course_id in course_ids],
+            ignore_conflicts=True
+        )
+        for course_id, amount in lines:
+            CourseStats.increment(
+                course_id,
+                enrollment_count=int(course_id not in already_enrolled),
+                revenue=amount
+            )
+
+        CartItem.objects.filter(user_id=order.user_id, course_id__in=course_ids).delete()
+        # bulk_create sends no signals, so invalidate the buyer's access cache here
+        transaction.on_commit(lambda: bump_enrollment_version(order.user_id))
+
+    return course_ids, True
@@ -1,27 +1,83 @@
 from rest_framework import serializers
-from .models import Order, Payment, CartItem
-from courses.serializers import CourseSerializer
+from .models import Order, OrderItem, Payment, CartItem
+from courses.dynamic_fields import DynamicFieldsMixin
+from courses.serializers import CourseSummarySerializer
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    course_details = CourseSerializer(source='course', read_only=True)
+class OrderItemSerializer(serializers.ModelSerializer):
+    course_details = CourseSummarySerializer(source='course', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'course', 'course_details', 'price']
+
+
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    course_details = CourseSummarySerializer(source='course', read_only=True)
+    items = OrderItemSerializer(many=True, read_only=True)
     
     class Meta:
         model = Order
-        fields = ['id', 'user', 'course', 'course_details', 'amount', 'status', 
+        fields = ['id', 'user', 'course', 'course_details', 'items', 'amount', 'status', 
                   'razorpay_order_id', 'created_at', 'updated_at']
         read_only_fields = ['user', 'razorpay_order_id', 'created_at', 'updated_at']
 
+    def get_expandable_fields(self):
+        return {'payment': PaymentSerializer(read_only=True)}
+
+
+class SaleSerializer(serializers.Serializer):
+    """One sale row from orders.earnings: a single-course order or one cart line."""
+    id = serializers.IntegerField()
+    course = serializers.IntegerField()
+    course_title = serializers.CharField()
+    user = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    status = serializers.CharField()
+    created_at = serializers.DateTimeField()
+
+
+class CourseEarningsSerializer(serializers.Serializer):
+    course_id = serializers.IntegerField()
+    title = serializers.CharField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    sales = serializers.IntegerField()
+
+
+class EarningsPointSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    sales = serializers.IntegerField()
+
+
+class EarningsSeriesSerializer(serializers.Serializer):
+    interval = serializers.CharField()
+    points = EarningsPointSerializer(many=True)
+
+
+class SalePageSerializer(serializers.Serializer):
+    results = SaleSerializer(many=True)
+    next = serializers.URLField(allow_null=True)
+
+
+class EarningsSerializer(serializers.Serializer):
+    gross_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    order_count = serializers.IntegerField()
+    sales_count = serializers.IntegerField()
+    courses = CourseEarningsSerializer(many=True)
+    series = EarningsSeriesSerializer()
+    orders = SalePageSerializer()
+
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
-        fields = ['id', 'order', 'razorpay_payment_id', 'razorpay_signature', 'paid_at']
-        read_only_fields = ['paid_at']
+        fields = ['id', 'order', 'razorpay_payment_id', 'paid_at']
+        read_only_fields = fields
 
 
-class CartItemSerializer(serializers.ModelSerializer):
-    course_details = CourseSerializer(source='course', read_only=True)
+class CartItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    course_details = CourseSummarySerializer(source='course', read_only=True)
 
     class Meta:
         model = CartItem
@@ -1,6 +1,10 @@
 from django.http import JsonResponse
 from django.conf import settings
 
+from courses.budgets import query_budget
+
+
+@query_budget(0)
 def test_razorpay_config(request):
     """Test endpoint to check Razorpay configuration"""
     return JsonResponse({
@@ -1,3 +1,766 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import socket
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from http.server import ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from courses.models import Course, CourseStats, Enrollment
+from courses.testing import Call, QueryBudgetMixin, QueryPlanAssertions, seed_volume
+from . import earnings, webhooks
+from .gateway import CircuitBreaker, GatewayMetrics, GatewaySession, GatewayUnavailable
+from .management.commands.run_stub_gateway import StubGatewayHandler
+from .models import CartItem, Order, OrderItem, Payment, WebhookEvent
+
+SECRET = 'test_secret'
+WEBHOOK_SECRET = 'test_webhook_secret'
+WEBHOOK_BODY = json.dumps({
+    'event': 'payment.captured',
+    'payload': {'payment': {'entity': {'id': 'pay_budget', 'order_id': 'order_budget', 'amount': 49900}}},
+}).encode()
+
+
+def sign(razorpay_order_id, razorpay_payment_id):
+    return hmac.new(
+        SECRET.encode(),
+        f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def start_stub_gateway(failure_rate=0):
+    """Serve the stub Razorpay API on a free local port from a daemon thread."""
+    gateway = ThreadingHTTPServer(('127.0.0.1', 0), StubGatewayHandler)
+    gateway.latency, gateway.failure_rate, gateway.verbose = 0, failure_rate, False
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+    return gateway
+
+
+def hammer(user, payloads, threads):
+    """
+    POST every payload to verify_payment from `threads` threads at once,
+    each with its own client and database connection. Returns the response
+    status codes and the wall-clock time taken.
+    """
+    barrier = threading.Barrier(threads)
+    statuses = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            barrier.wait()
+            for payload in chunk:
+                response = client.post('/api/orders/verify/', payload, format='json')
+                with lock:
+                    statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    chunks = [payloads[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+@override_settings(RAZORPAY_KEY_SECRET=SECRET)
+class VerifyPaymentConcurrencyTests(TransactionTestCase):
+    """
+    verify_payment under contention. These run with real commits
+    (TransactionTestCase) so each thread's transaction and row locks are
+    genuinely concurrent.
+    """
+
+    def setUp(self):
+        self.instructor = User.objects.create_user('teacher@example.com', 'pw', full_name='Teacher', role='INSTRUCTOR')
+        self.student = User.objects.create_user('student@example.com', 'pw', full_name='Student', role='STUDENT')
+        self.courses = [
+            Course.objects.create(
+                title=f'Course {i}', description='About it', price=Decimal('499.00'),
+                instructor=self.instructor, is_approved=True
+            )
+            for i in range(3)
+        ]
+
+    def make_order(self, course, suffix):
+        return Order.objects.create(
+            user=self.student, course=course, amount=course.price,
+            razorpay_order_id=f'order_{suffix}'
+        )
+
+    def payload(self, order, payment_id='pay_1'):
+        return {
+            'order_id': order.id,
+            'razorpay_order_id': order.razorpay_order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': sign(order.razorpay_order_id, payment_id),
+        }
+
+    def test_concurrent_verifications_fulfil_once(self):
+        course = self.courses[0]
+        order = self.make_order(course, 'single')
+        CartItem.objects.create(user=self.student, course=course)
+
+        statuses, _ = hammer(self.student, [self.payload(order)] * 16, threads=16)
+
+        self.assertEqual(statuses, [200] * 16)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'PAID')
+        self.assertEqual(Payment.objects.filter(order=order).count(), 1)
+        self.assertEqual(Enrollment.objects.filter(student=self.student, course=course).count(), 1)
+        self.assertFalse(CartItem.objects.filter(user=self.student).exists())
+        stats = CourseStats.objects.get(course=course)
+        self.assertEqual(stats.enrollment_count, 1)
+        self.assertEqual(stats.revenue, course.price)
+
+    def test_concurrent_cart_order_verifications(self):
+        order = Order.objects.create(
+            user=self.student, amount=Decimal('1497.00'), razorpay_order_id='order_cart'
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, course=course, price=course.price) for course in self.courses
+        ])
+
+        statuses, _ = hammer(self.student, [self.payload(order)] * 8, threads=8)
+
+        self.assertEqual(statuses, [200] * 8)
+        self.assertEqual(Payment.objects.filter(order=order).count(), 1)
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 3)
+
+    def test_replay_returns_existing_result(self):
+        order = self.make_order(self.courses[0], 'replay')
+        client = APIClient()
+        client.force_authenticate(self.student)
+
+        first = client.post('/api/orders/verify/', self.payload(order), format='json')
+        second = client.post('/api/orders/verify/', self.payload(order), format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Payment.objects.filter(order=order).count(), 1)
+
+    def test_different_payment_for_paid_order_conflicts(self):
+        order = self.make_order(self.courses[0], 'conflict')
+        client = APIClient()
+        client.force_authenticate(self.student)
+        client.post('/api/orders/verify/', self.payload(order, 'pay_1'), format='json')
+
+        response = client.post('/api/orders/verify/', self.payload(order, 'pay_2'), format='json')
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_bad_signature_does_not_downgrade_paid_order(self):
+        order = self.make_order(self.courses[0], 'tamper')
+        client = APIClient()
+        client.force_authenticate(self.student)
+        client.post('/api/orders/verify/', self.payload(order), format='json')
+
+        response = client.post(
+            '/api/orders/verify/', {**self.payload(order), 'razorpay_signature': 'forged'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'PAID')
+
+    def test_throughput_under_contention(self):
+        # Every order is verified by several racing requests (browser plus retries).
+        orders = [self.make_order(self.courses[i % 3], f'load{i}') for i in range(30)]
+        payloads = [self.payload(order) for order in orders for _ in range(4)]
+
+        statuses, _ = hammer(self.student, payloads, threads=12)
+
+        self.assertEqual(statuses, [200] * len(payloads))
+        self.assertEqual(Payment.objects.count(), len(orders))
+        self.assertEqual(Order.objects.filter(status='PAID').count(), len(orders))
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 3)
+
+
+@mock.patch('orders.gateway.random.uniform', return_value=0)  # no backoff delay
+class GatewaySessionTests(SimpleTestCase):
+    def setUp(self):
+        self.gateway = start_stub_gateway()
+        self.addCleanup(self.gateway.server_close)
+        self.addCleanup(self.gateway.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.gateway.server_port}'
+
+    def session(self, max_retries=2, threshold=10, reset_timeout=60):
+        session = GatewaySession(
+            timeout=(1, 1), max_retries=max_retries, pool_size=2,
+            breaker=CircuitBreaker(threshold, reset_timeout), metrics=GatewayMetrics(),
+        )
+        self.addCleanup(session.close)
+        return session
+
+    def closed_port_url(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return f'http://127.0.0.1:{sock.getsockname()[1]}/v1/orders'
+
+    def test_retries_only_idempotent_requests(self, _):
+        self.gateway.failure_rate = 1
+        session = self.session(max_retries=2)
+        self.assertEqual(session.get(f'{self.base_url}/v1/orders/x').status_code, 503)
+        self.assertEqual((session.metrics.requests, session.metrics.retries), (3, 2))
+
+        session = self.session(max_retries=2)
+        self.assertEqual(session.post(f'{self.base_url}/v1/orders', json={}).status_code, 503)
+        self.assertEqual((session.metrics.requests, session.metrics.retries), (1, 0))
+
+    def test_connection_errors(self, _):
+        url = self.closed_port_url()
+        session = self.session(max_retries=2)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(url)
+        self.assertEqual(session.metrics.retries, 2)
+
+        # The POST may have reached the gateway, so it is not resent
+        session = self.session(max_retries=2)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.post(url, json={})
+        self.assertEqual((session.metrics.requests, session.metrics.retries), (1, 0))
+
+    def test_breaker_opens_and_half_opens(self, _):
+        self.gateway.failure_rate = 1
+        session = self.session(max_retries=0, threshold=2)
+        breaker = session.breaker
+        with self.assertLogs('orders.gateway', 'WARNING'):
+            for _ in range(2):
+                session.post(f'{self.base_url}/v1/orders', json={})
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(GatewayUnavailable):
+            session.post(f'{self.base_url}/v1/orders', json={})
+        self.assertEqual((session.metrics.requests, session.metrics.rejected), (2, 1))
+
+        # After the reset timeout one trial goes through; others wait for it
+        breaker.opened_at -= breaker.reset_timeout
+        self.assertEqual(breaker.state, 'half-open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        # A failed trial keeps the circuit open ...
+        breaker.opened_at -= breaker.reset_timeout
+        self.assertEqual(session.post(f'{self.base_url}/v1/orders', json={}).status_code, 503)
+        self.assertEqual(breaker.state, 'open')
+
+        # ... and a successful one closes it
+        self.gateway.failure_rate = 0
+        breaker.opened_at -= breaker.reset_timeout
+        self.assertEqual(session.post(f'{self.base_url}/v1/orders', json={}).status_code, 200)
+        self.assertEqual((breaker.state, breaker.failures), ('closed', 0))
+
+    def test_client_errors_do_not_trip_breaker(self, _):
+        session = self.session(max_retries=2, threshold=1)
+        self.assertEqual(session.get(f'{self.base_url}/v1/orders/missing').status_code, 404)
+        self.assertEqual(session.breaker.state, 'closed')
+        self.assertEqual(session.metrics.retries, 0)
+
+    def test_metrics_snapshot(self, _):
+        session = self.session(max_retries=1)
+        session.post(f'{self.base_url}/v1/orders', json={'amount': 100})
+        self.gateway.failure_rate = 1
+        session.get(f'{self.base_url}/v1/orders/x')
+
+        snapshot = session.metrics.snapshot()
+        self.assertEqual(
+            {key: snapshot[key] for key in ('requests', 'errors', 'retries', 'rejected', 'outcomes')},
+            {'requests': 3, 'errors': 2, 'retries': 1, 'rejected': 0, 'outcomes': {'ok': 1, 'http_503': 2}},
+        )
+        self.assertIsNotNone(snapshot['latency_ms']['p99'])
+
+
+@override_settings(RAZORPAY_KEY_ID='rzp_test_key', RAZORPAY_KEY_SECRET=SECRET)
+class CreateOrderIdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        cls.course = Course.objects.create(
+            title='Paid course', description='', price=Decimal('499'), instructor=instructor, is_approved=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def create(self):
+        return self.client.post('/api/orders/create/', {'course_id': self.course.id}, format='json',
+                                HTTP_IDEMPOTENCY_KEY='key-1')
+
+    def test_key_race_with_failed_winner_asks_to_retry(self):
+        # The competing request inserted the key, then deleted its order when the gateway failed
+        with mock.patch.object(Order.objects, 'create', side_effect=IntegrityError):
+            response = self.create()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('retry', response.data['error'])
+
+
+class CheckoutIdempotencyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        gateway = start_stub_gateway()
+        cls.addClassCleanup(gateway.server_close)
+        cls.addClassCleanup(gateway.shutdown)
+        cls.enterClassContext(override_settings(
+            RAZORPAY_BASE_URL=f'http://127.0.0.1:{gateway.server_port}',
+            RAZORPAY_KEY_ID='rzp_test_checkout',
+            RAZORPAY_KEY_SECRET=SECRET,
+        ))
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        cls.courses = [
+            Course.objects.create(
+                title=f'Course {n}', description='', price=Decimal('499'), instructor=instructor, is_approved=True
+            )
+            for n in range(3)
+        ]
+        for course in cls.courses[:2]:
+            CartItem.objects.create(user=cls.student, course=course)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def checkout(self, key='key-1'):
+        return self.client.post('/api/orders/checkout/', format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_returns_the_same_order(self):
+        first = self.checkout()
+        self.assertEqual(first.status_code, 201)
+        retry = self.checkout()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Order.objects.filter(user=self.student).count(), 1)
+
+        self.assertEqual(self.checkout('key-2').status_code, 201)
+        self.assertEqual(Order.objects.filter(user=self.student).count(), 2)
+
+    def test_key_reused_for_another_cart(self):
+        self.assertEqual(self.checkout().status_code, 201)
+        CartItem.objects.create(user=self.student, course=self.courses[2])
+        self.assertEqual(self.checkout().status_code, 422)
+
+    def test_key_of_a_paid_order(self):
+        self.checkout()
+        Order.objects.filter(user=self.student).update(status='PAID')
+        response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('already paid', response.data['error'])
+
+    def test_key_race_with_failed_winner_asks_to_retry(self):
+        with mock.patch.object(Order.objects, 'create', side_effect=IntegrityError):
+            response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('retry', response.data['error'])
+
+    def test_key_length_is_capped(self):
+        self.assertEqual(self.checkout('k' * 65).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderExpandTests(TestCase):
+    def test_expanded_payment_omits_signature(self):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        course = Course.objects.create(
+            title='Paid course', description='', price=Decimal('499'), instructor=instructor, is_approved=True
+        )
+        order = Order.objects.create(user=student, course=course, amount=course.price, status='PAID')
+        Payment.objects.create(order=order, razorpay_payment_id='pay_1', razorpay_signature='sig')
+        client = APIClient()
+        client.force_authenticate(student)
+
+        response = client.get('/api/orders/user-orders/?fields=status&expand=payment')
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data
+        self.assertEqual(set(row), {'id', 'status', 'payment'})
+        self.assertEqual(row['payment']['razorpay_payment_id'], 'pay_1')
+        self.assertNotIn('razorpay_signature', row['payment'])
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class RazorpayWebhookTests(TestCase):
+    url = '/api/orders/webhook/razorpay/'
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        cls.student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        cls.course = Course.objects.create(
+            title='Paid course', description='', price=Decimal('499'), instructor=instructor, is_approved=True
+        )
+        cls.order = Order.objects.create(
+            user=cls.student, course=cls.course, amount=cls.course.price,
+            status='CREATED', razorpay_order_id='order_hook'
+        )
+
+    def deliver(self, payload, event_id=None, signature=None):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        headers = {'HTTP_X_RAZORPAY_SIGNATURE': signature or webhooks.signature(body)}
+        if event_id:
+            headers['HTTP_X_RAZORPAY_EVENT_ID'] = event_id
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def captured(self, order_id='order_hook', amount=49900):
+        return {
+            'event': 'payment.captured',
+            'payload': {'payment': {'entity': {'id': 'pay_hook', 'order_id': order_id, 'amount': amount}}},
+        }
+
+    def test_bad_signature_is_rejected(self):
+        for signature in ('0' * 64, webhooks.signature(b'another body')):
+            with self.subTest(signature=signature):
+                self.assertEqual(self.deliver(self.captured(), signature=signature).status_code, 400)
+        response = self.client.post(self.url, json.dumps(self.captured()), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_body_must_be_a_json_object(self):
+        for body in (b'[1, 2]', b'"payment.captured"', b'not json'):
+            with self.subTest(body=body):
+                self.assertEqual(self.deliver(body).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_redelivery_is_recorded_once(self):
+        for _ in range(2):
+            self.assertEqual(self.deliver(self.captured(), event_id='evt_1').status_code, 200)
+        self.assertEqual(WebhookEvent.objects.filter(event_id='evt_1').count(), 1)
+
+        # Without an event id the body hash is the key
+        for _ in range(2):
+            self.deliver(self.captured(amount=1))
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+
+    def test_process_pending_fulfils_order(self):
+        self.deliver(self.captured(), event_id='evt_paid')
+        self.assertEqual(webhooks.process_pending()[0], 1)
+
+        event = WebhookEvent.objects.get(event_id='evt_paid')
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual((event.attempts, event.last_error), (1, ''))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'PAID')
+        self.assertTrue(Enrollment.objects.filter(student=self.student, course=self.course).exists())
+        # Processed events are not picked up again
+        self.assertEqual(webhooks.process_pending(), (0, 0))
+
+    def test_failing_event_is_retried_until_max_attempts(self):
+        self.deliver(self.captured(order_id='order_unknown'), event_id='evt_unknown')
+        with self.assertLogs('orders.webhooks', 'WARNING'):
+            for _ in range(webhooks.MAX_ATTEMPTS):
+                self.assertEqual(webhooks.process_pending()[0], 1)
+
+        event = WebhookEvent.objects.get(event_id='evt_unknown')
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, webhooks.MAX_ATTEMPTS)
+        self.assertIn('order_unknown', event.last_error)
+        self.assertEqual(webhooks.process_pending(), (0, 0))
+
+
+    def test_late_capture_fulfils_expired_order(self):
+        Order.objects.filter(pk=self.order.pk).update(created_at=timezone.now() - timedelta(days=2))
+        call_command('expire_stale_orders', stdout=StringIO())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'EXPIRED')
+
+        self.deliver(self.captured(), event_id='evt_late')
+        self.assertEqual(webhooks.process_pending()[0], 1)
+        self.assertEqual(WebhookEvent.objects.get(event_id='evt_late').last_error, '')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'PAID')
+
+
+class ExpireStaleOrdersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        student = User.objects.create_user(
+            email='student@example.com', password='pass', full_name='Student', role='STUDENT'
+        )
+        course = Course.objects.create(
+            title='Paid course', description='', price=Decimal('499'), instructor=instructor, is_approved=True
+        )
+        old = timezone.now() - timedelta(days=2)
+        statuses = ['CREATED'] * 5 + ['PAID', 'FAILED']
+        orders = Order.objects.bulk_create([
+            Order(user=student, course=course, amount=course.price, status=status) for status in statuses
+        ])
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(created_at=old)
+        cls.stale = [order.pk for order in orders[:5]]
+        cls.fresh = Order.objects.create(user=student, course=course, amount=course.price)
+
+    def expire(self, *args):
+        out = StringIO()
+        call_command('expire_stale_orders', *args, stdout=out)
+        return out.getvalue()
+
+    def statuses(self):
+        return dict(Order.objects.values_list('pk', 'status'))
+
+    def test_expires_only_old_created_orders(self):
+        self.assertIn('Expired 5 stale order(s).', self.expire())
+        statuses = self.statuses()
+        self.assertEqual({statuses[pk] for pk in self.stale}, {'EXPIRED'})
+        self.assertEqual(statuses[self.fresh.pk], 'CREATED')
+        self.assertEqual(sorted(statuses.values()).count('PAID'), 1)
+        self.assertEqual(sorted(statuses.values()).count('FAILED'), 1)
+        self.assertEqual(Order.objects.count(), 8)
+
+        self.assertIn('Expired 0 stale order(s).', self.expire())
+        self.assertIn('Expired 1 stale order(s).', self.expire('--older-than', '0'))
+
+    def test_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.expire('--batch-size', '2')
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual({self.statuses()[pk] for pk in self.stale}, {'EXPIRED'})
+
+    def test_order_paid_after_selection_is_left_alone(self):
+        paid = self.stale[1]
+        filter_orders = Order.objects.filter
+
+        def pay_before_update(*args, **kwargs):
+            if 'id__in' in kwargs:
+                # The buyer's payment is verified between the select and the update
+                filter_orders(pk=paid).update(status='PAID')
+            return filter_orders(*args, **kwargs)
+
+        with mock.patch.object(Order.objects, 'filter', side_effect=pay_before_update):
+            self.assertIn('Expired 4 stale order(s).', self.expire())
+        self.assertEqual(self.statuses()[paid], 'PAID')
+
+
+class InstructorEarningsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            email='instructor@example.com', password='pass', full_name='Instructor', role='INSTRUCTOR'
+        )
+        other = User.objects.create_user(
+            email='other@example.com', password='pass', full_name='Other', role='INSTRUCTOR'
+        )
+        buyers = [
+            User.objects.create_user(
+                email=f'student{n}@example.com', password='pass', full_name=f'Student {n}', role='STUDENT'
+            )
+            for n in range(2)
+        ]
+        cls.intro = Course.objects.create(title='Intro', description='', price=Decimal('100'), instructor=cls.instructor)
+        cls.advanced = Course.objects.create(
+            title='Advanced', description='', price=Decimal('200'), instructor=cls.instructor
+        )
+        elsewhere = Course.objects.create(title='Elsewhere', description='', price=Decimal('50'), instructor=other)
+
+        def order(user, status, created_at, course=None, amount=None, items=()):
+            order = Order.objects.create(
+                user=user, course=course, status=status, amount=amount or sum(price for _, price in items)
+            )
+            OrderItem.objects.bulk_create([OrderItem(order=order, course=c, price=price) for c, price in items])
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+            return order
+
+        january = datetime(2026, 1, 10, 12, tzinfo=dt_timezone.utc)
+        february = datetime(2026, 2, 5, 12, tzinfo=dt_timezone.utc)
+        cls.single = order(buyers[0], 'PAID', january, course=cls.intro, amount=Decimal('100'))
+        cls.other_single = order(buyers[1], 'PAID', february, course=cls.advanced, amount=Decimal('200'))
+        # A discounted cart sold at the same instant, including another instructor's course
+        cls.cart = order(buyers[0], 'PAID', february, items=[
+            (cls.intro, Decimal('90')), (cls.advanced, Decimal('180')), (elsewhere, Decimal('50')),
+        ])
+        # Unpaid orders never count
+        order(buyers[1], 'CREATED', february, course=cls.intro, amount=Decimal('100'))
+        order(buyers[1], 'FAILED', february, items=[(cls.advanced, Decimal('200'))])
+
+    def test_summary(self):
+        summary = earnings.summarize(self.instructor)
+        self.assertEqual(summary['gross_revenue'], Decimal('570'))
+        self.assertEqual((summary['sales_count'], summary['order_count']), (4, 3))
+        self.assertEqual(summary['courses'], [
+            {'course_id': self.advanced.id, 'title': 'Advanced', 'revenue': Decimal('380'), 'sales': 2},
+            {'course_id': self.intro.id, 'title': 'Intro', 'revenue': Decimal('190'), 'sales': 2},
+        ])
+        self.assertEqual(summary['series'], {'interval': 'month', 'points': [
+            {'period': date(2026, 1, 1), 'revenue': Decimal('100'), 'sales': 1},
+            {'period': date(2026, 2, 1), 'revenue': Decimal('470'), 'sales': 3},
+        ]})
+
+    def test_day_series(self):
+        since = datetime(2026, 2, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(earnings.summarize(self.instructor, 'day', since)['series']['points'], [
+            {'period': date(2026, 2, 5), 'revenue': Decimal('470'), 'sales': 3},
+        ])
+        # Without `since` a day series covers the last DAY_SERIES_SPAN only
+        with mock.patch.object(earnings.timezone, 'now', return_value=since + timedelta(days=10)):
+            points = earnings.summarize(self.instructor, 'day')['series']['points']
+        self.assertEqual([point['period'] for point in points], [date(2026, 2, 5)])
+
+    def test_sales_pages(self):
+        expected = [
+            (self.cart.id, self.advanced.id, Decimal('180')),
+            (self.cart.id, self.intro.id, Decimal('90')),
+            (self.other_single.id, self.advanced.id, Decimal('200')),
+            (self.single.id, self.intro.id, Decimal('100')),
+        ]
+        for page_size in (1, 3, 4, 10):
+            with self.subTest(page_size=page_size):
+                seen, cursor = [], None
+                while True:
+                    sales, cursor = earnings.sales_page(self.instructor, page_size, cursor)
+                    self.assertLessEqual(len(sales), page_size)
+                    seen += [(sale['id'], sale['course'], sale['amount']) for sale in sales]
+                    if cursor is None:
+                        break
+                self.assertEqual(seen, expected)
+
+        with self.assertRaises(earnings.CursorError):
+            earnings.sales_page(self.instructor, 2, 'not-a-cursor')
+
+    def test_endpoint_follows_next(self):
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        response = client.get('/api/orders/instructor-earnings/?page_size=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['gross_revenue']), Decimal('570'))
+        self.assertEqual(len(response.data['orders']['results']), 3)
+        last = client.get(response.data['orders']['next']).data['orders']
+        self.assertEqual([sale['id'] for sale in last['results']], [self.single.id])
+        self.assertIsNone(last['next'])
+
+        self.assertEqual(client.get('/api/orders/instructor-earnings/?cursor=bad').status_code, 400)
+        self.assertEqual(client.get('/api/orders/instructor-earnings/?interval=week').status_code, 400)
+
+
+class OrderQueryPlanTests(QueryPlanAssertions, TestCase):
+    """Order history and earnings read orders through their indexes, checked with EXPLAIN."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_volume(courses=300, students=300, instructors=20, orders_per_student=8)
+
+    def capture(self, url, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self.data['tokens'][user.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return ctx.captured_queries
+
+    def test_user_orders(self):
+        queries = self.capture('/api/orders/user-orders/', self.data['students'][0])
+        self.assertUsesIndex(self.main_query(queries, 'orders_order'), 'orders_order', 'order_user_created_idx')
+
+    def test_instructor_earnings(self):
+        queries = self.capture('/api/orders/instructor-earnings/', self.data['instructors'][0])
+        self.assertUsesIndex(self.main_query(queries, 'orders_order'), 'orders_order', 'order_paid_course_idx')
+        # The per-course and per-period aggregates too
+        totals = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'SUM("orders_order"."amount")' in query['sql']
+        ]
+        self.assertEqual(len(totals), 2)
+        for sql in totals:
+            self.assertUsesIndex(sql, 'orders_order', 'order_paid_course_idx')
+
+
+def pending_order(ctx):
+    order = Order.objects.create(
+        user=ctx['student'], course=ctx['buy'], amount=ctx['buy'].price,
+        status='CREATED', razorpay_order_id='order_budget'
+    )
+    return {'order': order}
+
+
+class OrderQueryBudgetTests(QueryBudgetMixin, TestCase):
+    urlconf = 'orders.urls'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Orders are created against the stub gateway, on a free port
+        gateway = start_stub_gateway()
+        cls.addClassCleanup(gateway.server_close)
+        cls.addClassCleanup(gateway.shutdown)
+        cls.enterClassContext(override_settings(
+            RAZORPAY_BASE_URL=f'http://127.0.0.1:{gateway.server_port}',
+            RAZORPAY_KEY_ID='rzp_test_budget',
+            RAZORPAY_KEY_SECRET=SECRET,
+            RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET,
+        ))
+
+    def prepare(self, data):
+        student = data['students'][0]
+        buy, cart = data['courses'][2], data['courses'][4]
+        Course.objects.filter(pk__in=[buy.pk, cart.pk]).update(price=Decimal('499'), is_approved=True)
+        Enrollment.objects.filter(student=student, course__in=[buy, cart]).delete()
+        CartItem.objects.filter(user=student).delete()
+        CartItem.objects.create(user=student, course=cart)
+        buy.refresh_from_db()
+        return {'student': student, 'owner': data['instructors'][1], 'buy': buy, 'cart': cart}
+
+    scenarios = {
+        'create_order': [Call('post', '/api/orders/create/', 'student', status=201,
+                              data=lambda ctx: {'course_id': ctx['buy'].id})],
+        'checkout': [Call('post', '/api/orders/checkout/', 'student', status=201)],
+        'verify_payment': [Call('post', '/api/orders/verify/', 'student', setup=pending_order, data=lambda ctx: {
+            'order_id': ctx['order'].id,
+            'razorpay_order_id': 'order_budget',
+            'razorpay_payment_id': 'pay_budget',
+            'razorpay_signature': sign('order_budget', 'pay_budget'),
+        })],
+        'razorpay_webhook': [Call(
+            'post', '/api/orders/webhook/razorpay/', data=WEBHOOK_BODY, content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=hmac.new(WEBHOOK_SECRET.encode(), WEBHOOK_BODY, hashlib.sha256).hexdigest(),
+        )],
+        'user_orders': [Call('get', '/api/orders/user-orders/', 'student')],
+        'instructor_earnings': [Call('get', '/api/orders/instructor-earnings/', 'owner')],
+        'cart_items': [
+            Call('get', '/api/orders/cart/', 'student'),
+            Call('post', '/api/orders/cart/', 'student', status=201, data=lambda ctx: {'course_id': ctx['buy'].id}),
+        ],
+        'remove_cart_item': [Call('delete', lambda ctx: f"/api/orders/cart/{ctx['cart'].id}/", 'student')],
+        'gateway_status': [Call('get', '/api/orders/gateway-status/', 'admin')],
+        'test_razorpay_config': [Call('get', '/api/orders/test-config/')],
+    }
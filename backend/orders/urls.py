@@ -4,10 +4,13 @@ from .test_views import test_razorpay_config
 
 urlpatterns = [
     path('create/', views.create_order, name='create_order'),
+    path('checkout/', views.checkout, name='checkout'),
     path('verify/', views.verify_payment, name='verify_payment'),
+    path('webhook/razorpay/', views.razorpay_webhook, name='razorpay_webhook'),
     path('user-orders/', views.get_user_orders, name='user_orders'),
     path('instructor-earnings/', views.get_instructor_earnings, name='instructor_earnings'),
     path('cart/', views.cart_items, name='cart_items'),
     path('cart/<int:course_id>/', views.remove_cart_item, name='remove_cart_item'),
+    path('gateway-status/', views.gateway_status, name='gateway_status'),
     path('test-config/', test_razorpay_config, name='test_razorpay_config'),
 ]
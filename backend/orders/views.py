@@ -1,30 +1,66 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django.conf import settings
-import razorpay
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime
 import hmac
 import hashlib
 
-from .models import Order, Payment, CartItem
-from .serializers import OrderSerializer, PaymentSerializer, CartItemSerializer
+from . import earnings, gateway, webhooks
+from .models import Order, OrderItem, Payment, CartItem
+from .payments import fulfil_order
+from .serializers import (
+    OrderSerializer, PaymentSerializer, CartItemSerializer,
+    EarningsSerializer,
+)
+from courses.access import get_access
+from courses.budgets import query_budget
 from courses.models import Course, Enrollment
-from accounts.permissions import IsStudent
+from courses.serializers import CourseSummarySerializer
+from accounts.permissions import IsAdmin, IsStudent
 
 
 def get_razorpay_client():
-    """Get or create Razorpay client instance"""
-    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+    """Shared Razorpay client (pooled, with timeouts and a circuit breaker)"""
+    return gateway.get_client()
 
 
+def razorpay_configured():
+    return bool(settings.RAZORPAY_KEY_ID) and settings.RAZORPAY_KEY_ID != 'rzp_test_your_key_id'
+
+
+def create_razorpay_order(order):
+    """Create the Razorpay order for `order` and store its id."""
+    razorpay_order = get_razorpay_client().order.create({
+        'amount': int(float(order.amount) * 100),  # Amount in paise
+        'currency': 'INR',
+        'receipt': f'order_{order.id}',
+        'payment_capture': 1
+    })
+    order.razorpay_order_id = razorpay_order['id']
+    order.save(update_fields=['razorpay_order_id', 'updated_at'])
+    return razorpay_order
+
+
+@query_budget(GET=2, POST=6)
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated, IsStudent])
 def cart_items(request):
     """List or add cart items for the authenticated student"""
     if request.method == 'GET':
-        items = CartItem.objects.filter(user=request.user).select_related('course', 'course__instructor')
-        serializer = CartItemSerializer(items, many=True)
+        items = CartItem.objects.filter(user=request.user)
+        columns = CartItemSerializer.only_fields(request)
+        if 'course_details' in CartItemSerializer.requested_fields(request):
+            items = items.select_related('course__instructor')
+            columns += CourseSummarySerializer.load_only('course')
+        items = items.only(*columns)
+        serializer = CartItemSerializer(items, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     course_id = request.data.get('course_id')
@@ -36,7 +72,7 @@ def cart_items(request):
     except Course.DoesNotExist:
         return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    if Enrollment.objects.filter(student=request.user, course=course).exists():
+    if get_access(request).is_enrolled(course.id):
         return Response({'error': 'Already enrolled in this course'}, status=status.HTTP_400_BAD_REQUEST)
 
     item, created = CartItem.objects.get_or_create(user=request.user, course=course)
@@ -44,6 +80,7 @@ def cart_items(request):
     return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
+@query_budget(3)
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated, IsStudent])
 def remove_cart_item(request, course_id):
@@ -57,13 +94,80 @@ def remove_cart_item(request, course_id):
     return Response({'message': 'Removed from cart'}, status=status.HTTP_200_OK)
 
 
+def order_payload(order, course):
+    return {
+        'order_id': order.id,
+        'razorpay_order_id': order.razorpay_order_id,
+        'amount': float(order.amount),
+        'currency': 'INR',
+        'razorpay_key': settings.RAZORPAY_KEY_ID,
+        'course': {
+            'id': course.id,
+            'title': course.title,
+            'price': float(course.price)
+        }
+    }
+
+
+def checkout_payload(order, lines):
+    return {
+        'order_id': order.id,
+        'razorpay_order_id': order.razorpay_order_id,
+        'amount': float(order.amount),
+        'currency': 'INR',
+        'razorpay_key': settings.RAZORPAY_KEY_ID,
+        'courses': [
+            {'id': line['course_id'], 'title': line['course__title'], 'price': float(line['course__price'])}
+            for line in lines
+        ]
+    }
+
+
+def replay_conflict(order):
+    """The error response when an order found by Idempotency-Key can't be returned again, else None"""
+    if order.status != 'CREATED':
+        return Response({'error': f'Order {order.id} is already {order.status.lower()}'},
+                       status=status.HTTP_409_CONFLICT)
+    if not order.razorpay_order_id:
+        return Response({'error': 'Order is still being created. Please retry shortly.'},
+                       status=status.HTTP_409_CONFLICT)
+    return None
+
+
+def replay_order(order, course):
+    """Response for a create_order retry that reuses an Idempotency-Key"""
+    if order.course_id != course.id:
+        return Response({'error': 'Idempotency-Key was already used for a different course'},
+                       status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return replay_conflict(order) or Response(order_payload(order, course), status=status.HTTP_200_OK)
+
+
+def replay_checkout(order, lines):
+    """Response for a checkout retry that reuses an Idempotency-Key"""
+    items = [
+        {'course_id': course_id, 'course__title': title, 'course__price': price}
+        for course_id, title, price in order.items.order_by('id').values_list('course_id', 'course__title', 'price')
+    ]
+    if order.course_id or {item['course_id'] for item in items} != {line['course_id'] for line in lines}:
+        return Response({'error': 'Idempotency-Key was already used for a different cart'},
+                       status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return replay_conflict(order) or Response(checkout_payload(order, items), status=status.HTTP_200_OK)
+
+
+@query_budget(5)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsStudent])
 def create_order(request):
     """
-    Create a Razorpay order for course payment
+    Create a Razorpay order for course payment.
+    Repeating a request with the same Idempotency-Key header returns the
+    order it created instead of creating another one.
     """
     course_id = request.data.get('course_id')
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key and len(idempotency_key) > 64:
+        return Response({'error': 'Idempotency-Key must be at most 64 characters'},
+                       status=status.HTTP_400_BAD_REQUEST)
     
     if not course_id:
         return Response({'error': 'Course ID is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -79,50 +183,49 @@ def create_order(request):
                        status=status.HTTP_400_BAD_REQUEST)
     
     # Check if user is already enrolled
-    if Enrollment.objects.filter(student=request.user, course=course).exists():
+    if get_access(request).is_enrolled(course.id):
         return Response({'error': 'You are already enrolled in this course'}, 
                        status=status.HTTP_400_BAD_REQUEST)
     
+    # Validate Razorpay keys before creating the order
+    if not razorpay_configured():
+        return Response({
+            'error': 'Razorpay is not configured. Please add your Razorpay keys to .env file.'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if idempotency_key:
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing:
+            return replay_order(existing, course)
+
     # Create order in database
-    order = Order.objects.create(
-        user=request.user,
-        course=course,
-        amount=course.price,
-        status='CREATED'
-    )
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user,
+                course=course,
+                amount=course.price,
+                status='CREATED',
+                idempotency_key=idempotency_key
+            )
+    except IntegrityError:
+        # A concurrent request with the same key got there first. Its order may
+        # already be gone again if that request's gateway call failed.
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing is None:
+            return Response({'error': 'A request with this Idempotency-Key just failed. Please retry.'},
+                           status=status.HTTP_409_CONFLICT)
+        return replay_order(existing, course)
     
     # Create Razorpay order (test mode)
     try:
-        # Validate Razorpay keys before creating client
-        if not settings.RAZORPAY_KEY_ID or settings.RAZORPAY_KEY_ID == 'rzp_test_your_key_id':
-            return Response({
-                'error': 'Razorpay is not configured. Please add your Razorpay keys to .env file.'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        razorpay_client = get_razorpay_client()
-        razorpay_order = razorpay_client.order.create({
-            'amount': int(float(course.price) * 100),  # Amount in paise
-            'currency': 'INR',
-            'receipt': f'order_{order.id}',
-            'payment_capture': 1
-        })
+        create_razorpay_order(order)
         
-        order.razorpay_order_id = razorpay_order['id']
-        order.save()
-        
-        return Response({
-            'order_id': order.id,
-            'razorpay_order_id': razorpay_order['id'],
-            'amount': float(course.price),
-            'currency': 'INR',
-            'razorpay_key': settings.RAZORPAY_KEY_ID,
-            'course': {
-                'id': course.id,
-                'title': course.title,
-                'price': float(course.price)
-            }
-        }, status=status.HTTP_201_CREATED)
+        return Response(order_payload(order, course), status=status.HTTP_201_CREATED)
         
+    except gateway.GatewayUnavailable as e:
+        order.delete()
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         order.delete()
         import traceback
@@ -132,6 +235,79 @@ def create_order(request):
                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@query_budget(5)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsStudent])
+def checkout(request):
+    """
+    Create one order and one Razorpay order for every course in the cart.
+    Courses the student is already enrolled in are left out. Repeating a
+    request with the same Idempotency-Key header returns the order it
+    created instead of creating another one.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key and len(idempotency_key) > 64:
+        return Response({'error': 'Idempotency-Key must be at most 64 characters'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    lines = list(
+        CartItem.objects.filter(user=request.user, course__is_approved=True)
+        .annotate(enrolled=Exists(
+            Enrollment.objects.filter(student=request.user, course=OuterRef('course'))
+        ))
+        .filter(enrolled=False)
+        .order_by('created_at')
+        .values('course_id', 'course__title', 'course__price')
+    )
+    if not lines:
+        return Response({'error': 'Your cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+
+    total = sum(line['course__price'] for line in lines)
+    if total <= 0:
+        return Response({'error': 'These courses are free. No payment required.'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    if not razorpay_configured():
+        return Response({
+            'error': 'Razorpay is not configured. Please add your Razorpay keys to .env file.'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if idempotency_key:
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing:
+            return replay_checkout(existing, lines)
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user, amount=total, status='CREATED', idempotency_key=idempotency_key
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, course_id=line['course_id'], price=line['course__price'])
+                for line in lines
+            ])
+    except IntegrityError:
+        # Same race as in create_order: a concurrent request with this key won
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing is None:
+            return Response({'error': 'A request with this Idempotency-Key just failed. Please retry.'},
+                           status=status.HTTP_409_CONFLICT)
+        return replay_checkout(existing, lines)
+
+    try:
+        create_razorpay_order(order)
+    except gateway.GatewayUnavailable as e:
+        order.delete()
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        order.delete()
+        return Response({'error': f'Failed to create payment order: {str(e)}'},
+                       status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(checkout_payload(order, lines), status=status.HTTP_201_CREATED)
+
+
+@query_budget(9)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsStudent])
 def verify_payment(request):
@@ -151,76 +327,167 @@ def verify_payment(request):
     except Order.DoesNotExist:
         return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    # Verify signature
+    if order.razorpay_order_id != razorpay_order_id:
+        return Response({'error': 'Payment does not belong to this order'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    # Verify signature before taking any locks
+    generated_signature = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+    if not hmac.compare_digest(generated_signature, str(razorpay_signature)):
+        # Never downgrade an order that has already been paid
+        Order.objects.filter(id=order.id, status='CREATED').update(status='FAILED', updated_at=timezone.now())
+        return Response({'error': 'Invalid payment signature'}, 
+                      status=status.HTTP_400_BAD_REQUEST)
+
+    # Payment verified successfully: record it and enroll the student.
+    # fulfil_order locks the order, so a concurrent or repeated verification
+    # waits for the first one and then replays its result.
+    course_ids, fulfilled = fulfil_order(order, razorpay_payment_id, razorpay_signature)
+    if not fulfilled:
+        paid_with = Payment.objects.filter(order=order).values_list('razorpay_payment_id', flat=True).first()
+        if paid_with != razorpay_payment_id:
+            return Response({'error': 'Order was already paid with a different payment'},
+                           status=status.HTTP_409_CONFLICT)
+
+    return Response({
+        'message': 'Payment verified successfully',
+        'order_id': order.id,
+        'course_id': order.course_id,
+        'course_ids': course_ids
+    }, status=status.HTTP_200_OK)
+
+
+@query_budget(1)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def razorpay_webhook(request):
+    """
+    Receive a Razorpay webhook: check its signature and store it for
+    `manage.py process_webhook_events`, which enrolls paid orders even when
+    the browser never calls verify_payment
+    """
+    body = request.body
+    if not webhooks.verify_signature(body, request.headers.get('X-Razorpay-Signature', '')):
+        return Response({'error': 'Invalid webhook signature'}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        generated_signature = hmac.new(
-            settings.RAZORPAY_KEY_SECRET.encode(),
-            f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        if generated_signature != razorpay_signature:
-            order.status = 'FAILED'
-            order.save()
-            return Response({'error': 'Invalid payment signature'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
-        # Payment verified successfully
-        Payment.objects.create(
-            order=order,
-            razorpay_payment_id=razorpay_payment_id,
-            razorpay_signature=razorpay_signature
-        )
-        
-        order.status = 'PAID'
-        order.save()
-        
-        # Enroll student in course
-        enrollment, created = Enrollment.objects.get_or_create(
-            student=request.user,
-            course=order.course
+        webhooks.record_event(body, request.headers.get('X-Razorpay-Event-Id'))
+    except ValueError:
+        return Response({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'status': 'ok'}, status=status.HTTP_200_OK)
+
+
+# Columns OrderSerializer reads; the nested courses use CourseSummarySerializer.
+ORDER_FIELDS = ['id', 'user', 'course', 'amount', 'status', 'razorpay_order_id', 'created_at', 'updated_at']
+
+
+def serialized_orders(orders, request=None):
+    """
+    `orders` restricted to the columns OrderSerializer renders for
+    `request` (all default fields without one), with the joins and
+    prefetches those fields need
+    """
+    fields, expanded, columns = set(ORDER_FIELDS) | {'course_details', 'items'}, set(), list(ORDER_FIELDS)
+    if request is not None:
+        fields = OrderSerializer.requested_fields(request)
+        expanded = OrderSerializer.expanded_fields(request)
+        columns = OrderSerializer.only_fields(request)
+
+    related = []
+    if 'course_details' in fields:
+        related.append('course__instructor')
+        columns += CourseSummarySerializer.load_only('course')
+    if 'payment' in expanded:
+        related.append('payment')
+        columns += [f'payment__{field}' for field in PaymentSerializer.Meta.fields]
+    orders = orders.select_related(*related).only(*columns)
+
+    if 'items' in fields:
+        items = OrderItem.objects.select_related('course__instructor').only(
+            'id', 'order', 'price', *CourseSummarySerializer.load_only('course')
         )
-        
-        return Response({
-            'message': 'Payment verified successfully',
-            'order_id': order.id,
-            'enrollment_id': enrollment.id,
-            'course_id': order.course.id
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        order.status = 'FAILED'
-        order.save()
-        return Response({'error': f'Payment verification failed: {str(e)}'}, 
-                       status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        orders = orders.prefetch_related(Prefetch('items', queryset=items))
+    return orders
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_orders(request):
     """
     Get all orders for the authenticated user
     """
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    serializer = OrderSerializer(orders, many=True)
+    orders = serialized_orders(
+        Order.objects.filter(user=request.user).exclude(status='EXPIRED').order_by('-created_at'),
+        request
+    )
+    serializer = OrderSerializer(orders, many=True, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+EARNINGS_PAGE_SIZE = 20
+EARNINGS_MAX_PAGE_SIZE = 100
+
+
+@query_budget(8)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_instructor_earnings(request):
     """
-    Get all paid orders for courses taught by the instructor
+    Earnings for courses taught by the instructor: totals, per-course
+    breakdown and a day/month series aggregated in the database, plus a
+    keyset-paginated list of the sales themselves.
+
+    Query params: interval=day|month, since=<ISO datetime> (series only),
+    page_size (default 20, max 100) and cursor (from orders.next).
     """
-    # Get all courses by this instructor
-    instructor_courses = Course.objects.filter(instructor=request.user)
-    
-    # Get all paid orders for these courses
-    orders = Order.objects.filter(
-        course__in=instructor_courses,
-        status='PAID'
-    ).select_related('course', 'user').order_by('-created_at')
-    
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    interval = request.query_params.get('interval', 'month')
+    if interval not in earnings.INTERVALS:
+        return Response(
+            {'error': f"interval must be one of {sorted(earnings.INTERVALS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+    since = request.query_params.get('since')
+    if since:
+        try:
+            parsed = parse_datetime(since) or datetime.combine(parse_date(since), datetime.min.time())
+        except (TypeError, ValueError):
+            return Response({'error': 'since must be an ISO date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        since = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+    try:
+        page_size = min(int(request.query_params.get('page_size', EARNINGS_PAGE_SIZE)), EARNINGS_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = 0
+    if page_size < 1:
+        return Response({'error': 'page_size must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        sales, next_cursor = earnings.sales_page(request.user, page_size, request.query_params.get('cursor'))
+    except earnings.CursorError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    summary = earnings.summarize(request.user, interval, since)
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+
+    summary['orders'] = {'results': sales, 'next': next_url}
+    return Response(EarningsSerializer(summary).data, status=status.HTTP_200_OK)
+
+
+@query_budget(1)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def gateway_status(request):
+    """
+    Circuit state and request/latency counters of the Razorpay client in this process
+    """
+    return Response(gateway.status(), status=status.HTTP_200_OK)
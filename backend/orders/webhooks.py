@@ -0,0 +1,112 @@
+"""
+Razorpay webhook inbox.
+
+The webhook view only checks the signature and stores the event
+(`record_event`); `process_pending` applies stored events in batches and
+is run by `manage.py process_webhook_events`. Razorpay retries deliveries,
+so events are deduplicated by their X-Razorpay-Event-Id.
+"""
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Order, WebhookEvent
+from .payments import fulfil_order
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+class EventError(Exception):
+    """The event can't be applied; it is retried until MAX_ATTEMPTS."""
+
+
+def signature(body):
+    """Hex HMAC-SHA256 of the raw request body, as Razorpay signs it."""
+    return hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, received):
+    return bool(settings.RAZORPAY_WEBHOOK_SECRET and received) and hmac.compare_digest(signature(body), received)
+
+
+def record_event(body, event_id=None):
+    """
+    Store a verified delivery. Returns False when the event was already
+    stored (a redelivery). Raises ValueError unless the body is a JSON object.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook body must be a JSON object")
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(
+                event_id=event_id or hashlib.sha256(body).hexdigest(),
+                event=payload.get('event', ''),
+                payload=payload
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def payment_captured(payload):
+    payment = payload['payload']['payment']['entity']
+    order = Order.objects.filter(razorpay_order_id=payment['order_id']).first()
+    if order is None:
+        raise EventError(f"No order for Razorpay order {payment['order_id']}")
+    if payment.get('amount') != round(order.amount * 100):
+        raise EventError(f"Paid amount {payment.get('amount')} does not match order {order.id}")
+    fulfil_order(order, payment['id'])
+
+
+def payment_failed(payload):
+    payment = payload['payload']['payment']['entity']
+    Order.objects.filter(razorpay_order_id=payment['order_id'], status='CREATED').update(
+        status='FAILED', updated_at=timezone.now()
+    )
+
+
+HANDLERS = {
+    'payment.captured': payment_captured,
+    'order.paid': payment_captured,
+    'payment.failed': payment_failed,
+}
+
+
+def process_pending(batch_size=100, after_id=0):
+    """
+    Apply up to `batch_size` unprocessed events with ids above `after_id`,
+    oldest first. Rows are claimed with SKIP LOCKED so several workers can
+    run side by side, and each event runs in its own savepoint so one
+    failure doesn't undo the rest of the batch. Returns the number of events
+    handled and the last id seen, to pass as `after_id` for the next batch.
+    """
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS, id__gt=after_id)
+            .order_by('id')[:batch_size]
+        )
+        now = timezone.now()
+        for event in events:
+            event.attempts += 1
+            handler = HANDLERS.get(event.event)
+            try:
+                if handler:
+                    with transaction.atomic():
+                        handler(event.payload)
+            except Exception as e:
+                logger.warning("Webhook event %s failed: %s", event.event_id, e)
+                event.last_error = f"{type(e).__name__}: {e}"
+                continue
+            event.processed_at = now
+            event.last_error = ''
+        WebhookEvent.objects.bulk_update(events, ['attempts', 'processed_at', 'last_error'])
+    return len(events), events[-1].id if events else after_id
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:21
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes on tables that are live in production
+    atomic = False
+
+    dependencies = [
+        ('courses', '0015_hot_table_indexes'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='review',
+            index=models.Index(fields=['course', '-created_at'], name='review_course_created_idx'),
+        ),
+        # Covered by review_course_created_idx
+        migrations.AlterField(
+            model_name='review',
+            name='course',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='courses.course'),
+        ),
+    ]
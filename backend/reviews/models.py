@@ -8,6 +8,7 @@ class Review(models.Model):
 		Course,
 		on_delete=models.CASCADE,
 		related_name="reviews",
+		db_index=False,  # review_course_created_idx leads with course
 	)
 	student = models.ForeignKey(
 		settings.AUTH_USER_MODEL,
@@ -23,6 +24,10 @@ class Review(models.Model):
 	class Meta:
 		unique_together = ("course", "student")
 		ordering = ["-created_at"]
+		indexes = [
+			# A course's reviews in display order
+			models.Index(fields=["course", "-created_at"], name="review_course_created_idx"),
+		]
 
 	def __str__(self):
 		return f"{self.course.title} review by {self.student.full_name}"
@@ -1,8 +1,12 @@
 from rest_framework import serializers
+
+from accounts.serializers import UserSummarySerializer
+from courses.dynamic_fields import DynamicFieldsMixin
+from courses.serializers import CourseSummarySerializer
 from .models import Review
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source="student.full_name", read_only=True)
 
     class Meta:
@@ -19,6 +23,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "course", "student", "created_at", "updated_at"]
 
+    def get_expandable_fields(self):
+        return {
+            "student": UserSummarySerializer(read_only=True),
+            "course": CourseSummarySerializer(read_only=True),
+        }
+
     def validate_rating(self, value):
         if value < 1 or value > 5:
             raise serializers.ValidationError("Rating must be between 1 and 5.")
@@ -1,3 +1,148 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import User
+from courses import bitmaps
+from courses.models import Course, Enrollment, Lesson, LessonProgress
+from courses.testing import Call, QueryBudgetMixin, QueryPlanAssertions, seed_volume
+from .models import Review
+
+
+class ReviewConditionalGetTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		instructor = User.objects.create_user(
+			email="instructor@example.com", password="pass", full_name="Instructor", role="INSTRUCTOR"
+		)
+		cls.students = [
+			User.objects.create_user(
+				email=f"student{i}@example.com", password="pass", full_name=f"Student {i}", role="STUDENT"
+			)
+			for i in range(2)
+		]
+		cls.course = Course.objects.create(
+			title="Course", description="", price=0, instructor=instructor, is_approved=True
+		)
+		cls.review = Review.objects.create(course=cls.course, student=cls.students[0], rating=4)
+
+	def revalidate(self, url):
+		response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		etag = response["ETag"]
+		self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		return etag
+
+	def assertChanged(self, url, etag):
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response["ETag"], etag)
+
+	def test_etag_follows_review_changes(self):
+		url = f"/api/courses/{self.course.id}/reviews/"
+		etag = self.revalidate(url)
+		Review.objects.create(course=self.course, student=self.students[1], rating=5)
+		self.assertChanged(url, etag)
+
+		etag = self.revalidate(url)
+		self.review.comment = "Edited"
+		self.review.save()
+		self.assertChanged(url, etag)
+
+		# Deleting moves no timestamp; the row count still changes the ETag
+		etag = self.revalidate(url)
+		self.review.delete()
+		self.assertChanged(url, etag)
+
+
+class ReviewCompletionGateTests(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		instructor = User.objects.create_user(
+			email="instructor@example.com", password="pass", full_name="Instructor", role="INSTRUCTOR"
+		)
+		cls.student = User.objects.create_user(
+			email="student@example.com", password="pass", full_name="Student", role="STUDENT"
+		)
+		cls.course = Course.objects.create(
+			title="Course", description="", price=0, instructor=instructor, is_approved=True
+		)
+		cls.lessons = [Lesson.objects.create(course=cls.course, title=f"Lesson {i}", order=i) for i in (1, 2)]
+		Enrollment.objects.create(student=cls.student, course=cls.course)
+
+	def setUp(self):
+		self.client = APIClient()
+		self.client.force_authenticate(self.student)
+		self.url = f"/api/courses/{self.course.id}/reviews/"
+
+	def complete(self, *lessons):
+		for lesson in lessons:
+			self.client.post(f"/api/lessons/{lesson.id}/complete/")
+
+	def review(self):
+		return self.client.post(self.url, {"rating": 5, "comment": "Great"})
+
+	def test_all_lessons_must_be_completed(self):
+		self.complete(self.lessons[0])
+		self.assertEqual(self.review().status_code, 403)
+		self.complete(self.lessons[1])
+		self.assertEqual(self.review().status_code, 201)
+
+	def test_stale_bitmaps_fall_back_to_progress(self):
+		self.complete(*self.lessons)
+		# A third lesson at the completed first lesson's old position
+		Lesson.objects.filter(pk=self.lessons[0].pk).update(order=3)
+		extra = Lesson.objects.create(course=self.course, title="Extra", order=1)
+		bitmaps.schedule_rebuild([self.course.id])
+		self.assertEqual(self.review().status_code, 403)
+
+		self.complete(extra)
+		self.assertEqual(self.review().status_code, 201)
+
+
+class ReviewQueryPlanTests(QueryPlanAssertions, TestCase):
+	"""A course's reviews are listed from review_course_created_idx, checked with EXPLAIN."""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.data = seed_volume(courses=200, students=400, instructors=10)
+
+	def test_course_reviews(self):
+		course = self.data["courses"][0]
+		with CaptureQueriesContext(connection) as ctx:
+			response = APIClient().get(f"/api/courses/{course.id}/reviews/")
+		self.assertEqual(response.status_code, 200)
+		sql = self.main_query(ctx.captured_queries, "reviews_review")
+		self.assertUsesIndex(sql, "reviews_review", "review_course_created_idx")
+
+
+class ReviewQueryBudgetTests(QueryBudgetMixin, TestCase):
+	urlconf = "reviews.urls"
+
+	def prepare(self, data):
+		course = data["courses"][1]
+		reviewer, author = data["students"][1], data["students"][2]
+		Review.objects.filter(course=course, student__in=[reviewer, author]).delete()
+		# The reviewer has finished the course, so their review is accepted
+		Enrollment.objects.get_or_create(student=reviewer, course=course)
+		for lesson in course.lessons.all():
+			LessonProgress.objects.update_or_create(
+				student=reviewer, lesson=lesson, defaults={"is_completed": True}
+			)
+		bitmaps.rebuild_course_bitmaps([course.id])
+		review = Review.objects.create(course=course, student=author, rating=4, comment="Solid")
+		return {"course": course, "reviewer": reviewer, "author": author, "review": review}
+
+	scenarios = {
+		"course-reviews": [
+			Call("get", lambda ctx: f"/api/courses/{ctx['course'].id}/reviews/"),
+			Call("post", lambda ctx: f"/api/courses/{ctx['course'].id}/reviews/", "reviewer", status=201,
+				 data={"rating": 5, "comment": "Great"}),
+		],
+		"review-detail": [
+			Call("get", lambda ctx: f"/api/reviews/{ctx['review'].id}/"),
+			Call("patch", lambda ctx: f"/api/reviews/{ctx['review'].id}/", "author", data={"rating": 5}),
+			Call("delete", lambda ctx: f"/api/reviews/{ctx['review'].id}/", "author", status=204),
+		],
+	}
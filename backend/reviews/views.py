@@ -1,8 +1,12 @@
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied
 
-from courses.models import Course, Enrollment, Lesson, LessonProgress
+from courses import bitmaps
+from courses.budgets import query_budget
+from courses.conditional import ConditionalListMixin
+from courses.models import BitmapRebuild, Course, Enrollment, Lesson, LessonProgress
 from accounts.permissions import IsStudent
 from .models import Review
 from .serializers import ReviewSerializer
@@ -17,7 +21,8 @@ class IsReviewOwnerOrAdmin(permissions.BasePermission):
 		return obj.student == request.user or getattr(request.user, "role", None) == "ADMIN"
 
 
-class CourseReviewListCreateView(generics.ListCreateAPIView):
+@query_budget(GET=2, POST=5)
+class CourseReviewListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
 	serializer_class = ReviewSerializer
 
 	def get_permissions(self):
@@ -26,29 +31,48 @@ class CourseReviewListCreateView(generics.ListCreateAPIView):
 		return [permissions.AllowAny()]
 
 	def get_queryset(self):
-		return Review.objects.filter(course_id=self.kwargs["course_id"]).select_related("student")
+		reviews = Review.objects.filter(course_id=self.kwargs["course_id"])
+		if self.request.method != "GET":
+			return reviews.select_related("student")
+
+		fields = ReviewSerializer.requested_fields(self.request)
+		reviews = reviews.only(*ReviewSerializer.only_fields(self.request))
+		if "student_name" in fields or "student" in ReviewSerializer.expanded_fields(self.request):
+			reviews = reviews.select_related("student")
+		if "course" in ReviewSerializer.expanded_fields(self.request):
+			reviews = reviews.select_related("course__instructor")
+		return reviews
 
 	def perform_create(self, serializer):
 		course = get_object_or_404(Course, id=self.kwargs["course_id"])
 
 		# Only enrolled students can review
-		if not Enrollment.objects.filter(student=self.request.user, course=course).exists():
+		enrollment = (
+			Enrollment.objects.filter(student=self.request.user, course=course)
+			.only("completed_lessons_bitmap")
+			.annotate(stale=Exists(BitmapRebuild.objects.filter(course=OuterRef("course_id"))))
+			.first()
+		)
+		if enrollment is None:
 			raise PermissionDenied("You must be enrolled to review this course.")
 
 		# Require all lessons completed before reviewing
-		lesson_count = Lesson.objects.filter(course=course).count()
-		completed_count = LessonProgress.objects.filter(
-			student=self.request.user,
-			lesson__course=course,
-			is_completed=True,
-		).count()
-
-		if lesson_count == 0 or completed_count < lesson_count:
+		lesson_orders = Lesson.objects.filter(course=course).values_list("order", flat=True)
+		if enrollment.stale:
+			# Lessons changed since the bitmaps were built; count progress rows instead
+			completed = LessonProgress.objects.filter(
+				student=self.request.user, lesson__course=course, is_completed=True
+			).count()
+			finished = bool(lesson_orders) and completed == len(lesson_orders)
+		else:
+			finished = bitmaps.covers(enrollment.completed_lessons_bitmap, lesson_orders)
+		if not finished:
 			raise PermissionDenied("Complete all lessons before submitting a review.")
 
 		serializer.save(student=self.request.user, course=course)
 
 
+@query_budget(GET=1, PUT=3, PATCH=3, DELETE=3)
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
 	queryset = Review.objects.select_related("student", "course")
 	serializer_class = ReviewSerializer
@@ -1,6 +1,7 @@
 import API from './axiosCourses';
 
-export const getCourses = () => API.get('courses/');
+// The catalog is paginated; pass a page's `next` URL to fetch the following page.
+export const getCourses = (url = 'courses/') => API.get(url);
 export const getCourse = (id) => API.get(`courses/${id}/`);
 export const createCourse = (data) => API.post('courses/', data);
 export const updateCourse = (id, data) => API.put(`courses/${id}/`, data);
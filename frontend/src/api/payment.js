@@ -5,10 +5,22 @@ const getAuthHeaders = () => {
   return token ? { Authorization: `Token ${token}` } : {};
 };
 
-export const createOrder = (courseId) => {
+// Retries with the same idempotencyKey return the order created by the first attempt
+export const createOrder = (courseId, idempotencyKey) => {
+  const headers = getAuthHeaders();
+  if (idempotencyKey) headers['Idempotency-Key'] = idempotencyKey;
   return axios.post('http://localhost:8000/api/orders/create/', 
     { course_id: courseId },
-    { headers: getAuthHeaders() }
+    { headers }
+  );
+};
+
+export const checkoutCart = (idempotencyKey) => {
+  const headers = getAuthHeaders();
+  if (idempotencyKey) headers['Idempotency-Key'] = idempotencyKey;
+  return axios.post('http://localhost:8000/api/orders/checkout/',
+    {},
+    { headers }
   );
 };
 
@@ -25,8 +37,8 @@ export const getUserOrders = () => {
   );
 };
 
-export const getInstructorEarnings = () => {
-  return axios.get('http://localhost:8000/api/orders/instructor-earnings/',
+export const getInstructorEarnings = (cursorUrl = null) => {
+  return axios.get(cursorUrl || 'http://localhost:8000/api/orders/instructor-earnings/',
     { headers: getAuthHeaders() }
   );
 };
@@ -3,20 +3,20 @@ import { getInstructorEarnings } from '../../api/payment';
 
 export default function InstructorEarnings() {
   const [orders, setOrders] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(false);
-  const [totalEarnings, setTotalEarnings] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchEarnings = async () => {
       try {
         setLoading(true);
+        // Totals and the per-course breakdown are computed by the server
         const response = await getInstructorEarnings();
-        const earnings = Array.isArray(response.data) ? response.data : [];
-        setOrders(earnings);
-        
-        // Calculate total earnings
-        const total = earnings.reduce((sum, order) => sum + parseFloat(order.amount || 0), 0);
-        setTotalEarnings(total);
+        setSummary(response.data);
+        setOrders(response.data.orders?.results || []);
+        setNextPage(response.data.orders?.next || null);
       } catch (err) {
         console.error('Error fetching instructor earnings:', err);
       } finally {
@@ -27,6 +27,19 @@ export default function InstructorEarnings() {
     fetchEarnings();
   }, []);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await getInstructorEarnings(nextPage);
+      setOrders(prev => [...prev, ...(response.data.orders?.results || [])]);
+      setNextPage(response.data.orders?.next || null);
+    } catch (err) {
+      console.error('Error fetching more earnings:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="bg-white rounded-lg shadow p-6">
       <div className="flex items-center justify-between mb-4">
@@ -34,10 +47,26 @@ export default function InstructorEarnings() {
         {orders.length > 0 && (
           <div className="text-right">
             <p className="text-sm text-gray-500">Total Earnings</p>
-            <p className="text-2xl font-bold text-green-600">₹{totalEarnings.toFixed(2)}</p>
+            <p className="text-2xl font-bold text-green-600">₹{Number(summary.gross_revenue).toFixed(2)}</p>
+            <p className="text-xs text-gray-500">
+              {summary.sales_count} sales in {summary.order_count} orders
+            </p>
           </div>
         )}
       </div>
+
+      {summary?.courses?.length > 0 && (
+        <div className="grid grid-cols-1 sm:grid-cols-2 gap-3 mb-6">
+          {summary.courses.map(course => (
+            <div key={course.course_id} className="border border-gray-200 rounded-lg p-3">
+              <p className="text-sm font-medium text-gray-900 truncate">{course.title}</p>
+              <p className="text-sm text-gray-500">
+                ₹{course.revenue} · {course.sales} {course.sales === 1 ? 'sale' : 'sales'}
+              </p>
+            </div>
+          ))}
+        </div>
+      )}
       
       {loading ? (
         <p className="text-center text-gray-500">Loading earnings...</p>
@@ -67,10 +96,10 @@ export default function InstructorEarnings() {
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
               {orders.map(order => (
-                <tr key={order.id} className="hover:bg-gray-50">
+                <tr key={`${order.id}-${order.course}`} className="hover:bg-gray-50">
                   <td className="px-6 py-4 whitespace-nowrap">
                     <div className="text-sm font-medium text-gray-900">
-                      {order.course_details?.title || `Course #${order.course}`}
+                      {order.course_title || `Course #${order.course}`}
                     </div>
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap">
@@ -97,6 +126,17 @@ export default function InstructorEarnings() {
               ))}
             </tbody>
           </table>
+          {nextPage && (
+            <div className="text-center mt-4">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 text-sm font-medium text-blue-600 border border-blue-600 rounded-lg hover:bg-blue-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
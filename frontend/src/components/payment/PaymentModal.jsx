@@ -1,10 +1,12 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import PropTypes from 'prop-types';
 import { createOrder, verifyPayment } from '../../api/payment';
 
-export default function PaymentModal({ course, onClose, onSuccess }) {
+export default function PaymentModal({ course, onClose, onSuccess, createPaymentOrder }) {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  // One key per modal, so double clicks and retries reuse the same order
+  const idempotencyKey = useRef(crypto.randomUUID());
 
   const loadRazorpayScript = () => {
     return new Promise((resolve) => {
@@ -29,8 +31,8 @@ export default function PaymentModal({ course, onClose, onSuccess }) {
         return;
       }
 
-      // Create order
-      const orderResponse = await createOrder(course.id);
+      // Create order (a single course, or the whole cart when createPaymentOrder is given)
+      const orderResponse = createPaymentOrder ? await createPaymentOrder(idempotencyKey.current) : await createOrder(course.id, idempotencyKey.current);
       const { razorpay_order_id, amount, currency, razorpay_key, order_id } = orderResponse.data;
 
       // Razorpay options
@@ -161,9 +163,10 @@ PaymentModal.propTypes = {
   course: PropTypes.shape({
     id: PropTypes.number.isRequired,
     title: PropTypes.string.isRequired,
-    description: PropTypes.string.isRequired,
+    description: PropTypes.string,
     price: PropTypes.oneOfType([PropTypes.string, PropTypes.number]).isRequired,
   }).isRequired,
   onClose: PropTypes.func.isRequired,
   onSuccess: PropTypes.func.isRequired,
+  createPaymentOrder: PropTypes.func,
 };
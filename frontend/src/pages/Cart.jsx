@@ -5,6 +5,7 @@ import Footer from '../components/common/Footer';
 import HomeCourseCard from '../components/common/HomeCourseCard';
 import PaymentModal from '../components/payment/PaymentModal';
 import { fetchCartItems, removeCartItem } from '../api/cart';
+import { checkoutCart } from '../api/payment';
 import { enrollCourse } from '../api/courses';
 
 export default function Cart() {
@@ -108,6 +109,15 @@ export default function Cart() {
     navigate(`/courses/${courseId}/lessons/`);
   };
 
+  const handleCartPaymentSuccess = () => {
+    // The server enrolls every course in the order and empties the cart.
+    setShowPaymentModal(false);
+    setSelectedCourse(null);
+    setItems([]);
+    emitCartChanged();
+    navigate('/courses');
+  };
+
   const handlePaymentClose = () => {
     setShowPaymentModal(false);
     setSelectedCourse(null);
@@ -115,10 +125,20 @@ export default function Cart() {
 
   const handleCheckout = () => {
     if (!items.length) return;
-    // For now, trigger payment/enroll for the first item in the cart
-    const item = items[0];
-    const course = { ...item.course_details, id: item.course };
-    handleEnroll(course);
+    if (items.length === 1 || total <= 0) {
+      const item = items[0];
+      handleEnroll({ ...item.course_details, id: item.course, is_approved: true });
+      return;
+    }
+    // Pay for the whole cart with a single order
+    setSelectedCourse({
+      id: 0,
+      title: `${items.length} courses`,
+      description: items.map(item => item.course_details?.title).filter(Boolean).join(', '),
+      price: total,
+      isCart: true,
+    });
+    setShowPaymentModal(true);
   };
 
   return (
@@ -141,7 +161,8 @@ export default function Cart() {
           <div className="space-y-6">
             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
               {items.map(item => {
-                const course = { ...item.course_details, id: item.course };
+                // Only approved courses can be added to the cart
+                const course = { ...item.course_details, id: item.course, is_approved: true };
                 return (
                   <div key={item.id} className="relative">
                     <HomeCourseCard
@@ -172,7 +193,7 @@ export default function Cart() {
                 disabled={items.length === 0}
                 onClick={handleCheckout}
               >
-                Checkout Each courses 
+                Checkout
               </button>
             </div>
           </div>
@@ -184,7 +205,8 @@ export default function Cart() {
         <PaymentModal
           course={selectedCourse}
           onClose={handlePaymentClose}
-          onSuccess={handlePaymentSuccess}
+          onSuccess={selectedCourse.isCart ? handleCartPaymentSuccess : handlePaymentSuccess}
+          createPaymentOrder={selectedCourse.isCart ? checkoutCart : undefined}
         />
       )}
     </>
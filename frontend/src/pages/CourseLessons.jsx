@@ -69,9 +69,7 @@ export default function CourseLessons() {
         if (user.role === 'STUDENT') {
           try {
             const progRes = await getCourseProgress(id);
-            const list = Array.isArray(progRes.data) ? progRes.data : (progRes.data.results || []);
-            const doneIds = list.filter(p => p.is_completed).map(p => p.lesson);
-            setCompletedIds(doneIds);
+            setCompletedIds(progRes.data?.completed_lesson_ids || []);
           } catch (e) {
             console.error('Failed to load progress', e);
           }
@@ -8,6 +8,8 @@ import PaymentModal from '../components/payment/PaymentModal';
 export default function Courses() {
   const [courses, setCourses] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState('');
   const [selectedCategory, setSelectedCategory] = useState('ALL');
   const [sortMode, setSortMode] = useState('NEWEST'); // NEWEST | TOP_RATED | TITLE | PRICE_ASC | PRICE_DESC
@@ -26,21 +28,31 @@ export default function Courses() {
     return `http://localhost:8000${thumbnailPath}`;
   };
 
-  const fetchCourses = async () => {
+  const fetchCourses = async (url) => {
     try {
-      const response = await getCourses();
+      const response = await getCourses(url);
       const payload = Array.isArray(response.data)
         ? response.data
         : (response.data?.results || []);
-      const sorted = [...payload].sort((a, b) => (a?.id || 0) - (b?.id || 0));
-      setCourses(sorted);
+      setNextUrl(response.data?.next || null);
+      setCourses(prev => {
+        const merged = url ? [...prev, ...payload.filter(c => !prev.some(p => p.id === c.id))] : payload;
+        return [...merged].sort((a, b) => (a?.id || 0) - (b?.id || 0));
+      });
     } catch (err) {
       console.error('Error fetching courses:', err);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    if (!nextUrl || loadingMore) return;
+    setLoadingMore(true);
+    fetchCourses(nextUrl);
+  };
+
   const handleEnroll = async (courseId) => {
     const course = courses.find(c => c.id === courseId);
 
@@ -331,6 +343,19 @@ export default function Courses() {
           ))}
         </div>
       )}
+
+      {nextUrl && (
+        <div className="mt-8 flex justify-center">
+          <button
+            type="button"
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="inline-flex items-center px-4 py-2 rounded-md text-sm border border-gray-300 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more courses'}
+          </button>
+        </div>
+      )}
       
       {showPaymentModal && selectedCourse && (
         <PaymentModal